@@ -0,0 +1,160 @@
+"""
+Namespaced access to the cache configured by the CACHES setting, shared by the apps.
+
+Each namespace prefixes its keys, so that the event, profile and search caches cannot collide, and counts its hits and
+misses, so that the effectiveness of each cache can be observed. Values that are expensive to compute are recomputed
+through get_or_set, which lets a single caller recompute an expired value while concurrent callers wait for it, rather
+than every caller recomputing it at once.
+"""
+import threading
+import time
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+
+MISSING = object()
+LOCAL_MEMORY_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+class NamespacedCache():
+    """
+    A namespace of the default cache.
+
+    Attributes:
+        namespace (str): the prefix of the keys in the namespace.
+        timeout (int): the default number of seconds values are cached for, or None to cache them until evicted.
+        lock_timeout (int): the most seconds a caller recomputing a value holds its lock, and so the most seconds concurrent
+            callers wait for it before recomputing the value themselves.
+        poll_interval (float): the number of seconds between checks for a value being recomputed by another caller.
+        counts (dict): the number of hits, misses, recomputations and waits for another caller's recomputation, in
+            this process.
+    """
+    def __init__(self, namespace, timeout=300, lock_timeout=10, poll_interval=0.05):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.counts = {'hits': 0, 'misses': 0, 'recomputations': 0, 'waits': 0}
+        self.counts_lock = threading.Lock()
+
+    def key(self, name):
+        return f'{self.namespace}:{name}'
+
+    def count(self, counter, number=1):
+        with self.counts_lock:
+            self.counts[counter] += number
+
+    def stats(self):
+        """
+        Returns:
+            A dictionary of the namespace counts, along with the ratio of hits to lookups.
+        """
+        with self.counts_lock:
+            counts = self.counts.copy()
+        lookups = counts['hits'] + counts['misses']
+        return {**counts, 'hit_rate': counts['hits'] / lookups if lookups else 0.0}
+
+    def reset_stats(self):
+        with self.counts_lock:
+            self.counts = dict.fromkeys(self.counts, 0)
+
+    def get(self, name, default=None):
+        value = cache.get(self.key(name), MISSING)
+        if value is MISSING:
+            self.count('misses')
+            return default
+        self.count('hits')
+        return value
+
+    def get_many(self, names):
+        """
+        Returns:
+            A dictionary of the names found in the cache to their values.
+        """
+        keys = {self.key(name): name for name in names}
+        values = {keys[key]: value for key, value in cache.get_many(keys.keys()).items()}
+        self.count('hits', len(values))
+        self.count('misses', len(keys) - len(values))
+        return values
+
+    def set(self, name, value, timeout=MISSING):
+        cache.set(self.key(name), value, self.timeout if timeout is MISSING else timeout)
+
+    def set_many(self, values, timeout=MISSING):
+        cache.set_many({self.key(name): value for name, value in values.items()},
+                       self.timeout if timeout is MISSING else timeout)
+
+    def add(self, name, value, timeout=MISSING):
+        return cache.add(self.key(name), value, self.timeout if timeout is MISSING else timeout)
+
+    def incr(self, name, delta=1):
+        """
+        Raises:
+            ValueError: if the name is not in the cache.
+        """
+        return cache.incr(self.key(name), delta)
+
+    def delete(self, name):
+        cache.delete(self.key(name))
+
+    def delete_many(self, names):
+        cache.delete_many([self.key(name) for name in names])
+
+    def get_or_set(self, name, compute, timeout=MISSING):
+        """
+        Returns the cached value of a name, computing and caching it if it is not cached.
+
+        Only one caller at a time recomputes a missing value: the others wait for it to be cached, and only recompute it
+        themselves if it is not cached within lock_timeout seconds.
+
+        Args:
+            name (str): the name of the value.
+            compute (callable): called without arguments to compute the value.
+            timeout (int or callable): the number of seconds the value is cached for, or a callable returning it from the
+                computed value. Defaults to the namespace timeout.
+        """
+        value = self.get(name, MISSING)
+        if value is not MISSING:
+            return value
+
+        lock_key = self.key(f'{name}:lock')
+        deadline = time.monotonic() + self.lock_timeout
+        locked = cache.add(lock_key, True, self.lock_timeout)
+        if not locked:
+            self.count('waits')
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                value = cache.get(self.key(name), MISSING)
+                if value is not MISSING:
+                    return value
+                locked = cache.add(lock_key, True, self.lock_timeout)
+                if locked:
+                    break
+        try:
+            self.count('recomputations')
+            value = compute()
+            self.set(name, value, timeout(value) if callable(timeout) else timeout)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return value
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Checks that the default cache is shared by the web and worker processes when the REQUIRE_SHARED_CACHE setting is on,
+    since the data cached by one process is invalidated by signals in whichever process changes it.
+    """
+    if getattr(settings, 'REQUIRE_SHARED_CACHE', False) and settings.CACHES['default']['BACKEND'] == LOCAL_MEMORY_BACKEND:
+        return [checks.Error('The default cache is a local memory cache, which is not shared by the web and worker '
+                             'processes, so changes made by one process do not invalidate the data cached by another.',
+                             hint="Set CACHE_BACKEND to 'redis', or to 'file' if all the processes run on one host.",
+                             id='eventabase.E001')]
+    return []
+
+
+event_cache = NamespacedCache('events', timeout=60 * 60 * 24)
+profile_cache = NamespacedCache('profiles', timeout=60 * 60)
+search_cache = NamespacedCache('search', timeout=600)
+
+NAMESPACES = [event_cache, profile_cache, search_cache]
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 import dj_database_url
 if os.path.isfile('env.py'):
@@ -118,6 +119,35 @@ else:
         'default': dj_database_url.parse(os.environ.get('DATABASE_URL'))
     }
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# CACHE_BACKEND selects a local memory cache per process (the default), a file based cache shared by the processes on a
+# host, or a Redis-compatible server at CACHE_URL shared by all hosts (which requires the redis package).
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'eventabase',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'eventabase_cache')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CACHE_URL', 'redis://127.0.0.1:6379'),
+    },
+}
+CACHES = {
+    'default': {**CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')], 'KEY_PREFIX': 'eventabase', 'TIMEOUT': 300}
+}
+# the cached homepage sections and event cards are invalidated by signals in whichever process changes their data, a web
+# or worker process, so outside development the cache must be shared by all the processes. The check fails with a local
+# memory cache.
+REQUIRE_SHARED_CACHE = not development
+
 # authentication_backends
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
@@ -188,3 +218,21 @@ ACCOUNT_FORMS = {
 }
 # Uncommented during testing, to stop rate_limits being applied during testing
 # ACCOUNT_RATE_LIMITS = {}
+
+# address geocoding. GEOCODER_URL may point at a local stub geocoder, started with the run_geocoder_stub command.
+GEOCODER = {
+    'BACKEND': 'home.geocoders.GeoapifyGeocoder',
+    'URL': os.environ.get('GEOCODER_URL', 'https://api.geoapify.com'),
+    'API_KEY': os.environ.get('GEOAPIFY_API_KEY'),
+    # seconds allowed to connect, and to wait for the response
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 5,
+    # consecutive failed or slow requests after which requests stop being made, for RESET_TIMEOUT seconds
+    'FAILURE_THRESHOLD': 5,
+    'RESET_TIMEOUT': 30,
+    'SLOW_CALL_DURATION': 2,
+}
+
+# when set to 1 or true, the homepage is returned as a shell, whose sections are fetched once it has loaded, and whose modals
+# are fetched when first opened.
+LAZY_HOMEPAGE_SECTIONS = os.environ.get('LAZY_HOMEPAGE_SECTIONS', '').lower() in ('1', 'true')
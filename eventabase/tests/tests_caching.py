@@ -0,0 +1,105 @@
+import tempfile
+import threading
+import time
+from django.core import checks
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from ..caching import LOCAL_MEMORY_BACKEND, NamespacedCache, check_shared_cache
+
+
+class TestNamespacedCache(SimpleTestCase):
+    """
+    Tests for the NamespacedCache class.
+    """
+    def setUp(self):
+        cache.clear()
+        self.events = NamespacedCache('events', timeout=60)
+        self.search = NamespacedCache('search', timeout=60)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_namespaces_and_stats(self):
+        """
+        Tests that names are cached under their namespace, and that hits and misses are counted per namespace.
+        """
+        self.events.set('popular', [1, 2])
+        self.assertEqual(cache.get('events:popular'), [1, 2])
+        self.assertIsNone(self.search.get('popular'))
+        self.assertEqual(self.events.get('popular'), [1, 2])
+        # cached falsy values are hits
+        self.events.set('empty', [])
+        self.assertEqual(self.events.get('empty', 'missing'), [])
+        self.assertEqual(self.events.get_many(['popular', 'empty', 'unknown']), {'popular': [1, 2], 'empty': []})
+        self.assertEqual(self.events.stats(), {'hits': 4, 'misses': 1, 'recomputations': 0, 'waits': 0, 'hit_rate': 0.8})
+        self.assertEqual(self.search.stats()['misses'], 1)
+        self.events.reset_stats()
+        self.assertEqual(self.events.stats()['hit_rate'], 0.0)
+
+    def test_get_or_set(self):
+        """
+        Tests that a missing value is computed and cached, and then retrieved from the cache.
+        """
+        calls = []
+        compute = lambda: calls.append(1) or 'value'
+        self.assertEqual(self.events.get_or_set('name', compute), 'value')
+        self.assertEqual(self.events.get_or_set('name', compute), 'value')
+        self.assertEqual(len(calls), 1)
+        self.assertIsNone(cache.get('events:name:lock'))
+
+    def test_get_or_set_recomputes_a_missing_value_once_for_concurrent_callers(self):
+        """
+        Tests that concurrent callers wait for a single caller to recompute a missing value.
+        """
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.events.get_or_set('name', compute)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.events.stats()['waits'], 3)
+
+    def test_get_or_set_recomputes_once_the_lock_times_out(self):
+        """
+        Tests that a caller recomputes the value itself once the caller holding the lock has taken longer than lock_timeout.
+        """
+        events = NamespacedCache('events', lock_timeout=0.2, poll_interval=0.01)
+        cache.add('events:name:lock', True, 60)
+        self.assertEqual(events.get_or_set('name', lambda: 'value'), 'value')
+        self.assertEqual(events.stats()['recomputations'], 1)
+
+    def test_file_based_cache(self):
+        """
+        Tests that the namespaces work with a file based cache.
+        """
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                                       'LOCATION': location}}):
+                self.assertEqual(self.events.get_or_set('name', lambda: 'value'), 'value')
+                self.assertEqual(self.events.get('name'), 'value')
+                self.assertEqual(self.events.add('version', 1), True)
+                self.assertEqual(self.events.incr('version'), 2)
+
+    def test_check_shared_cache(self):
+        """
+        Tests that the check fails for a local memory cache only when a shared cache is required.
+        """
+        file_cache = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': 'cache'}}
+        local_memory_cache = {'default': {'BACKEND': LOCAL_MEMORY_BACKEND}}
+        with override_settings(REQUIRE_SHARED_CACHE=True, CACHES=local_memory_cache):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['eventabase.E001'])
+            self.assertIn('eventabase.E001', [error.id for error in checks.run_checks(tags=[checks.Tags.caches])])
+        with override_settings(REQUIRE_SHARED_CACHE=True, CACHES=file_cache):
+            self.assertEqual(check_shared_cache(None), [])
+        with override_settings(REQUIRE_SHARED_CACHE=False, CACHES=local_memory_cache):
+            self.assertEqual(check_shared_cache(None), [])
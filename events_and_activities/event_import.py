@@ -0,0 +1,306 @@
+"""
+A streaming bulk import of events from CSV or JSON Lines, so that adverts can be seeded and migrated in bulk rather than
+posted one at a time.
+
+Rows are read and imported in chunks, so memory use does not grow with the size of the input. Each row is validated by
+EventImportForm with the same rules as the EventsActivitiesForm events are posted with, but against the hosts and
+occupied days retrieved once for its chunk, rather than queried for each row. The valid events of a chunk are inserted
+with bulk_create, which bypasses the model signals, so the keyword tags, search index, occupancies and homepage sections
+they keep in sync are then updated for the chunk as a whole. The errors of invalid rows are written to an error file.
+"""
+import csv
+import json
+import time
+from functools import lru_cache
+from django.core.exceptions import ValidationError
+from django.core.validators import EMPTY_VALUES
+from django.db import IntegrityError, transaction
+from django.forms.fields import Field
+from django.forms.models import ModelChoiceField
+from home.models import PostcodeCoordinates
+from home.sections import invalidate_sections
+from landing_page.models import CustomUserModel
+from .forms import EventsActivitiesForm
+from .models import EventsActivities, EventKeyword, Occupancy
+from .search import index_adverts
+
+
+def read_csv_rows(text_file):
+    """
+    Reads the rows of a CSV file, with a header row of the EventsActivitiesForm field names.
+
+    Yields:
+        (line number, row dictionary) tuples.
+    """
+    reader = csv.DictReader(text_file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl_rows(text_file):
+    """
+    Reads the rows of a JSON Lines file, of objects keyed by the EventsActivitiesForm field names. Blank lines are skipped.
+
+    Values other than strings and nulls, such as numbers, booleans and arrays, are converted to their JSON text, as the
+    form fields expect the string values a posted form or CSV file has.
+
+    Yields:
+        (line number, row dictionary) tuples. The row is None if the line is not a JSON object.
+    """
+    for line_number, line in enumerate(text_file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            yield line_number, None
+            continue
+        yield line_number, {field: value if value is None or isinstance(value, str) else json.dumps(value)
+                            for field, value in row.items()}
+
+
+@lru_cache(maxsize=None)
+def model_only_validators(form_class):
+    """
+    Returns:
+        Field name-list of validators pairs, of the validators of the model fields of a ModelForm that its form fields
+        do not run themselves.
+    """
+    model_fields = {field.name: field for field in form_class._meta.model._meta.fields}
+    return {name: [validator for validator in model_fields[name].validators if validator not in field.validators]
+            for name, field in form_class.base_fields.items() if name in model_fields}
+
+
+class ChunkUserField(Field):
+    """
+    A field choosing the user of a username from the users retrieved for the chunk of rows being imported, rather than
+    querying the user of each row.
+
+    Attributes:
+        users (dict): username-CustomUserModel model instance pairs.
+    """
+    default_error_messages = {'invalid_choice': ModelChoiceField.default_error_messages['invalid_choice']}
+
+    def __init__(self, *args, users=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.users = {} if users is None else users
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.users[str(value).strip()]
+        except KeyError:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+
+
+class EventImportForm(EventsActivitiesForm):
+    """
+    EventsActivitiesForm validating a row of an import, against the users and occupied days retrieved for its chunk.
+
+    Attributes:
+        event_import (obj): the EventImport importing the row.
+    """
+    host_user = ChunkUserField()
+
+    def __init__(self, row, event_import):
+        self.event_import = event_import
+        super().__init__(data=row)
+        self.fields['host_user'].users = event_import.users
+
+    def set_field_styles(self):
+        # import forms are never rendered
+        pass
+
+    def _get_validation_exclusions(self):
+        # the model field validators the form fields do not run are run by clean instead, so the model validation,
+        # which would run the validators of the form fields again, is skipped
+        return {field.name for field in self._meta.model._meta.fields}
+
+    def validate_unique(self):
+        # the host's day is checked against the hosted days of the chunk, and the unique constraint on insert, instead
+        pass
+
+    def clean_when(self):
+        # unlike a posted event's host, the host of a row may be invalid, in which case its days are not checked
+        if 'host_user' not in self.cleaned_data:
+            return self.cleaned_data['when']
+        return super().clean_when()
+
+    def day_occupancy(self, host_user, date):
+        return self.event_import.occupancies.get((host_user.username, date))
+
+    def clean(self):
+        """
+        Extends the EventsActivitiesForm clean method to reject a second event hosted by the same user on the same day,
+        which the unique constraint on the host and date of events would otherwise reject the chunk's insert for, and to
+        run the model field validators in place of the model validation.
+        """
+        cleaned_data = super().clean()
+        host_user, when = cleaned_data.get('host_user'), cleaned_data.get('when')
+        if host_user and when and (host_user.username, when.date()) in self.event_import.hosted_days:
+            self.add_error('host_user', ValidationError(self.host_date_taken_msg, 'host date taken'))
+        self.run_model_validators()
+        return self.cleaned_data
+
+    def run_model_validators(self):
+        """
+        Runs the validators of the model fields that the form fields do not run themselves, on the valid field values
+        that are not empty, as the model validation would.
+        """
+        for field_name, validators in model_only_validators(type(self)).items():
+            value = self.cleaned_data.get(field_name)
+            if field_name not in self.cleaned_data or value in EMPTY_VALUES:
+                continue
+            errors = []
+            for validator in validators:
+                try:
+                    validator(value)
+                except ValidationError as error:
+                    errors.extend(error.error_list)
+            if errors:
+                self.add_error(field_name, errors)
+
+
+class EventImport():
+    """
+    Imports rows of event field values in chunks, inserting the valid rows and reporting the errors of the invalid rows.
+
+    Addresses are geocoded from the postcode cache only, so events whose postcodes are not cached are imported with
+    pending coordinates, to be resolved by the geocoding worker. Load a postcode dump with the load_postcode_coordinates
+    command beforehand to avoid geocoding them.
+
+    Attributes:
+        errors_file (obj): an open text file the errors of invalid rows are written to, as JSON Lines of the row's line
+                           number and its field name-error messages pairs.
+        chunk_size (int): the number of rows validated and inserted at a time.
+        metrics (dict): counts of the 'imported' and 'rejected' rows, and the 'seconds' taken.
+        users (dict): username-CustomUserModel model instance pairs of the hosts of the current chunk.
+        occupancies (dict): (username, date)-Occupancy model instance pairs of the hosts' occupied days of the current chunk.
+        hosted_days (set): (username, date) tuples of the days the hosts of the current chunk are already hosting events.
+    """
+    def __init__(self, errors_file, chunk_size=1000):
+        self.errors_file = errors_file
+        self.chunk_size = chunk_size
+        self.metrics = {'imported': 0, 'rejected': 0, 'seconds': 0.0}
+        self.users = {}
+        self.occupancies = {}
+        self.hosted_days = set()
+
+    def run(self, rows):
+        """
+        Imports the rows, a chunk at a time.
+
+        Args:
+            rows (iterable): (line number, row dictionary) tuples, as yielded by read_csv_rows and read_jsonl_rows.
+
+        Returns:
+            The metrics of the import.
+        """
+        start = time.perf_counter()
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == self.chunk_size:
+                self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk)
+        self.metrics['seconds'] = time.perf_counter() - start
+        return self.metrics
+
+    def rows_per_second(self):
+        """
+        Returns:
+            The number of rows imported or rejected per second.
+        """
+        completed = self.metrics['imported'] + self.metrics['rejected']
+        return completed / self.metrics['seconds'] if self.metrics['seconds'] else 0.0
+
+    def report(self, line_number, errors):
+        """
+        Writes the errors of an invalid row to the errors file.
+
+        Args:
+            line_number (int): the line number of the row.
+            errors (dict): field name-list of error messages pairs.
+        """
+        self.metrics['rejected'] += 1
+        errors = {field: list(messages) for field, messages in errors.items()}
+        self.errors_file.write(json.dumps({'line': line_number, 'errors': errors}) + '\n')
+
+    def retrieve_chunk_hosts(self, chunk):
+        """
+        Retrieves the hosts of a chunk of rows, and the days they are occupied on among the dates of the rows.
+        """
+        usernames, dates = set(), set()
+        for line_number, row in chunk:
+            if not row:
+                continue
+            usernames.add(str(row.get('host_user')).strip())
+            try:
+                dates.add(EventsActivitiesForm.base_fields['when'].to_python(row.get('when')).date())
+            except (ValidationError, AttributeError):
+                continue
+        self.users = CustomUserModel.objects.in_bulk(usernames, field_name='username')
+        occupancies = (Occupancy.objects.filter(user__in=self.users, date__in=dates).select_related('event')
+                                        .only('user', 'date', 'event__id', 'event__title', 'event__host_user'))
+        self.occupancies = {(occupancy.user_id, occupancy.date): occupancy for occupancy in occupancies}
+        self.hosted_days = {day for day, occupancy in self.occupancies.items() if occupancy.event.host_user_id == day[0]}
+
+    def import_chunk(self, chunk):
+        """
+        Validates a chunk of rows, reporting the errors of the invalid rows, and inserts the events of the valid rows.
+
+        Args:
+            chunk (list): (line number, row dictionary) tuples.
+        """
+        self.retrieve_chunk_hosts(chunk)
+        events, line_numbers = [], []
+        for line_number, row in chunk:
+            if row is None:
+                self.report(line_number, {'__all__': ['Each line must be a JSON object.']})
+                continue
+            form = EventImportForm(row, self)
+            if not form.is_valid():
+                self.report(line_number, form.errors)
+                continue
+            form.post_clean_processing()
+            events.append(form.instance)
+            line_numbers.append(line_number)
+            self.hosted_days.add((form.instance.host_user_id, form.instance.when.date()))
+        coordinates = PostcodeCoordinates.objects.lookup_many(event.postcode for event in events)
+        for event in events:
+            event.latitude, event.longitude = coordinates.get(PostcodeCoordinates.objects.normalise(event.postcode), (None, None))
+            event.set_derived_fields()
+        try:
+            with transaction.atomic():
+                self.insert(events)
+        except IntegrityError:
+            # a host's day was taken by an event posted since the chunk was validated, so the events are inserted one
+            # at a time to reject only those clashing.
+            for event, line_number in zip(events, line_numbers):
+                try:
+                    with transaction.atomic():
+                        self.insert([event])
+                except IntegrityError:
+                    if not EventsActivities.objects.filter(host_user=event.host_user_id, date=event.date).exists():
+                        raise
+                    self.report(line_number, {'host_user': [EventsActivitiesForm.host_date_taken_msg]})
+
+    def insert(self, events):
+        """
+        Inserts events, then updates the keyword tags, search index, occupancies and homepage sections the model signals
+        would have updated had they been saved one at a time.
+
+        Args:
+            events (list): EventsActivities model instances.
+        """
+        events = EventsActivities.objects.bulk_create(events)
+        EventKeyword.objects.sync(events)
+        index_adverts(events)
+        Occupancy.objects.occupy([Occupancy(user_id=event.host_user_id, date=event.date, event=event) for event in events])
+        invalidate_sections({event.host_user_id for event in events}, ['post_events'])
+        self.metrics['imported'] += len(events)
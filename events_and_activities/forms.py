@@ -1,9 +1,11 @@
 from django.forms.models import ModelForm
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.forms.widgets import HiddenInput
 from django.forms.fields import DateTimeField
 from landing_page.forms import FormFieldMixin
-from .models import EventsActivities, Engagement
+from home.models import PostcodeCoordinates
+from .models import EventsActivities, Occupancy
 from .validators import check_date_has_not_occured, compare_dates
 
 
@@ -12,6 +14,7 @@ class EventsActivitiesForm(ModelForm, FormFieldMixin):
     A Form for creating and posting new events
     """
     template_name = 'events_and_activities/post_events_form.html'
+    host_date_taken_msg = 'You are already advertising or hosting an event on this date.'
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -25,7 +28,6 @@ class EventsActivitiesForm(ModelForm, FormFieldMixin):
                   'address_line_one', 'city_or_town',
                   'county', 'postcode']
         widgets = {'host_user': HiddenInput()}
-        error_messages = {'host_user': {'unique_for_date': 'You are already advertising or hosting an event on this date.'}}
         help_texts = {'keywords': 'Enter a comma separated list of descriptive keywords.',
                       'description': 'Describe the event or activity.',
                       'requirements': 'Detail any significant requirements for attending the event/activity, for example costs, travel arrangements, physical demands.'}
@@ -55,12 +57,40 @@ class EventsActivitiesForm(ModelForm, FormFieldMixin):
         """
         Checks that the user is not engaged in another event on the same day as the event they wish to host.
         """
-        if Engagement.objects.filter(user=self.cleaned_data['host_user'], event__when__date=self.cleaned_data['when'].date()).exists():
-            clashed_event = Engagement.objects.get(user=self.cleaned_data['host_user'], event__when__date=self.cleaned_data['when'].date()).event
+        host_user = self.cleaned_data['host_user']
+        occupancy = self.day_occupancy(host_user, self.cleaned_data['when'].date())
+        # a day occupied by an event the user is hosting is reported by save_new_event instead
+        if occupancy and occupancy.event.host_user_id != host_user.username:
+            clashed_event = occupancy.event
             msg = f'''You cannot host an event on this date, as you are currently interested in or attending the event (ID: {clashed_event.id}) titled {clashed_event.title} on the same date.'''
             raise ValidationError(msg, 'event date clash')
         return self.cleaned_data['when']
 
+    def day_occupancy(self, host_user, date):
+        """
+        Returns:
+            The Occupancy model instance of the user's day, or None if the day is free.
+        """
+        return Occupancy.objects.occupying(host_user, date).first()
+
+    def save_new_event(self):
+        """
+        Saves the new event with a single INSERT, relying on the unique constraint on the host and date of events to
+        reject a second event hosted on the same day, rather than checking for one beforehand.
+
+        Returns:
+            The new event, or None if the host already has an event on the same day, in which case the error is added to
+            the form.
+        """
+        try:
+            with transaction.atomic():
+                return self.save()
+        except IntegrityError:
+            if not EventsActivities.objects.filter(host_user=self.instance.host_user, date=self.instance.date).exists():
+                raise
+            self.add_error('host_user', ValidationError(self.host_date_taken_msg, 'host date taken'))
+            return None
+
     def post_clean_processing(self):
         """
         Standardises cleaned field values.
@@ -69,4 +99,15 @@ class EventsActivitiesForm(ModelForm, FormFieldMixin):
         processed_data.update({field: value.title() for field, value in self.cleaned_data.items() if field in ['address_line_one', 'city_or_town', 'county']})
         processed_data['postcode'] = processed_data['postcode'].lower()
         for field, value in processed_data.items():
-            setattr(self.instance, field, value)
\ No newline at end of file
+            setattr(self.instance, field, value)
+
+    def set_cached_coordinates(self):
+        """
+        Sets the coordinates of the event address from the postcode cache, or otherwise leaves them pending, to be
+        resolved by the geocoding worker.
+
+        The event is not found by the distance filter until its coordinates are resolved, but can otherwise still be
+        advertised.
+        """
+        coordinates = PostcodeCoordinates.objects.lookup(self.instance.postcode)
+        self.instance.latitude, self.instance.longitude = coordinates or (None, None)
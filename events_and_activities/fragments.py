@@ -0,0 +1,105 @@
+"""
+Caching of the rendered event cards listed in the homepage sections and on the search event adverts page.
+
+Each card is cached in the event cache under the id of its event and a version counter, which is bumped whenever the
+event or one of its engagements is saved or deleted. A list of cards is assembled from the cache in two round trips, one
+for the versions and one for the cards, and only the cards whose event has changed since they were cached are rendered.
+"""
+import time
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+from eventabase.caching import event_cache
+from .models import EventsActivities
+
+EVENT_CARD_TEMPLATE = 'events_and_activities/event_card.html'
+CARD_TYPES = ['advertised', 'upcoming', 'interested', 'attending', 'advert']
+
+
+def version_key(event_id):
+    return f'card_version:{event_id}'
+
+
+def card_key(event_id, version, card_type):
+    return f'card:{card_type}:{event_id}:{version}'
+
+
+def new_version():
+    """
+    Returns:
+        A version number greater than any an event could have reached before, for events whose version is not cached,
+        so that cards cached under an evicted version are never used again.
+    """
+    return time.time_ns()
+
+
+def bump_event_card_version(event_id):
+    """
+    Invalidates the cached cards of an event, by bumping its version.
+
+    Args:
+        event_id (int): the id of the event.
+    """
+    try:
+        event_cache.incr(version_key(event_id))
+    except ValueError:
+        event_cache.set(version_key(event_id), new_version(), None)
+
+
+def invalidate_event_cards(event_id):
+    """
+    Invalidates the cached cards of an event straight away, and again once the current transaction commits, so that
+    cards rendered by concurrent requests from the event data before the commit are not reused.
+
+    Args:
+        event_id (int): the id of the event.
+    """
+    bump_event_card_version(event_id)
+    transaction.on_commit(lambda: bump_event_card_version(event_id))
+
+
+def event_card_versions(event_ids):
+    """
+    Returns:
+        A dictionary of event ids to their current card versions.
+
+    Args:
+        event_ids (list): the ids of the events.
+    """
+    cached_versions = event_cache.get_many([version_key(event_id) for event_id in event_ids])
+    versions = {}
+    for event_id in event_ids:
+        version = cached_versions.get(version_key(event_id))
+        if version is None:
+            event_cache.add(version_key(event_id), new_version(), None)
+            version = event_cache.get(version_key(event_id))
+        versions[event_id] = version
+    return versions
+
+
+def render_event_cards(events_data, card_type):
+    """
+    Assembles the rendered cards of a list of events from the cache, rendering and caching only those not cached.
+
+    Args:
+        events_data (list): (event data, attendee count) tuples, as retrieved for the event templates.
+        card_type (str): the type of card, one of CARD_TYPES, which determines its heading and buttons.
+
+    Returns:
+        A list of the rendered cards, in the order of the events.
+    """
+    id_field_name = EventsActivities._meta.get_field('id').verbose_name
+    event_ids = [event_data[id_field_name] for event_data, _ in events_data]
+    versions = event_card_versions(event_ids)
+    keys = [card_key(event_id, versions[event_id], card_type) for event_id in event_ids]
+    cards = event_cache.get_many(keys)
+
+    missing_cards = {}
+    template = get_template(EVENT_CARD_TEMPLATE)
+    for key, (event_data, event_count) in zip(keys, events_data):
+        if key not in cards:
+            missing_cards[key] = template.render({'event': event_data, 'event_count': event_count, 'card_type': card_type})
+    if missing_cards:
+        event_cache.set_many(missing_cards)
+        cards.update(missing_cards)
+    return [mark_safe(cards[key]) for key in keys]
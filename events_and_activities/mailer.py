@@ -0,0 +1,147 @@
+import time
+from datetime import datetime, timedelta
+from smtplib import SMTPException
+from django.core.mail import get_connection
+from django.db import transaction
+from .models import OutboxEmail
+
+
+class OutboxWorker():
+    """
+    Sends the emails queued in the outbox in batches, off the request path.
+
+    Each batch is claimed by pushing back its next attempt time, so that concurrent workers skip it, and is then sent over
+    connections to the email backend that are each reused for up to messages_per_connection emails, rather than one
+    connection being opened per email. An email that fails to send is retried with exponential backoff, up to max_attempts
+    times, after which it is marked as failed.
+
+    Attributes:
+        batch_size (int): the most emails sent per batch.
+        messages_per_connection (int): the most emails sent over a connection before it is reopened, to stay within the
+            per connection limits of email providers.
+        max_attempts (int): the number of failed attempts after which an email is marked as failed.
+        retry_delay (int): the number of seconds before the first retry of an email, doubled for each further retry.
+        max_retry_delay (int): the most seconds between retries of an email.
+        claim_timeout (int): the number of seconds a claimed batch is skipped by other workers, after which it is
+            assumed the worker sending it has stopped.
+        metrics (dict): the total number of emails sent, to be retried, and failed, the number of connections opened, and
+            the number of seconds spent sending, since the worker started.
+    """
+    def __init__(self, batch_size=100, messages_per_connection=100, max_attempts=5, retry_delay=60, max_retry_delay=3600,
+                 claim_timeout=300):
+        self.batch_size = batch_size
+        self.messages_per_connection = messages_per_connection
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.claim_timeout = claim_timeout
+        self.metrics = {'sent': 0, 'retrying': 0, 'failed': 0, 'connections': 0, 'seconds': 0.0}
+
+    def messages_per_second(self):
+        """
+        Returns:
+            The throughput of the worker, as the number of emails sent per second spent sending.
+        """
+        if not self.metrics['seconds']:
+            return 0.0
+        return self.metrics['sent'] / self.metrics['seconds']
+
+    def claim_batch(self, now):
+        """
+        Claims a batch of the emails due to be sent.
+
+        Args:
+            now (datetime): the current time.
+
+        Returns:
+            A list of the OutboxEmail model instances claimed.
+        """
+        with transaction.atomic():
+            ids = list(OutboxEmail.objects.due(now)
+                                          .select_for_update(skip_locked=True)
+                                          .values_list('id', flat=True)[:self.batch_size])
+            OutboxEmail.objects.filter(id__in=ids).update(next_attempt=now + timedelta(seconds=self.claim_timeout))
+        return list(OutboxEmail.objects.filter(id__in=ids).order_by('id'))
+
+    def record_failure(self, email, error, now):
+        """
+        Schedules the retry of an email that failed to send, or marks it as failed once it has no attempts left.
+
+        Returns:
+            The outcome of the attempt, either retrying or failed.
+        """
+        email.attempts += 1
+        email.last_error = str(error)
+        if email.attempts >= self.max_attempts:
+            email.status = 'failed'
+        else:
+            delay = min(self.retry_delay * 2 ** (email.attempts - 1), self.max_retry_delay)
+            email.next_attempt = now + timedelta(seconds=delay)
+        email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt'])
+        return 'failed' if email.status == 'failed' else 'retrying'
+
+    def send_due(self, now=None):
+        """
+        Sends a batch of the emails due to be sent, reusing each connection for up to messages_per_connection emails.
+
+        Args:
+            now (datetime): the current time. Defaults to the current time.
+
+        Returns:
+            A dictionary containing the number of emails in the batch sent, to be retried, and failed.
+        """
+        if not now:
+            now = datetime.now()
+        result = {'sent': 0, 'retrying': 0, 'failed': 0}
+        emails = self.claim_batch(now)
+        if not emails:
+            return result
+
+        start = time.perf_counter()
+        connection = None
+        try:
+            for position, email in enumerate(emails):
+                if position % self.messages_per_connection == 0:
+                    if connection:
+                        connection.close()
+                    connection = get_connection()
+                    self.metrics['connections'] += 1
+                    try:
+                        connection.open()
+                    except (SMTPException, OSError) as error:
+                        print(error)
+                        for unsent_email in emails[position:]:
+                            result[self.record_failure(unsent_email, error, now)] += 1
+                        break
+                try:
+                    connection.send_messages([email.email_message(connection)])
+                except (SMTPException, OSError) as error:
+                    print(error)
+                    result[self.record_failure(email, error, now)] += 1
+                    continue
+                email.status = 'sent'
+                email.sent = now
+                email.save(update_fields=['status', 'sent'])
+                result['sent'] += 1
+        finally:
+            if connection:
+                connection.close()
+        self.metrics['seconds'] += time.perf_counter() - start
+        for outcome, count in result.items():
+            self.metrics[outcome] += count
+        return result
+
+    def run(self, interval=5, log=print):
+        """
+        Sends batches of due emails, waiting an interval whenever there were none to send.
+
+        Args:
+            interval (int): the number of seconds to wait between polls for due emails.
+            log (function): called with a summary of each batch.
+        """
+        while True:
+            result = self.send_due()
+            if any(result.values()):
+                log(f'Outbox emails processed: {result}, at {self.messages_per_second():.1f} messages/sec')
+            else:
+                time.sleep(interval)
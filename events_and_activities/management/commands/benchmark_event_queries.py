@@ -0,0 +1,138 @@
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from landing_page.models import CustomUserModel
+from events_and_activities.models import EventsActivities, Engagement, EventKeyword, Occupancy
+from events_and_activities.search import rebuild_search_index
+from events_and_activities.views import SearchAdvertsView
+
+
+ACTIVITIES = ['paintballing', 'hiking', 'climbing', 'cycling', 'football', 'tennis', 'boardgames', 'pottery', 'baking', 'karaoke',
+              'kayaking', 'yoga', 'chess', 'photography', 'quiz', 'running', 'swimming', 'golf', 'bowling', 'camping']
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the hot EventsActivities and Engagement queries, with and without the model indexes.
+
+    A throwaway test database is created and seeded, so the configured database is never written to.
+    For each query the EXPLAIN plan and the median execution time are reported, first with the model indexes
+    dropped and then with them restored.
+    """
+    help = 'Seeds a test database with events and reports the query plans and timings of the hot queries, before and after indexing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1000000, help='Number of events to seed.')
+        parser.add_argument('--users', type=int, default=2000, help='Number of users to seed.')
+        parser.add_argument('--engagements-per-user', type=int, default=20, help='Number of events each user is engaged in.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per query.')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Number of rows inserted per bulk_create.')
+
+    def handle(self, *args, **options):
+        old_database_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            now = datetime.now().replace(second=0, microsecond=0)
+            self.seed(now, options)
+            queries = self.hot_queries(now)
+            indexed_models = [EventsActivities, Engagement]
+            with connection.schema_editor() as schema_editor:
+                for model in indexed_models:
+                    for index in model._meta.indexes:
+                        schema_editor.remove_index(model, index)
+            self.run_queries('without indexes', queries, options['repeat'])
+            with connection.schema_editor() as schema_editor:
+                for model in indexed_models:
+                    for index in model._meta.indexes:
+                        schema_editor.add_index(model, index)
+            # gathers the statistics the query planner uses to choose between indexes, as autovacuum does on PostgreSQL
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.run_queries('with indexes', queries, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+    def seed(self, now, options):
+        """
+        Seeds users, events spread a year either side of now, and engagements, with statuses consistent with their dates.
+        """
+        start = time.perf_counter()
+        usernames = [f'benchmark{number}' for number in range(options['users'])]
+        CustomUserModel.objects.bulk_create([CustomUserModel(username=username, email=f'{username}@example.com')
+                                             for username in usernames], batch_size=options['chunk_size'])
+
+        # a user hosts at most one event a day, so each event takes a distinct host and day of the two years around now
+        days = 731
+        if options['events'] > options['users'] * days:
+            raise CommandError(f'{options["users"]} users can host at most {options["users"] * days} events over {days} days.')
+        first_day = now.replace(hour=0, minute=0) - timedelta(days=days // 2)
+        events = []
+        for slot in random.sample(range(options['users'] * days), options['events']):
+            day, host = divmod(slot, options['users'])
+            when = first_day + timedelta(days=day, minutes=random.randint(0, 1439))
+            closing_date = when - timedelta(minutes=random.randint(60, 43200))
+            status = 'completed' if when < now else 'confirmed' if closing_date < now else 'advertised'
+            activities = random.sample(ACTIVITIES, 3)
+            events.append(EventsActivities(host_user_id=usernames[host], status=status, title=f'{activities[0]} meetup',
+                                           when=when, closing_date=closing_date, max_attendees=random.randint(2, 50),
+                                           keywords=','.join(activities), description=f'A {activities[0]} day, then {activities[1]}.',
+                                           requirements='None.', address_line_one='1 High Street', city_or_town='London',
+                                           county='Greater London', postcode='sw1a 1aa',
+                                           # spread over the mainland UK bounding box
+                                           latitude=round(random.uniform(50.0, 58.6), 4),
+                                           longitude=round(random.uniform(-5.7, 1.7), 4)))
+            # bulk_create bypasses the save method that sets the geohash and date
+            events[-1].set_derived_fields()
+            if len(events) == options['chunk_size']:
+                EventKeyword.objects.sync(EventsActivities.objects.bulk_create(events))
+                events = []
+        EventKeyword.objects.sync(EventsActivities.objects.bulk_create(events))
+        # and the signals that keep the keyword tags and the SQLite search table in sync
+        rebuild_search_index()
+
+        event_ids = list(EventsActivities.objects.values_list('id', flat=True))
+        engagements = []
+        for username in usernames:
+            for event_id in random.sample(event_ids, min(options['engagements_per_user'], len(event_ids))):
+                engagements.append(Engagement(event_id=event_id, user_id=username, status=random.choice(['In', 'Att', 'Attd'])))
+        Engagement.objects.bulk_create(engagements, batch_size=options['chunk_size'])
+        # and the signals that maintain the attendee counts and occupancies
+        EventsActivities.objects.reconcile_attendee_counts()
+        Occupancy.objects.rebuild(batch_size=options['chunk_size'])
+        self.stdout.write(f'Seeded {options["users"]} users, {options["events"]} events and {len(engagements)} engagements '
+                          f'in {time.perf_counter() - start:.1f}s.')
+
+    def hot_queries(self, now):
+        """
+        Returns the querysets issued by the views and the status scheduler, keyed by a description.
+        """
+        user = CustomUserModel.objects.order_by('?').first()
+        date = now.date() + timedelta(days=7)
+        return {'SearchAdvertsView.get adverts': EventsActivities.objects.adverts_for(user, now),
+                'SearchAdvertsView.get search': EventsActivities.objects.adverts_for(user, now, search='paintballing kayaking'),
+                'SearchAdvertsView.get keywords': EventsActivities.objects.adverts_for(user, now, keywords=['kayaking', 'yoga']),
+                'SearchAdvertsView.get within 10 km': EventsActivities.objects.adverts_for(user, now, near=(51.5072, -0.1276, 10)),
+                'SearchAdvertsView.get within 50 km': EventsActivities.objects.adverts_for(user, now, near=(51.5072, -0.1276, 50)),
+                'PostEventsView.get hosting events': EventsActivities.hosting_events.events_queryset(user, now),
+                'ViewEventsView.get engaged events': Engagement.engaged_events.events_queryset(user, now),
+                'SearchAdvertsView.post clash': Occupancy.objects.occupying(user, date),
+                'scheduler expired adverts': EventsActivities.objects.filter(status='advertised', closing_date__lt=now),
+                'scheduler interested engagements': Engagement.objects.filter(status='In', event__closing_date__lt=now)}
+
+    def run_queries(self, phase, queries, repeat):
+        """
+        Reports the EXPLAIN plan and the median execution time of each query.
+        """
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{phase.capitalize()}:'))
+        for description, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                # limited to a page, as the views retrieve them
+                list(queryset.all()[:SearchAdvertsView.adverts_per_page + 1])
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(self.style.SUCCESS(f'\n{description}: median {statistics.median(timings) * 1000:.2f} ms'))
+            self.stdout.write(queryset.explain())
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from events_and_activities.models import EventsActivities, Engagement
+from events_and_activities.registration_load import RegistrationLoad
+from landing_page.models import CustomUserModel
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the throughput of registering interest in a single popular event from many threads at once, for a range
+    of the number of threads, checking that the event is never overbooked.
+
+    A throwaway test database is created, so the configured database is never written to.
+    """
+    help = 'Reports the interest registrations per second against one event, for different numbers of concurrent threads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500, help='Number of users registering their interest.')
+        parser.add_argument('--max-attendees', type=int, default=250, help='Maximum number of attendees of the event.')
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16],
+                            help='Numbers of concurrent threads to compare.')
+
+    def handle(self, *args, **options):
+        old_database_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            host = CustomUserModel.objects.create(username='host', email='host@example.com')
+            users = CustomUserModel.objects.bulk_create([CustomUserModel(username=f'user{number}', email=f'user{number}@example.com')
+                                                         for number in range(options['users'])])
+            for thread_count in options['threads']:
+                self.run_benchmark(host, users, options['max_attendees'], thread_count)
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+    def run_benchmark(self, host, users, max_attendees, thread_count):
+        """
+        Registers every user's interest in a new event and reports the throughput, and whether the event was overbooked.
+        """
+        EventsActivities.objects.all().delete()
+        event = EventsActivities.objects.create(host_user=host, status='advertised', title='popular event',
+                                                when='2030-12-23 12:00:00', closing_date='2030-12-15 12:00:00',
+                                                max_attendees=max_attendees, keywords='benchmark',
+                                                description='An event everyone wants to attend.', requirements='None.',
+                                                address_line_one='1 high street', city_or_town='london', county='london',
+                                                postcode='e1 6an')
+        load = RegistrationLoad(event.id, users, thread_count=thread_count)
+        metrics = load.run()
+        attendees = Engagement.objects.filter(event=event).count()
+        style = self.style.SUCCESS if attendees <= max_attendees else self.style.ERROR
+        self.stdout.write(style(f'{thread_count} threads: {load.registrations_per_second():.1f} registrations/sec, '
+                                f'{attendees} attendees of a maximum of {max_attendees}'))
+        self.stdout.write(f'{metrics["registered"]} registered and {metrics["full"]} turned away in {metrics["seconds"]:.2f}s, '
+                          f'after {metrics["retries"]} retries, {metrics["failed"]} failed.')
+        if load.last_error:
+            self.stdout.write(self.style.ERROR(f'Last registration failure: {load.last_error}'))
@@ -0,0 +1,59 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from events_and_activities.mailer import OutboxWorker
+from events_and_activities.models import OutboxEmail
+from events_and_activities.smtp_stub import StubSMTPServer
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the throughput of the outbox worker sending a cancellation notice to each attendee, for a range of the
+    number of emails sent per connection.
+
+    A throwaway test database is created, so the configured database is never written to, and the emails are sent to a
+    local stub SMTP server, whose latency stands in for the handshake with a remote email host.
+    """
+    help = 'Reports the outbox worker throughput against a local SMTP sink, for different numbers of emails per connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=1000, help='Number of attendees notified.')
+        parser.add_argument('--messages-per-connection', type=int, nargs='+', default=[1, 10, 100],
+                            help='Numbers of emails sent per connection to compare.')
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help='Number of seconds each SMTP connection is delayed by before the greeting.')
+
+    def handle(self, *args, **options):
+        old_database_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        smtp_stub = StubSMTPServer(latency=options['latency']).start()
+        try:
+            smtp_settings = override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                                              EMAIL_HOST=smtp_stub.host, EMAIL_PORT=smtp_stub.port, EMAIL_USE_TLS=False,
+                                              EMAIL_USE_SSL=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='')
+            with smtp_settings:
+                for messages_per_connection in options['messages_per_connection']:
+                    self.run_benchmark(smtp_stub, options['recipients'], messages_per_connection)
+        finally:
+            smtp_stub.stop()
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+    def run_benchmark(self, smtp_stub, recipients, messages_per_connection):
+        """
+        Queues a notice per recipient and reports the throughput of the worker draining the outbox.
+        """
+        OutboxEmail.objects.all().delete()
+        smtp_stub.messages = []
+        smtp_stub.connection_count = 0
+        OutboxEmail.objects.enqueue_each(subject='EventID:1 has been cancelled by the host', message='Hi,',
+                                         recipient_list=[f'attendee{number}@example.com' for number in range(recipients)],
+                                         from_email='host@example.com')
+        worker = OutboxWorker(messages_per_connection=messages_per_connection)
+        now = datetime.now()
+        while any(worker.send_due(now).values()):
+            pass
+        self.stdout.write(self.style.SUCCESS(f'{messages_per_connection} emails per connection: '
+                                             f'{worker.messages_per_second():.1f} messages/sec'))
+        self.stdout.write(f'{worker.metrics["sent"]} sent over {smtp_stub.connection_count} connections '
+                          f'in {worker.metrics["seconds"]:.2f}s, {worker.metrics["retrying"] + worker.metrics["failed"]} failed.')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from events_and_activities.event_import import EventImport, read_csv_rows, read_jsonl_rows
+
+
+READERS = {'csv': read_csv_rows, 'jsonl': read_jsonl_rows}
+
+
+class Command(BaseCommand):
+    """
+    Streams events from a CSV or JSON Lines file into the database, validating each row with the same rules as the post
+    events form, and writing the errors of the rows rejected to an errors file.
+
+    The columns or keys of the rows are the post events form field names, with host_user the username of the host.
+    """
+    help = 'Imports events from a CSV or JSON Lines file, reporting the errors of invalid rows to an errors file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the CSV or JSON Lines file.')
+        parser.add_argument('--format', choices=READERS.keys(),
+                            help='Format of the file. Defaults to the format of the file extension.')
+        parser.add_argument('--errors', help='Path of the JSON Lines file the errors are written to. Defaults to the path '
+                                             'of the file with .errors.jsonl appended.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of rows validated and inserted at a time.')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if file_format not in READERS:
+            raise CommandError(f'Cannot tell the format of {options["path"]}, specify --format csv or --format jsonl.')
+        errors_path = options['errors'] or f'{options["path"]}.errors.jsonl'
+        with open(options['path'], newline='', encoding='utf-8') as text_file, \
+             open(errors_path, 'w', encoding='utf-8') as errors_file:
+            event_import = EventImport(errors_file, chunk_size=options['chunk_size'])
+            metrics = event_import.run(READERS[file_format](text_file))
+        self.stdout.write(self.style.SUCCESS(f'{metrics["imported"]} events imported and {metrics["rejected"]} rows rejected '
+                                             f'in {metrics["seconds"]:.1f}s, {event_import.rows_per_second():.0f} rows/sec.'))
+        if metrics['rejected']:
+            self.stdout.write(f'Errors written to {errors_path}')
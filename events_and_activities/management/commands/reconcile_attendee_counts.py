@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from events_and_activities.models import EventsActivities
+
+
+class Command(BaseCommand):
+    """
+    Corrects the attendee counts of the events that have drifted from the number of their engagements.
+    """
+    help = 'Recounts the engagements of each event, correcting the attendee counts that have drifted.'
+
+    def handle(self, *args, **options):
+        corrected = EventsActivities.objects.reconcile_attendee_counts()
+        self.stdout.write(self.style.SUCCESS(f'Corrected the attendee counts of {corrected} events.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from events_and_activities.mailer import OutboxWorker
+
+
+class Command(BaseCommand):
+    """
+    Runs the outbox worker, which sends the emails queued in the outbox.
+    """
+    help = 'Sends the emails queued in the outbox in batches, retrying failed emails with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=5, help='Number of seconds between polls for due emails.')
+        parser.add_argument('--batch-size', type=int, default=100, help='Number of emails sent per batch.')
+        parser.add_argument('--messages-per-connection', type=int, default=100,
+                            help='Number of emails sent over a connection before it is reopened.')
+        parser.add_argument('--max-attempts', type=int, default=5,
+                            help='Number of failed attempts after which an email is no longer retried.')
+        parser.add_argument('--once', action='store_true',
+                            help='Send a single batch and exit, for running from a periodic job.')
+
+    def handle(self, *args, **options):
+        worker = OutboxWorker(batch_size=options['batch_size'], messages_per_connection=options['messages_per_connection'],
+                              max_attempts=options['max_attempts'])
+        if options['once']:
+            result = worker.send_due()
+            self.stdout.write(f'Outbox emails processed: {result}')
+            return
+        try:
+            worker.run(interval=options['interval'], log=self.stdout.write)
+        except KeyboardInterrupt:
+            self.stdout.write('Outbox worker stopped.')
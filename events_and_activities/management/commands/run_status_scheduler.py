@@ -0,0 +1,27 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand
+from events_and_activities.scheduler import StatusTransitionScheduler
+
+
+class Command(BaseCommand):
+    """
+    Runs the status transition scheduler, which keeps the event and engagement statuses up to date.
+    """
+    help = 'Applies the event and engagement status transitions as they become due.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh-interval', type=int, default=60,
+                            help='Number of seconds between reloads of the transition due times.')
+        parser.add_argument('--once', action='store_true',
+                            help='Apply the outstanding transitions and exit, for running from a periodic job.')
+
+    def handle(self, *args, **options):
+        scheduler = StatusTransitionScheduler(refresh_interval=options['refresh_interval'])
+        if options['once']:
+            result = scheduler.apply_transitions(datetime.now())
+            self.stdout.write(f'Transitions applied: {result}')
+            return
+        try:
+            scheduler.run(log=self.stdout.write)
+        except KeyboardInterrupt:
+            self.stdout.write('Status scheduler stopped.')
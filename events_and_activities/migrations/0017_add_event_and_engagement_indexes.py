@@ -0,0 +1,41 @@
+# Generated by Django 4.1 on 2026-10-18 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_and_activities', '0016_alter_engagement_managers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='engagement',
+            index=models.Index(fields=['user', 'status'], name='engagement_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='engagement',
+            index=models.Index(fields=['event', 'user'], name='engagement_event_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventsactivities',
+            index=models.Index(fields=['status', 'closing_date'], name='event_status_closing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventsactivities',
+            index=models.Index(fields=['host_user', 'status'], name='event_host_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventsactivities',
+            index=models.Index(fields=['host_user', 'when'], name='event_host_when_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventsactivities',
+            index=models.Index(fields=['closing_date'], name='event_closing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventsactivities',
+            index=models.Index(condition=models.Q(('status', 'advertised')), fields=['closing_date'], name='event_advertised_closing_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+FTS_TABLE = 'events_and_activities_eventsactivities_fts'
+SEARCH_INDEX = GinIndex(SearchVector('title', weight='A', config='english')
+                        + SearchVector('keywords', weight='B', config='english')
+                        + SearchVector('description', weight='C', config='english'),
+                        name='event_search_vector_idx')
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Creates the GIN search vector index on PostgreSQL, or the populated FTS5 table on SQLite.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('events_and_activities', 'EventsActivities'), SEARCH_INDEX)
+    elif schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, keywords, description)')
+        # rank matches by bm25, weighting title over keywords over description
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')")
+        schema_editor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, keywords, description) '
+                              'SELECT id, title, keywords, description FROM events_and_activities_eventsactivities')
+
+
+def drop_search_index(apps, schema_editor):
+    """
+    Drops the GIN search vector index on PostgreSQL, or the FTS5 table on SQLite.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('events_and_activities', 'EventsActivities'), SEARCH_INDEX)
+    elif schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_and_activities', '0017_add_event_and_engagement_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
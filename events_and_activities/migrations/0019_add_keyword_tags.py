@@ -0,0 +1,41 @@
+# Generated by Django 4.1 on 2026-10-18 07:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_and_activities', '0018_add_advert_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Keyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=75, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EventKeyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_keywords', to='events_and_activities.eventsactivities')),
+                ('keyword', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_keywords', to='events_and_activities.keyword')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='eventsactivities',
+            name='keyword_tags',
+            field=models.ManyToManyField(related_name='events', through='events_and_activities.EventKeyword', to='events_and_activities.keyword', verbose_name='keyword tags'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventkeyword',
+            constraint=models.UniqueConstraint(fields=('keyword', 'event'), name='event_keyword_unique'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def populate_keyword_tags(apps, schema_editor):
+    """
+    Splits the comma separated keywords field of existing events into Keyword and EventKeyword rows.
+    """
+    EventsActivities = apps.get_model('events_and_activities', 'EventsActivities')
+    Keyword = apps.get_model('events_and_activities', 'Keyword')
+    EventKeyword = apps.get_model('events_and_activities', 'EventKeyword')
+
+    event_names = {event_id: {name.strip().lower() for name in keywords.split(',') if name.strip()}
+                   for event_id, keywords in EventsActivities.objects.values_list('id', 'keywords').iterator()}
+    names = set().union(*event_names.values())
+    Keyword.objects.bulk_create([Keyword(name=name) for name in names], ignore_conflicts=True)
+    keyword_ids = dict(Keyword.objects.values_list('name', 'id'))
+    EventKeyword.objects.bulk_create([EventKeyword(event_id=event_id, keyword_id=keyword_ids[name])
+                                      for event_id, names_of_event in event_names.items() for name in names_of_event],
+                                     batch_size=10000, ignore_conflicts=True)
+
+
+def remove_keyword_tags(apps, schema_editor):
+    """
+    Deletes all Keyword and EventKeyword rows.
+    """
+    apps.get_model('events_and_activities', 'EventKeyword').objects.all().delete()
+    apps.get_model('events_and_activities', 'Keyword').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_and_activities', '0019_add_keyword_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_keyword_tags, remove_keyword_tags),
+    ]
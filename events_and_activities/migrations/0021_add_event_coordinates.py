@@ -0,0 +1,28 @@
+# Generated by Django 4.1 on 2026-10-18 07:50
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_and_activities', '0020_populate_keyword_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventsactivities',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=8, null=True, validators=[django.core.validators.DecimalValidator(8, 4)]),
+        ),
+        migrations.AddField(
+            model_name='eventsactivities',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=8, null=True, validators=[django.core.validators.DecimalValidator(8, 4)]),
+        ),
+        migrations.AddIndex(
+            model_name='eventsactivities',
+            index=models.Index(fields=['latitude', 'longitude'], name='event_coordinates_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.1 on 2026-10-18 08:06
+
+from django.db import migrations, models
+from home.geohash import encode
+
+
+def populate_event_geohashes(apps, schema_editor):
+    """
+    Sets the geohash of the existing events from their coordinates.
+    """
+    EventsActivities = apps.get_model('events_and_activities', 'EventsActivities')
+    events = []
+    for instance in EventsActivities.objects.exclude(latitude=None).exclude(longitude=None).only('latitude', 'longitude').iterator():
+        instance.geohash = encode(instance.latitude, instance.longitude)
+        events.append(instance)
+    EventsActivities.objects.bulk_update(events, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_and_activities', '0021_add_event_coordinates'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='eventsactivities',
+            name='event_coordinates_idx',
+        ),
+        migrations.AddField(
+            model_name='eventsactivities',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=7, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='eventsactivities',
+            index=models.Index(fields=['geohash'], name='event_geohash_idx'),
+        ),
+        migrations.RunPython(populate_event_geohashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.1 on 2026-10-18 08:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_attendee_counts(apps, schema_editor):
+    """
+    Sets the attendee count of the existing events from the number of their engagements.
+    """
+    EventsActivities = apps.get_model('events_and_activities', 'EventsActivities')
+    Engagement = apps.get_model('events_and_activities', 'Engagement')
+    engagement_count = Subquery(Engagement._base_manager.filter(event=OuterRef('pk'))
+                                                        .order_by()
+                                                        .values('event')
+                                                        .annotate(count=Count('id'))
+                                                        .values('count'))
+    EventsActivities._base_manager.update(attendee_count=Coalesce(engagement_count, 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_and_activities', '0023_add_outbox_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventsactivities',
+            name='attendee_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='no. of attendees'),
+        ),
+        migrations.RunPython(populate_attendee_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='eventsactivities',
+            index=models.Index(condition=models.Q(('attendee_count__lt', models.F('max_attendees'))), fields=['closing_date'], name='event_not_full_closing_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.1 on 2026-10-18 08:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_occupancies(apps, schema_editor):
+    """
+    Occupies the days of the existing hosts and engaged users, hosting taking precedence where a user already has more
+    than one event on a day.
+    """
+    EventsActivities = apps.get_model('events_and_activities', 'EventsActivities')
+    Engagement = apps.get_model('events_and_activities', 'Engagement')
+    Occupancy = apps.get_model('events_and_activities', 'Occupancy')
+    hosted = EventsActivities._base_manager.values_list('host_user', 'when', 'id')
+    engaged = Engagement._base_manager.order_by('status').values_list('user', 'event__when', 'event')
+    for occupants in [hosted, engaged]:
+        Occupancy._base_manager.bulk_create([Occupancy(user_id=username, date=when.date(), event_id=event_id)
+                                            for username, when, event_id in occupants.iterator()],
+                                           batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('events_and_activities', '0024_add_attendee_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Occupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('event', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='occupancies', to='events_and_activities.eventsactivities')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='occupancies', to=settings.AUTH_USER_MODEL, to_field='username')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='occupancy',
+            index=models.Index(fields=['event'], name='occupancy_event_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='occupancy',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='occupancy_user_date_unique'),
+        ),
+        migrations.RunPython(populate_occupancies, migrations.RunPython.noop),
+    ]
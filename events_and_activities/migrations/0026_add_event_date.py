@@ -0,0 +1,70 @@
+# Generated by Django 4.1 on 2026-10-18 09:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def populate_event_dates(apps, schema_editor):
+    """
+    Sets the date of the existing events from their when field.
+    """
+    EventsActivities = apps.get_model('events_and_activities', 'EventsActivities')
+    events = []
+    for instance in EventsActivities._base_manager.only('when').iterator():
+        instance.date = instance.when.date()
+        events.append(instance)
+    EventsActivities._base_manager.bulk_update(events, ['date'], batch_size=1000)
+
+
+def check_hosted_days_are_unique(apps, schema_editor):
+    """
+    Fails the migration, listing the events of each host with more than one event on the same day, as the unique
+    constraint on the host and date of events cannot be added while they exist. One event a day per host was only
+    enforced by the post events form before, so such events are left to be resolved by hand rather than deleted here.
+    """
+    EventsActivities = apps.get_model('events_and_activities', 'EventsActivities')
+    clashes = (EventsActivities._base_manager.values('host_user', 'date').annotate(event_count=Count('id'))
+                                             .filter(event_count__gt=1).order_by('host_user', 'date'))
+    clash_descriptions = []
+    for clash in clashes:
+        event_ids = (EventsActivities._base_manager.filter(host_user=clash['host_user'], date=clash['date'])
+                                                   .order_by('id').values_list('id', flat=True))
+        clash_descriptions.append(f"{clash['host_user']} on {clash['date']}: events {', '.join(map(str, event_ids))}")
+    if clash_descriptions:
+        raise RuntimeError('Cannot add the event_host_date_unique constraint, as these hosts have more than one event on '
+                           'the same day. Delete or move all but one event of each, then migrate again.\n'
+                           + '\n'.join(clash_descriptions))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('events_and_activities', '0025_add_occupancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventsactivities',
+            name='date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_event_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='eventsactivities',
+            name='date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='eventsactivities',
+            name='host_user',
+            field=models.ForeignKey(db_column='username', on_delete=django.db.models.deletion.CASCADE, related_name='events', to=settings.AUTH_USER_MODEL, to_field='username', verbose_name='host'),
+        ),
+        migrations.RunPython(check_hosted_days_are_unique, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='eventsactivities',
+            constraint=models.UniqueConstraint(fields=('host_user', 'date'), name='event_host_date_unique'),
+        ),
+    ]
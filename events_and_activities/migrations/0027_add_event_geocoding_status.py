@@ -0,0 +1,37 @@
+# Generated by Django 4.1 on 2026-10-18 09:42
+
+from django.db import migrations, models
+
+
+def resolve_existing_events(apps, schema_editor):
+    """
+    Marks the coordinates of the existing events that were geocoded when posted as resolved. Those that could not be
+    geocoded are left pending, to be retried by the geocoding worker.
+    """
+    EventsActivities = apps.get_model('events_and_activities', 'EventsActivities')
+    EventsActivities._base_manager.exclude(latitude=None).update(geocoding_status='resolved')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_and_activities', '0026_add_event_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventsactivities',
+            name='geocode_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='geocode attempts'),
+        ),
+        migrations.AddField(
+            model_name='eventsactivities',
+            name='geocoding_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('resolved', 'Resolved'), ('failed', 'Failed')], default='pending', editable=False, max_length=8, verbose_name='geocoding status'),
+        ),
+        migrations.AddIndex(
+            model_name='eventsactivities',
+            index=models.Index(condition=models.Q(('geocoding_status', 'pending')), fields=['geocode_attempts'], name='event_pending_geocoding_idx'),
+        ),
+        migrations.RunPython(resolve_existing_events, migrations.RunPython.noop),
+    ]
@@ -1,33 +1,385 @@
 import re
-from datetime import datetime
-from django.db import models
+from datetime import datetime, timedelta
+from django.db import models, transaction
+from django.core.mail import EmailMessage
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.dispatch import Signal
 from django.core.validators import (RegexValidator,
-                                    MaxLengthValidator)
+                                    MaxLengthValidator,
+                                    DecimalValidator)
+from eventabase.caching import search_cache
 from landing_page.models import CustomUserModel
-from home.models import ProfileMixin
+from home.models import ProfileMixin, ProximityQuerySet
+from home.geohash import GEOHASH_PRECISION, encode
 from .validators import check_date_has_not_occured
+from .search import search_adverts
+
+# sent with the ids of events updated in bulk through QuerySet.update, which does not send post_save, so that the data
+# cached from them can be invalidated.
+events_updated = Signal()
 
 # Create your models here.
 
 
+class EngagementQuerySet(models.QuerySet):
+    """
+    QuerySet for the Engagement through model.
+    """
+    def with_effective_status(self, now=None):
+        """
+        Annotates each engagement with the status derived from its event dates, as 'effective_status'.
+
+        Unlike the stored status, the derived status is never stale, so it can be filtered on without first updating the stored statuses.
+
+        Args:
+            now (datetime): the time to compare the event dates against. Defaults to the current time.
+        """
+        if not now:
+            current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
+            now = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
+
+        return self.annotate(effective_status=Case(When(event__when__lt=now, then=Value('Attd')),
+                                                   When(event__closing_date__lt=now, then=Value('Att')),
+                                                   default=Value('In'),
+                                                   output_field=models.CharField()))
+
+    def occurring_on(self, date):
+        """
+        Filters to the engagements with events occurring on a given date.
+
+        Expressed as a datetime range rather than a __date lookup, so that it can use the indexes on the event date.
+
+        Args:
+            date (date): the date of the events.
+        """
+        day_start = datetime.combine(date, datetime.min.time())
+        return self.filter(event__when__gte=day_start, event__when__lt=day_start + timedelta(days=1))
+
+    def register_interest(self, event_id, user):
+        """
+        Registers a user's interest in an event, unless it already has its maximum number of attendees.
+
+        The event row is locked with select_for_update for the rest of the transaction, so that concurrent registrations
+        for the same event are serialised between reading its attendee count and adding one, and it can never be overbooked.
+
+        Args:
+            event_id (int): the id of the event.
+            user (obj): a CustomUserModel model instance.
+
+        Returns:
+            True if the user is registered, or already was, and False if the event is full.
+
+        Raises:
+            EventsActivities.DoesNotExist: if there is no event with the id.
+            IntegrityError: if the user is already occupied with another event on the same day, in which case nothing is
+            registered.
+        """
+        with transaction.atomic():
+            event = EventsActivities.objects.select_for_update().only('attendee_count', 'max_attendees', 'date').get(id=event_id)
+            if self.filter(event_id=event_id, user=user).exists():
+                return True
+            if event.attendee_count >= event.max_attendees:
+                return False
+            # inserted before the engagement, whose signal otherwise occupies the day ignoring any clash
+            Occupancy.objects.create(user=user, date=event.date, event_id=event_id)
+            self.create(event_id=event_id, user=user, status='In')
+        return True
+
+
+class OccupancyQuerySet(models.QuerySet):
+    """
+    QuerySet for the Occupancy model.
+    """
+    def occupying(self, user, date):
+        """
+        Filters to the occupancy of a user's day, with its event and annotated with the user's status in it as
+        'engagement_status', which is None if the user is hosting it. A single lookup on the unique (user, date) index.
+
+        Args:
+            user (obj): a CustomUserModel model instance.
+            date (date): the day.
+        """
+        engagement_status = Engagement.objects.filter(event=OuterRef('event'), user=OuterRef('user')).values('status')[:1]
+        return (self.filter(user=user, date=date)
+                    .select_related('event')
+                    .annotate(engagement_status=Subquery(engagement_status)))
+
+    def occupy(self, occupancies):
+        """
+        Inserts occupancies, skipping those of days already occupied, as when maintaining the occupancies of events
+        created or engaged with without checking for clashes.
+
+        Args:
+            occupancies (list): Occupancy model instances.
+        """
+        self.bulk_create(occupancies, ignore_conflicts=True)
+
+    def rebuild(self, batch_size=1000):
+        """
+        Replaces the occupancies with those of the hosted events and then the engagements, in that order of precedence,
+        for example after events or engagements are bulk created, which bypasses the signals maintaining them.
+
+        Args:
+            batch_size (int): number of occupancies inserted per query.
+        """
+        self.all().delete()
+        hosted = EventsActivities.objects.values_list('host_user', 'date', 'id')
+        engaged = Engagement.objects.order_by('status').values_list('user', 'event__date', 'event')
+        for occupants in [hosted, engaged]:
+            occupancies = []
+            for username, date, event_id in occupants.iterator(chunk_size=batch_size):
+                occupancies.append(self.model(user_id=username, date=date, event_id=event_id))
+                if len(occupancies) == batch_size:
+                    self.occupy(occupancies)
+                    occupancies = []
+            self.occupy(occupancies)
+
+
+class EventsActivitiesQuerySet(ProximityQuerySet):
+    """
+    QuerySet for the EventsActivities model.
+    """
+    def with_effective_status(self, now=None):
+        """
+        Annotates each event with the status derived from its dates, as 'effective_status'.
+
+        Unlike the stored status, the derived status is never stale, so it can be filtered on without first updating the stored statuses.
+
+        Args:
+            now (datetime): the time to compare the event dates against. Defaults to the current time.
+        """
+        if not now:
+            current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
+            now = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
+
+        return self.annotate(effective_status=Case(When(when__lt=now, then=Value('completed')),
+                                                   When(closing_date__lt=now, then=Value('confirmed')),
+                                                   default=Value('advertised'),
+                                                   output_field=models.CharField()))
+
+    def open_adverts(self, now=None):
+        """
+        Filters to the events whose adverts have not yet closed, that is those with an effective status of advertised.
+
+        Expressed as a closing date range rather than a filter on the effective status, so that it can use the closing date indexes.
+
+        Args:
+            now (datetime): the time to compare the closing dates against. Defaults to the current time.
+        """
+        if not now:
+            current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
+            now = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
+
+        return self.filter(closing_date__gte=now)
+
+    def not_full(self):
+        """
+        Filters to the events with fewer attendees than their maximum number of attendees.
+        """
+        return self.filter(attendee_count__lt=F('max_attendees'))
+
+    def change_attendee_count(self, change):
+        """
+        Adds to the attendee counts of the events, in a single update with no read beforehand, so that concurrent changes
+        are not lost. The counts are not reduced below 0, should they have drifted below the number of engagements, for
+        example after a bulk_create of engagements.
+
+        Args:
+            change (int): the number of attendees added, or removed if negative.
+
+        Returns:
+            The number of events updated.
+        """
+        return self.update(attendee_count=Greatest(F('attendee_count') + change, 0))
+
+    def reconcile_attendee_counts(self):
+        """
+        Corrects the attendee counts of the events that have drifted from the number of their engagements, for example
+        after engagements are bulk created, which bypasses the signals maintaining the counts.
+
+        Returns:
+            The number of events corrected.
+        """
+        engagement_count = Coalesce(Subquery(Engagement.objects.filter(event=OuterRef('pk'))
+                                                                .order_by()
+                                                                .values('event')
+                                                                .annotate(count=Count('id'))
+                                                                .values('count')), 0)
+        with transaction.atomic():
+            drifted_events = self.alias(engagement_count=engagement_count).exclude(attendee_count=F('engagement_count'))
+            event_ids = list(drifted_events.values_list('id', flat=True))
+            if not event_ids:
+                return 0
+            corrected = drifted_events.filter(id__in=event_ids).update(attendee_count=engagement_count)
+            events_updated.send(sender=self.model, event_ids=event_ids)
+        return corrected
+
+    def after_cursor(self, ordering, value, event_id):
+        """
+        Filters to the events that come after a keyset cursor, when ordered by a field or annotation then id.
+
+        Args:
+            ordering (str): the field or annotation name the events are ordered by, prefixed with '-' if descending.
+            value: the value of the ordering field for the last event already retrieved.
+            event_id (int): the id of the last event already retrieved.
+        """
+        field_name = ordering.lstrip('-')
+        lookup = 'lt' if ordering.startswith('-') else 'gt'
+        return self.filter(Q(**{f'{field_name}__{lookup}': value}) | Q(**{field_name: value, 'id__gt': event_id}))
+
+    def search(self, terms):
+        """
+        Filters to the events whose title, keywords or description match the search terms, annotated with their relevance
+        as 'search_rank'.
+
+        Args:
+            terms (str): the user's search terms.
+        """
+        return search_adverts(self, terms)
+
+    def tagged(self, names):
+        """
+        Filters to the events tagged with every one of the given keywords.
+
+        Each keyword is matched through the EventKeyword (keyword, event) index, rather than a substring scan of the keywords field.
+
+        Args:
+            names (list): the normalised keyword names, as returned by Keyword.parse_names.
+        """
+        events = self
+        for name in names:
+            events = events.filter(id__in=EventKeyword.objects.filter(keyword__name=name).values('event_id'))
+        return events
+
+    @staticmethod
+    def advert_ordering(search=None, near=None):
+        """
+        Returns:
+            The name of the field or annotation adverts are ordered by: distance when filtering by distance, relevance
+            (descending) when searching, and otherwise closing date.
+
+        Args:
+            search (str): optional search terms the adverts must match.
+            near (tuple): optional (latitude, longitude, distance) the adverts must be located within.
+        """
+        if near:
+            return 'distance'
+        if search:
+            return '-search_rank'
+        return 'closing_date'
+
+    def adverts_for(self, user, now=None, after=None, search=None, keywords=None, near=None):
+        """
+        Returns the values queryset of the open adverts a user can register their interest in, annotated with their attendee count.
+
+        Excludes the adverts the user is hosting or already engaged in, as well as those that are full. Ordered by the
+        advert_ordering field then id, so that it can be paged through with a keyset cursor.
+
+        Args:
+            user (obj): a CustomUserModel model instance.
+            now (datetime): the time to compare the closing dates against. Defaults to the current time.
+            after (tuple): optional (value, id) cursor of the last advert already retrieved, where value is that of the
+            advert_ordering field.
+            search (str): optional search terms the adverts must match.
+            keywords (list): optional normalised keyword names the adverts must be tagged with.
+            near (tuple): optional (latitude, longitude, distance) the adverts must be located within, distance being in km.
+        """
+        adverts = self.open_adverts(now)
+        fields = ['attendee_count', *EventsActivities.DISPLAY_FIELDS]
+        if keywords:
+            adverts = adverts.tagged(keywords)
+        if search:
+            adverts = adverts.search(search)
+            fields.append('search_rank')
+        if near:
+            adverts = adverts.within_distance(*near)
+            fields.append('distance')
+        ordering = self.advert_ordering(search, near)
+        if after:
+            adverts = adverts.after_cursor(ordering, *after)
+        return (adverts.exclude(host_user=user)
+                       .exclude(attendees=user)
+                       .not_full()
+                       .order_by(ordering, 'id')
+                       .values(*fields))
+
+    def occurring_on(self, date):
+        """
+        Filters to the events occurring on a given date.
+
+        Expressed as a datetime range rather than a __date lookup, so that it can use the indexes on the event date.
+
+        Args:
+            date (date): the date of the events.
+        """
+        day_start = datetime.combine(date, datetime.min.time())
+        return self.filter(when__gte=day_start, when__lt=day_start + timedelta(days=1))
+
+
 class ChangeUserStatus(models.Manager):
     """
     Exists to update a user's status for an instance in the Engagement through model.
     """
-    def update_status(self, user):
+    def update_status(self, user=None, now=None):
         """
         Changes a user's status from interested to attending, or attending to attended, depending on the event related dates.
+
+        Args:
+            user (obj): a CustomUserModel model instance. If not given the statuses of all users are updated.
+            now (datetime): the time to compare the event dates against. Defaults to the current time.
+
+        Returns:
+            The number of engagement instances updated.
         """
-        current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
-        current_date_time_object = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
+        if not now:
+            current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
+            now = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
 
-        user_upcoming_events = self.filter(user=user, event__closing_date__lt=current_date_time_object, status='In')
-        if len(user_upcoming_events):
-            user_upcoming_events.update(status='Att')
+        engagements = self.filter(user=user) if user else self.all()
+        updated = engagements.filter(event__closing_date__lt=now, status='In').update(status='Att')
+        updated += engagements.filter(event__when__lt=now, status='Att').update(status='Attd')
+        return updated
 
-        user_attended_events = self.filter(user=user, event__when__lt=current_date_time_object, status='Att')
-        if len(user_attended_events):
-            user_attended_events.update(status='Attd')
+
+class EngagedEvents(models.Manager.from_queryset(EngagementQuerySet)):
+    """
+    Exists to retrieve the data for a user's engaged events, along with their attendee counts.
+    """
+    def events_queryset(self, user, now=None):
+        """
+        Returns the values queryset of a user's interested and upcoming events, annotated with their effective status and attendee count.
+
+        Args:
+            user (obj): a CustomUserModel model instance.
+            now (datetime): the time to derive the engagement statuses at. Defaults to the current time.
+        """
+        event_fields = ['event__' + field_name for field_name in EventsActivities.DISPLAY_FIELDS]
+        return (self.filter(user=user)
+                    .with_effective_status(now)
+                    .filter(effective_status__in=['In', 'Att'])
+                    .annotate(attendee_count=F('event__attendee_count'))
+                    .order_by('event__when')
+                    .values('effective_status', 'attendee_count', *event_fields))
+
+    def retrieve_events_data(self, user, now=None):
+        """
+        Retrieves the display data for a user's interested and upcoming events, using a single annotated query.
+
+        Args:
+            user (obj): a CustomUserModel model instance.
+            now (datetime): the time to derive the engagement statuses at. Defaults to the current time.
+
+        Returns:
+            A dictionary keyed by engagement status ('In' and 'Att'), where each value is a list of (event data, attendee count)
+            tuples ordered by when the event occurs.
+        """
+        engaged_events = self.events_queryset(user, now)
+        events_data = {'In': [], 'Att': []}
+        for engaged_event in engaged_events:
+            event_data = EventsActivities.format_display_data(engaged_event, prefix='event__')
+            events_data[engaged_event['effective_status']].append((event_data, engaged_event['attendee_count']))
+        return events_data
 
 
 class Engagement(ProfileMixin):
@@ -42,6 +394,8 @@ class Engagement(ProfileMixin):
     """
     class Meta:
         ordering = ['-last_updated']
+        indexes = [models.Index(fields=['user', 'status'], name='engagement_user_status_idx'),
+                   models.Index(fields=['event', 'user'], name='engagement_event_user_idx')]
 
     event = models.ForeignKey('EventsActivities',
                               on_delete=models.CASCADE,
@@ -70,44 +424,123 @@ class Engagement(ProfileMixin):
                                         verbose_name='last updated')
 
     user_status = ChangeUserStatus()
-    objects = models.Manager()
+    objects = EngagementQuerySet.as_manager()
+    engaged_events = EngagedEvents()
+
+
+class Occupancy(models.Model):
+    """
+    Stores the event each user is hosting or engaged with on each day, as a user can be involved with only one event a day.
+
+    Kept in step with the events and engagements by the signals in signals.py, so that a clash can be checked for with a
+    single indexed lookup, and is rejected by the unique constraint when registering interest.
+
+    Attributes:
+        user (foreign key): many-to-one relationship with the CustomUserModel via the username field.
+        date (date field): the day the user is occupied.
+        event (foreign key): many-to-one relationship with the EventsActivities model, the event occupying the day.
+    """
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'date'], name='occupancy_user_date_unique')]
+        indexes = [models.Index(fields=['event'], name='occupancy_event_idx')]
+
+    user = models.ForeignKey(CustomUserModel,
+                             on_delete=models.CASCADE,
+                             related_name='occupancies',
+                             to_field='username',
+                             db_index=False)
+
+    date = models.DateField()
+
+    event = models.ForeignKey('EventsActivities',
+                              on_delete=models.CASCADE,
+                              related_name='occupancies',
+                              db_index=False)
+
+    objects = OccupancyQuerySet.as_manager()
 
 
 class ChangeExpiredEvents(models.Manager):
     """
     Exists to filter out and delete or update expired events.
     """
-    def update_completed(self, user=None):
+    def update_completed(self, user=None, now=None):
         """
         Alters the status of events that have already occured.
+
+        Args:
+            user (obj): a CustomUserModel model instance. If not given the events of all hosts are updated.
+            now (datetime): the time to compare the event dates against. Defaults to the current time.
+
+        Returns:
+            The number of events updated.
         """
-        current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
-        current_date_time_object = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
+        if not now:
+            current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
+            now = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
 
-        if not user:
-            expired_events = self.filter(when__lt=current_date_time_object)
-            if len(expired_events):
-                return expired_events.update(status='completed')
-        else:
-            expired_events = self.filter(host_user=user, when__lt=current_date_time_object)
-            if len(expired_events):
-                return expired_events.update(status='completed')
+        expired_events = self.filter(when__lt=now).exclude(status='completed')
+        if user:
+            expired_events = expired_events.filter(host_user=user)
+        return expired_events.update(status='completed')
 
-    def update_expired(self, user=None):
+    def update_expired(self, user=None, now=None):
         """
         Alters the status of events whose closing advert date has expired.
+
+        Args:
+            user (obj): a CustomUserModel model instance. If not given the events of all hosts are updated.
+            now (datetime): the time to compare the event dates against. Defaults to the current time.
+
+        Returns:
+            The number of events updated.
         """
-        current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
-        current_date_time_object = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
+        if not now:
+            current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
+            now = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
 
-        if not user:
-            expired_events = self.filter(closing_date__lt=current_date_time_object, status='advertised')
-            if len(expired_events):
-                expired_events.update(status='confirmed')
-        else:
-            expired_events = self.filter(host_user=user, closing_date__lt=current_date_time_object, status='advertised')
-            if len(expired_events):
-                expired_events.update(status='confirmed')
+        expired_events = self.filter(closing_date__lt=now, status='advertised')
+        if user:
+            expired_events = expired_events.filter(host_user=user)
+        return expired_events.update(status='confirmed')
+
+
+class HostingEvents(models.Manager.from_queryset(EventsActivitiesQuerySet)):
+    """
+    Exists to retrieve the data for the events a user is hosting, along with their attendee counts.
+    """
+    def events_queryset(self, user, now=None):
+        """
+        Returns the values queryset of a host user's advertised and confirmed events, annotated with their effective status.
+
+        Args:
+            user (obj): a CustomUserModel model instance.
+            now (datetime): the time to derive the event statuses at. Defaults to the current time.
+        """
+        return (self.filter(host_user=user)
+                    .with_effective_status(now)
+                    .filter(effective_status__in=['advertised', 'confirmed'])
+                    .order_by('-closing_date')
+                    .values('effective_status', 'attendee_count', *EventsActivities.DISPLAY_FIELDS))
+
+    def retrieve_events_data(self, user, now=None):
+        """
+        Retrieves the display data for a host user's advertised and confirmed events, using a single annotated query.
+
+        Args:
+            user (obj): a CustomUserModel model instance.
+            now (datetime): the time to derive the event statuses at. Defaults to the current time.
+
+        Returns:
+            A dictionary keyed by event status ('advertised' and 'confirmed'), where each value is a list of
+            (event data, attendee count) tuples ordered by closing date, latest first.
+        """
+        hosting_events = self.events_queryset(user, now)
+        events_data = {'advertised': [], 'confirmed': []}
+        for hosting_event in hosting_events:
+            event_data = EventsActivities.format_display_data(hosting_event)
+            events_data[hosting_event['effective_status']].append((event_data, hosting_event['attendee_count']))
+        return events_data
 
 
 class EventsActivities(ProfileMixin):
@@ -119,6 +552,7 @@ class EventsActivities(ProfileMixin):
         status (character field): indicates the current status of an event.
         title (character field): title of the event or activity.
         when (datetime field): the scheduled date and time for the event/activity.
+        date (date field): the day of the event/activity, unique for each host.
         closing date (datetime field): the date and time the advert closes.
         max attendees (integer field): the max number of people that can attend.
         keywords (character field): summary keywords for the event or activity.
@@ -128,12 +562,33 @@ class EventsActivities(ProfileMixin):
         city_or_town (character field): for the event/activity.
         county (character field): for the event/activity.
         postcode (character field): UK postcode for the event/activity.
+        latitude (decimal field): latitude of the event/activity address.
+        longitude (decimal field): longitude of the event/activity address.
+        geohash (character field): geohash of the event/activity address coordinates, indexed for proximity queries.
+        geocoding_status (character field): whether the coordinates are pending, resolved, or failed to be resolved.
+        geocode_attempts (positive small integer field): the number of times the address has been geocoded without a result.
+        attendee count (integer field): the number of engagements with the event/activity, maintained by signals as they
+        are created and deleted.
         attendees (many-to-many field): many-to-many relationship to the CustomUserModel via the engagement model.
+        keyword_tags (many-to-many field): many-to-many relationship to the Keyword model via the EventKeyword model,
+        kept in sync with the keywords field.
     """
     class Meta:
         verbose_name = 'Events and Activities'
         verbose_name_plural = 'Events and Activities'
         ordering = ['-closing_date']
+        indexes = [models.Index(fields=['status', 'closing_date'], name='event_status_closing_idx'),
+                   models.Index(fields=['host_user', 'status'], name='event_host_status_idx'),
+                   models.Index(fields=['host_user', 'when'], name='event_host_when_idx'),
+                   models.Index(fields=['closing_date'], name='event_closing_idx'),
+                   models.Index(fields=['closing_date'], name='event_advertised_closing_idx',
+                                condition=models.Q(status='advertised')),
+                   models.Index(fields=['geohash'], name='event_geohash_idx'),
+                   models.Index(fields=['geocode_attempts'], name='event_pending_geocoding_idx',
+                                condition=models.Q(geocoding_status='pending')),
+                   models.Index(fields=['closing_date'], name='event_not_full_closing_idx',
+                                condition=models.Q(attendee_count__lt=F('max_attendees')))]
+        constraints = [models.UniqueConstraint(fields=['host_user', 'date'], name='event_host_date_unique')]
 
     title = models.CharField(max_length=100,
                              blank=False,
@@ -146,14 +601,16 @@ class EventsActivities(ProfileMixin):
                                   verbose_name='host',
                                   to_field='username',
                                   related_name='events',
-                                  db_column='username',
-                                  unique_for_date='when')
+                                  db_column='username')
     STATUS_CHOICES = [('confirmed', 'confirmed'), ('advertised', 'advertised'), ('completed', 'completed')]
     status = models.CharField(choices=STATUS_CHOICES, max_length=10, blank=False, default='advertised')
 
     when = models.DateTimeField(blank=False,
                                 validators=[check_date_has_not_occured])
 
+    # the day of the when field, set whenever the event is saved, so that the database can enforce one event per host a day.
+    date = models.DateField(editable=False)
+
     closing_date = models.DateTimeField(blank=False, verbose_name='closing date',
                                         validators=[check_date_has_not_occured])
 
@@ -196,21 +653,330 @@ class EventsActivities(ProfileMixin):
                                                            message="Must be a valid postcode format."),
                                             MaxLengthValidator(10)])
 
-    # in future versions the coordinates of the event location will be stored, and along with a user's address coordinates, this will be used to calculate the
-    # as the crow flies distance between the addresses. It will be the basis of a distance filter when searching for events.
-    # latitude = models.DecimalField(max_digits=8, decimal_places=4,
-    #                                blank=False,
-    #                                validators=[DecimalValidator(8, 4)])
+    # the coordinates of the event location, which along with a user's address coordinates are used to calculate the as the crow
+    # flies distance between the addresses, for the distance filter when searching for events. Null while the coordinates are
+    # pending, until they are resolved by the geocoding worker, or if the address could not be geocoded.
+    latitude = models.DecimalField(max_digits=8, decimal_places=4,
+                                   blank=True, null=True,
+                                   validators=[DecimalValidator(8, 4)])
 
-    # longitude = models.DecimalField(max_digits=8, decimal_places=4,
-    #                                 blank=False,
-    #                                 validators=[DecimalValidator(8, 4)])
-    # Will also include address validation using the Geoapify API as for the address form in the edit profile form.
+    longitude = models.DecimalField(max_digits=8, decimal_places=4,
+                                    blank=True, null=True,
+                                    validators=[DecimalValidator(8, 4)])
+
+    # set from the coordinates whenever the event is saved, indexed for the distance filter. Null if the address could not be geocoded.
+    geohash = models.CharField(max_length=GEOHASH_PRECISION, blank=True, null=True, editable=False)
+
+    GEOCODING_STATUSES = [('pending', 'Pending'), ('resolved', 'Resolved'), ('failed', 'Failed')]
+
+    geocoding_status = models.CharField(max_length=8, choices=GEOCODING_STATUSES, default='pending', editable=False,
+                                        verbose_name='geocoding status')
+
+    geocode_attempts = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='geocode attempts')
+
+    # the number of engagements with the event, kept in step by the signals in signals.py, so that the attendee counts
+    # and whether events are full are read from the event row rather than counted. Corrected by reconcile_attendee_counts.
+    attendee_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='no. of attendees')
 
     attendees = models.ManyToManyField(to=CustomUserModel, through=Engagement, related_name='event')
 
+    keyword_tags = models.ManyToManyField(to='Keyword', through='EventKeyword', related_name='events', verbose_name='keyword tags')
+
+    # fields displayed for an event in the event templates, in display order.
+    DISPLAY_FIELDS = ['id', 'title', 'host_user', 'when', 'closing_date', 'max_attendees', 'keywords',
+                      'description', 'requirements', 'address_line_one', 'city_or_town', 'county', 'postcode']
+
     def __str__(self):
         return str(self.id)
 
-    objects = models.Manager()
+    def set_derived_fields(self):
+        """
+        Sets the geohash and geocoding status from the coordinates, and the date from the when field. Called on save,
+        and before events are inserted with bulk_create, which bypasses save.
+        """
+        self.geohash = encode(self.latitude, self.longitude)
+        # an event with coordinates is resolved, and one whose coordinates have been cleared is pending again
+        if self.geohash:
+            self.geocoding_status = 'resolved'
+        elif self.geocoding_status == 'resolved':
+            self.geocoding_status = 'pending'
+        self.date = self._meta.get_field('when').to_python(self.when).date()
+
+    def geocoding_text(self):
+        """
+        Returns:
+            The address of the event as the comma separated terms sent to the geocoder.
+        """
+        return ', '.join([self.address_line_one, self.city_or_town, self.county, self.postcode])
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the event, leaving the attendee count of an existing event unchanged.
+
+        Unlike Model.save, saving an instance whose row has since been deleted raises DatabaseError, rather than
+        inserting the row again, since only the fields other than the attendee count are updated. Pass force_insert=True
+        to insert it again.
+        """
+        self.set_derived_fields()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'geohash', 'geocoding_status', 'date'}
+        elif not self._state.adding and not kwargs.get('force_insert'):
+            # the attendee count is only changed by the signals maintaining it, so that saving an instance retrieved
+            # before the count last changed does not overwrite it.
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name != 'attendee_count']
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def format_display_data(cls, event_values, prefix=''):
+        """
+        Converts the field values of an event, as returned by a values() queryset or retrieve_field_data, into the display
+        data used by the event templates. Only the DISPLAY_FIELDS are included.
+
+        Args:
+            event_values (dict): event field name-value pairs.
+            prefix (str): lookup prefix of the field names, for example 'event__' when queried through the Engagement model.
+
+        Returns:
+            A dictionary of verbose field name-value pairs, with the datetime values formatted.
+        """
+        display_data = {}
+        for field_name in cls.DISPLAY_FIELDS:
+            value = event_values[prefix + field_name]
+            if field_name in ['when', 'closing_date']:
+                value = value.strftime("%H:%M, %d/%m/%y")
+            display_data[cls._meta.get_field(field_name).verbose_name] = value
+        return display_data
+
+    def sync_keyword_tags(self):
+        """
+        Updates the keyword tags of the event to match its keywords field.
+        """
+        EventKeyword.objects.sync([self])
+
+    objects = EventsActivitiesQuerySet.as_manager()
     expired = ChangeExpiredEvents()
+    hosting_events = HostingEvents()
+
+
+class PopularKeywords(models.Manager):
+    """
+    Exists to retrieve the keywords tagging the most open adverts. The counts are aggregated once the cached counts
+    expire and cached in the search cache, rather than on every request.
+
+    Attributes:
+        cache_key (str): name of the cached popular keywords in the search cache.
+        cache_timeout (int): number of seconds the popular keywords are cached for.
+        max_keywords (int): number of popular keywords aggregated.
+    """
+    cache_key = 'popular_keywords'
+    cache_timeout = 600
+    max_keywords = 20
+
+    def aggregate_counts(self, now=None):
+        """
+        Returns:
+            A list of (keyword name, open advert count) tuples, most popular first.
+
+        Args:
+            now (datetime): the time to compare the closing dates against. Defaults to the current time.
+        """
+        if not now:
+            current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
+            now = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
+
+        return list(EventKeyword.objects.filter(event__closing_date__gte=now)
+                                        .values('keyword__name')
+                                        .annotate(advert_count=Count('id'))
+                                        .order_by('-advert_count', 'keyword__name')
+                                        .values_list('keyword__name', 'advert_count')[:self.max_keywords])
+
+    def retrieve(self, limit=10):
+        """
+        Returns:
+            A list of the cached (keyword name, open advert count) tuples, most popular first. Aggregated first if not
+            cached, by a single request at a time.
+
+        Args:
+            limit (int): maximum number of keywords returned.
+        """
+        popular_keywords = search_cache.get_or_set(self.cache_key, self.aggregate_counts, self.cache_timeout)
+        return popular_keywords[:limit]
+
+
+class Keyword(models.Model):
+    """
+    Stores each distinct keyword used to tag events and activities.
+
+    Attributes:
+        name (character field): the lowercase keyword.
+    """
+    class Meta:
+        ordering = ['name']
+
+    name = models.CharField(max_length=75, unique=True)
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def parse_names(keywords):
+        """
+        Returns:
+            A sorted list of the distinct, lowercase keyword names in a comma separated keywords string.
+
+        Args:
+            keywords (str): comma separated keywords, as stored in the EventsActivities keywords field.
+        """
+        return sorted({name.strip().lower() for name in keywords.split(',') if name.strip()})
+
+    objects = models.Manager()
+    popular = PopularKeywords()
+
+
+class SyncEventKeywords(models.Manager):
+    """
+    Exists to keep the EventKeyword rows of events in sync with their keywords field.
+    """
+    def sync(self, events):
+        """
+        Replaces the keyword tags of the events with those parsed from their keywords field, creating any new keywords.
+
+        Args:
+            events (list): EventsActivities model instances.
+        """
+        event_names = {event.id: Keyword.parse_names(event.keywords) for event in events}
+        names = set().union(*event_names.values())
+        Keyword.objects.bulk_create([Keyword(name=name) for name in names], ignore_conflicts=True)
+        keyword_ids = dict(Keyword.objects.filter(name__in=names).values_list('name', 'id'))
+        self.filter(event_id__in=event_names.keys()).delete()
+        self.bulk_create([EventKeyword(event_id=event_id, keyword_id=keyword_ids[name])
+                          for event_id, names_of_event in event_names.items() for name in names_of_event])
+
+
+class EventKeyword(models.Model):
+    """
+    Through model for a many-to-many relationship between the models EventsActivities and Keyword. Its (keyword, event)
+    unique constraint is the inverted index from each keyword to the events it tags.
+
+    Attributes:
+        event (foreign key): many-to-one relationship with the EventsActivities model.
+        keyword (foreign key): many-to-one relationship with the Keyword model.
+    """
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['keyword', 'event'], name='event_keyword_unique')]
+
+    event = models.ForeignKey('EventsActivities', on_delete=models.CASCADE, related_name='event_keywords')
+
+    keyword = models.ForeignKey(Keyword, on_delete=models.CASCADE, related_name='event_keywords')
+
+    objects = SyncEventKeywords()
+
+
+class Outbox(models.Manager):
+    """
+    Exists to queue emails for sending by the outbox worker, rather than sending them during a request.
+    """
+    def enqueue(self, subject, message, recipient_list, from_email):
+        """
+        Queues an email to be sent as soon as possible.
+
+        Args:
+            subject (str): the email subject.
+            message (str): the email body.
+            recipient_list (list): the email addresses of the recipients.
+            from_email (str): the email address the email is sent from.
+
+        Returns:
+            The OutboxEmail model instance created, or None if there are no recipients.
+        """
+        if not recipient_list:
+            return None
+        return self.create(subject=subject, message=message, recipients=list(recipient_list), from_email=from_email,
+                           next_attempt=datetime.now())
+
+    def enqueue_each(self, subject, message, recipient_list, from_email):
+        """
+        Queues a separate copy of an email for each recipient, so that recipients do not see each other's email addresses.
+
+        Args:
+            subject (str): the email subject.
+            message (str): the email body.
+            recipient_list (list): the email addresses of the recipients.
+            from_email (str): the email address the emails are sent from.
+
+        Returns:
+            A list of the OutboxEmail model instances created.
+        """
+        now = datetime.now()
+        return self.bulk_create([self.model(subject=subject, message=message, recipients=[recipient], from_email=from_email,
+                                            next_attempt=now)
+                                 for recipient in dict.fromkeys(recipient_list)])
+
+    def due(self, now):
+        """
+        Returns:
+            A queryset of the pending emails due to be sent, oldest first.
+
+        Args:
+            now (datetime): the time to compare the next attempt times against.
+        """
+        return self.filter(status='pending', next_attempt__lte=now).order_by('next_attempt', 'id')
+
+
+class OutboxEmail(models.Model):
+    """
+    Stores an email queued for sending by the outbox worker, until it has been sent or has failed to send.
+
+    Attributes:
+        subject (character field): the email subject.
+        message (text field): the email body.
+        from_email (character field): the email address the email is sent from.
+        recipients (json field): list of the email addresses of the recipients.
+        status (character field): whether the email is pending, sent or failed.
+        attempts (positive small integer field): the number of failed attempts to send the email.
+        next_attempt (datetime field): the earliest time the email is next sent.
+        created (datetime field): the time the email was queued.
+        sent (datetime field): the time the email was sent.
+        last_error (text field): the error raised by the last failed attempt to send the email.
+    """
+    class Meta:
+        indexes = [models.Index(fields=['next_attempt'], name='outbox_pending_idx', condition=Q(status='pending'))]
+
+    STATUSES = [('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')]
+
+    subject = models.CharField(max_length=255)
+
+    message = models.TextField()
+
+    from_email = models.CharField(max_length=254)
+
+    recipients = models.JSONField()
+
+    status = models.CharField(max_length=7, choices=STATUSES, default='pending')
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    next_attempt = models.DateTimeField()
+
+    created = models.DateTimeField(auto_now_add=True)
+
+    sent = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'{self.subject} ({self.status})'
+
+    def email_message(self, connection=None):
+        """
+        Returns:
+            An EmailMessage instance of the email.
+
+        Args:
+            connection (obj): the email backend instance the message is sent with.
+        """
+        return EmailMessage(subject=self.subject, body=self.message, from_email=self.from_email, to=self.recipients,
+                            connection=connection)
+
+    objects = Outbox()
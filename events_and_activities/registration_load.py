@@ -0,0 +1,96 @@
+"""
+A concurrent load of interest registrations against a single event, so that the capacity of events can be tested and
+benchmarked under contention.
+
+Each thread registers users taken from a shared queue through Engagement.objects.register_interest, on its own database
+connection. SQLite has no row locks, so a registration conflicting with another transaction fails with a locking error
+rather than waiting for it, and is retried, as a user would retry the request.
+"""
+import queue
+import random
+import threading
+import time
+from django.db import OperationalError, connections
+from .models import Engagement
+
+
+class RegistrationLoad():
+    """
+    Registers a list of users' interest in an event, from a number of threads at once.
+
+    Attributes:
+        event_id (int): the id of the event.
+        users (list): the CustomUserModel model instances to register.
+        thread_count (int): the number of threads registering users.
+        max_retries (int): the number of times a registration failing with a database locking error is retried.
+        metrics (dict): counts of the 'registered', 'full' and 'failed' registrations, the 'retries' of registrations,
+                        and the 'seconds' taken.
+        last_error (str): the message of the last error a registration failed with, or None if none failed.
+    """
+    def __init__(self, event_id, users, thread_count=16, max_retries=100):
+        self.event_id = event_id
+        self.users = users
+        self.thread_count = thread_count
+        self.max_retries = max_retries
+        self.metrics = {'registered': 0, 'full': 0, 'failed': 0, 'retries': 0, 'seconds': 0.0}
+        self.last_error = None
+        self.lock = threading.Lock()
+
+    def count(self, metric):
+        with self.lock:
+            self.metrics[metric] += 1
+
+    def register(self, user):
+        """
+        Registers a user's interest in the event, retrying the registration if it fails with a database locking error.
+
+        Returns:
+            The metric counting the outcome of the registration.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return 'registered' if Engagement.objects.register_interest(self.event_id, user) else 'full'
+            except OperationalError as error:
+                if 'locked' not in str(error) or attempt == self.max_retries:
+                    self.last_error = str(error)
+                    return 'failed'
+                self.count('retries')
+                time.sleep(random.uniform(0, 0.002 * (attempt + 1)))
+
+    def work(self, pending_users):
+        try:
+            while True:
+                try:
+                    user = pending_users.get_nowait()
+                except queue.Empty:
+                    return
+                self.count(self.register(user))
+        finally:
+            connections.close_all()
+
+    def run(self):
+        """
+        Registers every user, returning once all the threads have finished.
+
+        Returns:
+            The metrics of the load.
+        """
+        pending_users = queue.Queue()
+        for user in self.users:
+            pending_users.put(user)
+        threads = [threading.Thread(target=self.work, args=(pending_users,)) for _ in range(self.thread_count)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.metrics['seconds'] = time.perf_counter() - start
+        return self.metrics
+
+    def registrations_per_second(self):
+        """
+        Returns:
+            The number of registrations completed per second, whether the user was registered or the event was full.
+        """
+        completed = self.metrics['registered'] + self.metrics['full']
+        return completed / self.metrics['seconds'] if self.metrics['seconds'] else 0.0
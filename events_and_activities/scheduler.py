@@ -0,0 +1,115 @@
+import heapq
+import time
+from datetime import datetime, timedelta
+from django.db import transaction
+from .models import EventsActivities, Engagement
+
+
+class StatusTransitionScheduler():
+    """
+    Applies the event and engagement status transitions in batches, at the times they become due.
+
+    An event moves from advertised to confirmed once its advert closing date has passed, and to completed once it has occurred.
+    At the same times a user's engagement moves from interested to attending, and from attending to attended. The due times
+    falling within the next refresh window are kept in a min-heap, so that the scheduler only wakes when a transition is due,
+    or when the due times need reloading to pick up newly posted events.
+
+    Events are posted and edited by other processes, so a transition falling due before the next refresh of an event
+    posted or edited since the last refresh is only picked up, as overdue, at the next refresh. Such transitions are
+    applied at most refresh_interval seconds late.
+
+    Attributes:
+        refresh_interval (int): the number of seconds between reloads of the due times.
+        due_times (list): min-heap of the pending transition due times.
+        queued_due_times (set): the due times currently in the heap.
+    """
+    def __init__(self, refresh_interval=60):
+        self.refresh_interval = refresh_interval
+        self.due_times = []
+        self.queued_due_times = set()
+
+    def load_due_times(self, now):
+        """
+        Pushes the due times of the pending transitions that fall within the next refresh window onto the heap, along with
+        those already overdue, of events posted or edited since the last refresh.
+
+        Args:
+            now (datetime): the start of the refresh window.
+        """
+        window_end = now + timedelta(seconds=self.refresh_interval)
+        closing_dates = (EventsActivities.objects.filter(status='advertised', closing_date__lt=window_end)
+                                                 .values_list('closing_date', flat=True))
+        event_dates = (EventsActivities.objects.filter(when__lt=window_end)
+                                               .exclude(status='completed')
+                                               .values_list('when', flat=True))
+        for due_time in [*closing_dates, *event_dates]:
+            if due_time not in self.queued_due_times:
+                heapq.heappush(self.due_times, due_time)
+                self.queued_due_times.add(due_time)
+
+    def apply_transitions(self, now):
+        """
+        Applies all the transitions due before a given time, as a single batch of updates.
+
+        Args:
+            now (datetime): the time to compare the event dates against.
+
+        Returns:
+            A dictionary containing the number of events confirmed, events completed and engagements updated.
+        """
+        with transaction.atomic():
+            confirmed = EventsActivities.expired.update_expired(now=now)
+            completed = EventsActivities.expired.update_completed(now=now)
+            engagements = Engagement.user_status.update_status(now=now)
+        return {'confirmed': confirmed, 'completed': completed, 'engagements': engagements}
+
+    def run_pending(self, now):
+        """
+        Pops the due times that have passed off the heap, and if there were any applies the transitions.
+
+        Args:
+            now (datetime): the current time.
+
+        Returns:
+            The result of apply_transitions, or None if no transitions were due.
+        """
+        due = False
+        while self.due_times and self.due_times[0] < now:
+            self.queued_due_times.discard(heapq.heappop(self.due_times))
+            due = True
+        if due:
+            return self.apply_transitions(now)
+        return None
+
+    def next_wake_time(self, next_refresh):
+        """
+        Returns the time the scheduler should next wake: just after the earliest due time, or at the next refresh if sooner.
+
+        Args:
+            next_refresh (datetime): the time the due times are next reloaded.
+        """
+        if self.due_times and self.due_times[0] < next_refresh:
+            # transitions apply once a due time has strictly passed
+            return self.due_times[0] + timedelta(milliseconds=1)
+        return next_refresh
+
+    def run(self, log=print):
+        """
+        Runs the scheduler until interrupted. Any outstanding transitions are applied on start-up.
+
+        Args:
+            log (callable): called with a message each time a batch of transitions is applied.
+        """
+        log(f'Outstanding transitions applied: {self.apply_transitions(datetime.now())}')
+        next_refresh = datetime.now()
+        while True:
+            now = datetime.now()
+            if now >= next_refresh:
+                self.load_due_times(now)
+                next_refresh = now + timedelta(seconds=self.refresh_interval)
+            result = self.run_pending(now)
+            if result:
+                log(f'Transitions applied at {now.strftime("%H:%M:%S, %d/%m/%y")}: {result}')
+            sleep_seconds = (self.next_wake_time(next_refresh) - datetime.now()).total_seconds()
+            if sleep_seconds > 0:
+                time.sleep(sleep_seconds)
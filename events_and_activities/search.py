@@ -0,0 +1,110 @@
+"""
+Full-text search over the title, keywords and description of EventsActivities adverts.
+
+On PostgreSQL matching uses a weighted SearchVector, backed by a GIN expression index. On SQLite (development) it uses an
+FTS5 virtual table, kept in sync with the EventsActivities table by the signal handlers in signals.py.
+"""
+import re
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import Cast
+from django.db.models.expressions import RawSQL
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+EVENTS_TABLE = 'events_and_activities_eventsactivities'
+FTS_TABLE = 'events_and_activities_eventsactivities_fts'
+# the expression indexed on PostgreSQL, which searches must reuse unchanged for the index to be used
+SEARCH_VECTOR = (SearchVector('title', weight='A', config='english')
+                 + SearchVector('keywords', weight='B', config='english')
+                 + SearchVector('description', weight='C', config='english'))
+
+
+def search_adverts(queryset, terms):
+    """
+    Filters an EventsActivities queryset to the events matching the search terms, annotated with their relevance as 'search_rank'.
+
+    Every term must match, in any of the searched fields. A higher search_rank indicates a more relevant event.
+
+    Args:
+        queryset (obj): an EventsActivities queryset.
+        terms (str): the user's search terms.
+    """
+    words = re.findall(r'\w+', terms.lower())
+    if not words:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(' '.join(words), config='english')
+        # cast from real to double precision, so that the rank of a search cursor, a Python float, compares equal to the
+        # rank of the event it was taken from, rather than the event and its ties being repeated or skipped
+        return (queryset.annotate(search_vector=SEARCH_VECTOR)
+                        .filter(search_vector=query)
+                        .annotate(search_rank=Cast(SearchRank(SEARCH_VECTOR, query), FloatField())))
+
+    if connection.vendor == 'sqlite':
+        # quoted so that user input is never parsed as FTS5 query syntax, and as prefixes so partial words match
+        match = ' '.join(f'"{word}"*' for word in words)
+        # joined rather than queried in a subquery, so that the match is evaluated once rather than per event. The
+        # FTS5 rank column is the bm25 score weighted by column, as configured when the table was created.
+        return (queryset.extra(tables=[FTS_TABLE],
+                               where=[f'{FTS_TABLE}.rowid = {EVENTS_TABLE}.id', f'{FTS_TABLE} MATCH %s'],
+                               params=[match])
+                        .annotate(search_rank=RawSQL(f'-{FTS_TABLE}.rank', [], output_field=FloatField())))
+
+    # unindexed fallback for other databases
+    for word in words:
+        queryset = queryset.filter(Q(title__icontains=word) | Q(keywords__icontains=word) | Q(description__icontains=word))
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def index_advert(event):
+    """
+    Adds or replaces an event's row in the SQLite FTS5 table. A no-op on other databases.
+
+    Args:
+        event (obj): an EventsActivities model instance.
+    """
+    index_adverts([event])
+
+
+def index_adverts(events):
+    """
+    Adds or replaces the rows of events in the SQLite FTS5 table. A no-op on other databases.
+
+    Args:
+        events (list): EventsActivities model instances.
+    """
+    if connection.vendor != 'sqlite' or not events:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({", ".join(["%s"] * len(events))})',
+                       [event.id for event in events])
+        cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, title, keywords, description) VALUES (%s, %s, %s, %s)',
+                           [[event.id, event.title, event.keywords, event.description] for event in events])
+
+
+def unindex_advert(event_id):
+    """
+    Removes an event's row from the SQLite FTS5 table. A no-op on other databases.
+
+    Args:
+        event_id (int): the id of the deleted event.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [event_id])
+
+
+def rebuild_search_index():
+    """
+    Repopulates the SQLite FTS5 table from the EventsActivities table. A no-op on other databases.
+
+    Needed after bulk operations that bypass model signals, such as bulk_create and queryset updates.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, keywords, description) '
+                       f'SELECT id, title, keywords, description FROM {EVENTS_TABLE}')
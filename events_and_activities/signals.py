@@ -0,0 +1,178 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from .fragments import invalidate_event_cards
+from .models import EventsActivities, Engagement, Occupancy, events_updated
+from .search import index_advert, unindex_advert
+
+# the ids of the events being deleted. The post_delete receivers of their engagements, deleted by the cascade, leave the
+# attendee count, occupancies, cached cards and sections to the receivers of the event, rather than updating them once
+# per engagement. An id is left here if its delete fails, which only skips the updates for that event's row.
+events_being_deleted = set()
+
+
+@receiver(post_save, sender=EventsActivities)
+def update_advert_search_index(sender, instance, **kwargs):
+    """
+    Keeps the advert search index in sync with a created or updated event.
+    """
+    index_advert(instance)
+
+
+@receiver(post_save, sender=EventsActivities)
+def update_keyword_tags(sender, instance, **kwargs):
+    """
+    Keeps the keyword tags of a created or updated event in sync with its keywords field.
+    """
+    instance.sync_keyword_tags()
+
+
+@receiver(pre_delete, sender=EventsActivities)
+def free_deleted_event_days(sender, instance, **kwargs):
+    """
+    Marks an event as being deleted, and frees the days of its host and engaged users in a single query.
+    """
+    events_being_deleted.add(instance.id)
+    Occupancy.objects.filter(event=instance.id).delete()
+
+
+@receiver(post_delete, sender=EventsActivities)
+def unmark_deleted_event(sender, instance, **kwargs):
+    """
+    Unmarks a deleted event as being deleted, once its engagements have been deleted before it.
+    """
+    events_being_deleted.discard(instance.id)
+
+
+@receiver(post_delete, sender=EventsActivities)
+def remove_advert_from_search_index(sender, instance, **kwargs):
+    """
+    Removes a deleted event from the advert search index.
+    """
+    unindex_advert(instance.id)
+
+
+@receiver([post_save, post_delete], sender=EventsActivities)
+def invalidate_changed_event_cards(sender, instance, **kwargs):
+    """
+    Invalidates the cached cards of a created, updated or deleted event.
+    """
+    invalidate_event_cards(instance.id)
+
+
+@receiver(events_updated, sender=EventsActivities)
+def invalidate_updated_event_cards(sender, event_ids, **kwargs):
+    """
+    Invalidates the cached cards of events updated in bulk.
+    """
+    for event_id in event_ids:
+        invalidate_event_cards(event_id)
+
+
+@receiver([post_save, post_delete], sender=Engagement)
+def invalidate_engaged_event_cards(sender, instance, **kwargs):
+    """
+    Invalidates the cached cards of an event whose attendee count has changed.
+    """
+    if instance.event_id in events_being_deleted:
+        return
+    invalidate_event_cards(instance.event_id)
+
+
+@receiver(m2m_changed, sender=EventsActivities.attendees.through)
+def invalidate_attended_event_cards(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidates the cached cards of the events whose attendees are added or removed through the attendees relation,
+    which creates and deletes engagements without sending their post_save and post_delete signals.
+    """
+    if action not in ['post_add', 'post_remove', 'pre_clear']:
+        return
+    if not reverse:
+        invalidate_event_cards(instance.id)
+    elif action == 'pre_clear':
+        for event_id in instance.engagement.values_list('event_id', flat=True):
+            invalidate_event_cards(event_id)
+    else:
+        for event_id in pk_set:
+            invalidate_event_cards(event_id)
+
+
+@receiver(post_save, sender=Engagement)
+def increment_attendee_count(sender, instance, created, **kwargs):
+    """
+    Adds a created engagement to the attendee count of its event.
+    """
+    if created:
+        EventsActivities.objects.filter(id=instance.event_id).change_attendee_count(1)
+
+
+@receiver(post_delete, sender=Engagement)
+def decrement_attendee_count(sender, instance, **kwargs):
+    """
+    Removes a deleted engagement from the attendee count of its event, including engagements deleted by the cascade
+    from a deleted user, and by removing or clearing attendees through the attendees relation.
+    """
+    if instance.event_id in events_being_deleted:
+        return
+    EventsActivities.objects.filter(id=instance.event_id).change_attendee_count(-1)
+
+
+@receiver(m2m_changed, sender=EventsActivities.attendees.through)
+def increment_added_attendee_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Adds the engagements created by adding attendees through the attendees relation, which does not send their post_save
+    signals, to the attendee counts of their events. Only the newly engaged users or events are in pk_set.
+    """
+    if action != 'post_add' or not pk_set:
+        return
+    if not reverse:
+        EventsActivities.objects.filter(id=instance.id).change_attendee_count(len(pk_set))
+    else:
+        EventsActivities.objects.filter(id__in=pk_set).change_attendee_count(1)
+
+
+@receiver(post_save, sender=EventsActivities)
+def occupy_hosting_day(sender, instance, created, **kwargs):
+    """
+    Occupies the host's day with a created event, and moves the occupancies of an updated event whose day has changed.
+    """
+    date = instance.date
+    if created:
+        Occupancy.objects.occupy([Occupancy(user_id=instance.host_user_id, date=date, event=instance)])
+    elif Occupancy.objects.filter(event=instance).exclude(date=date).delete()[0]:
+        usernames = [instance.host_user_id, *instance.engagement.values_list('user', flat=True)]
+        Occupancy.objects.occupy([Occupancy(user_id=username, date=date, event=instance) for username in usernames])
+
+
+@receiver(post_save, sender=Engagement)
+def occupy_engaged_day(sender, instance, created, **kwargs):
+    """
+    Occupies the engaged user's day with the event of a created engagement.
+    """
+    if created:
+        date = instance.event.date
+        Occupancy.objects.occupy([Occupancy(user_id=instance.user_id, date=date, event_id=instance.event_id)])
+
+
+@receiver(post_delete, sender=Engagement)
+def free_engaged_day(sender, instance, **kwargs):
+    """
+    Frees the engaged user's day from the event of a deleted engagement.
+    """
+    if instance.event_id in events_being_deleted:
+        return
+    Occupancy.objects.filter(user=instance.user_id, event=instance.event_id).delete()
+
+
+@receiver(m2m_changed, sender=EventsActivities.attendees.through)
+def occupy_attended_days(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Occupies the days of the users added as attendees through the attendees relation, which does not send the post_save
+    signals of the engagements it creates.
+    """
+    if action != 'post_add' or not pk_set:
+        return
+    if not reverse:
+        Occupancy.objects.occupy([Occupancy(user_id=username, date=instance.date, event=instance) for username in pk_set])
+    else:
+        Occupancy.objects.occupy([Occupancy(user=instance, date=date, event_id=event_id)
+                                  for event_id, date in EventsActivities.objects.filter(id__in=pk_set).values_list('id', 'date')])
@@ -0,0 +1,112 @@
+"""
+A local stand-in for an SMTP server, so that the sending of outbox emails can be tested and benchmarked without network
+access.
+
+Point the EMAIL_HOST and EMAIL_PORT settings at a StubSMTPServer started in a thread, with EMAIL_USE_TLS disabled and no
+EMAIL_HOST_USER, as the stub neither negotiates TLS nor authenticates.
+"""
+import threading
+import time
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+
+
+class StubSMTPRequestHandler(StreamRequestHandler):
+    """
+    Answers the SMTP commands needed to deliver plain text emails, recording each email delivered.
+    """
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connection_count += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.reply('220 stub SMTP server ready')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline().decode().rstrip('\r\n')
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 stub')
+            elif command == 'MAIL':
+                sender, recipients = line.split(':', 1)[1].strip(' <>'), []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                recipient = line.split(':', 1)[1].strip(' <>')
+                if recipient in self.server.refused_recipients:
+                    self.reply('550 mailbox unavailable')
+                else:
+                    recipients.append(recipient)
+                    self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 end data with <CR><LF>.<CR><LF>')
+                data = []
+                for data_line in self.rfile:
+                    data_line = data_line.decode().rstrip('\r\n')
+                    if data_line == '.':
+                        break
+                    data.append(data_line[1:] if data_line.startswith('..') else data_line)
+                with self.server.lock:
+                    self.server.messages.append({'from': sender, 'to': recipients, 'data': '\n'.join(data)})
+                self.reply('250 OK')
+            elif command in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('502 command not implemented')
+
+
+class StubSMTPServer(ThreadingTCPServer):
+    """
+    SMTP server standing in for the email host.
+
+    Attributes:
+        messages (list): dictionaries of the sender, recipients and data of each email delivered.
+        refused_recipients (set): email addresses the server refuses to deliver to.
+        latency (float): the number of seconds each connection is delayed by before the greeting, to simulate the
+            handshake with a remote email host.
+        connection_count (int): the number of connections accepted.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0), refused_recipients=(), latency=0):
+        super().__init__(address, StubSMTPRequestHandler)
+        self.messages = []
+        self.refused_recipients = set(refused_recipients)
+        self.latency = latency
+        self.connection_count = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        """
+        Serves connections in a daemon thread.
+
+        Returns:
+            The server instance.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving connections and closes the server socket.
+        """
+        self.shutdown()
+        self.server_close()
+        if self.thread:
+            self.thread.join()
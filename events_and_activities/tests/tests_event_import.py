@@ -0,0 +1,184 @@
+import datetime
+import io
+import json
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from home.models import PostcodeCoordinates
+from landing_page.models import CustomUserModel
+from ..event_import import EventImport, read_csv_rows, read_jsonl_rows
+from ..forms import EventsActivitiesForm
+from ..models import EventsActivities, Occupancy
+
+
+class TestEventImport(TestCase):
+    """
+    Tests for the EventImport.
+    """
+    header = 'host_user,title,when,closing_date,max_attendees,keywords,description,requirements,address_line_one,city_or_town,county,postcode\n'
+
+    def setUp(self):
+        self.user = CustomUserModel.objects.create(username='jimmy147', email='tommypaul147@gmail.com', password='holly!123')
+        self.user2 = CustomUserModel.objects.create(username='jimmy1479', email='tommypaul1478@gmail.com', password='holly!1234')
+        self.event1 = EventsActivities.objects.create(host_user=self.user,
+                                                      status="advertised",
+                                                      title='event1',
+                                                      when="2030-12-23 12:00:00",
+                                                      closing_date="2030-12-15 12:00:00",
+                                                      max_attendees=20,
+                                                      keywords="outdoors,paintballing,competitive",
+                                                      description="Paintballing dayout, followed by lunch.",
+                                                      requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                                      address_line_one='mayhem paintball',
+                                                      city_or_town='adbridge',
+                                                      county='essex',
+                                                      postcode='rm4 1AA')
+        self.event1.attendees.add(self.user2, through_defaults={'status': 'In'})
+        PostcodeCoordinates.objects.create(postcode='rm41aa', latitude=51.6232, longitude=0.1524)
+
+    def csv_row(self, host_user='jimmy1479', title='paintballing', when='13:30, 19/01/30', closing_date='11:00, 01/01/30'):
+        return (f'{host_user},{title},"{when}","{closing_date}",20,"outdoors,kayaking",kayaking then lunch.,£50 per person,'
+                f'58 stanley avenue,gidea park,essex,RM4 1AA\n')
+
+    def import_csv(self, *rows, chunk_size=1000):
+        errors_file = io.StringIO()
+        event_import = EventImport(errors_file, chunk_size=chunk_size)
+        metrics = event_import.run(read_csv_rows(io.StringIO(self.header + ''.join(rows))))
+        return metrics, [json.loads(line) for line in errors_file.getvalue().splitlines()]
+
+    def test_import_of_valid_rows(self):
+        """
+        Tests that valid rows are inserted with their derived fields, keyword tags, search index entries and occupancies.
+        """
+        metrics, errors = self.import_csv(self.csv_row(), self.csv_row(when='13:30, 20/01/30'), chunk_size=1)
+        self.assertEqual((metrics['imported'], metrics['rejected'], errors), (2, 0, []))
+        event = EventsActivities.objects.get(host_user=self.user2, date=datetime.date(2030, 1, 19))
+        self.assertEqual((event.status, event.when, event.city_or_town, event.postcode),
+                         ('advertised', datetime.datetime(2030, 1, 19, 13, 30), 'Gidea Park', 'rm4 1aa'))
+        self.assertEqual((float(event.latitude), float(event.longitude)), (51.6232, 0.1524))
+        self.assertEqual((event.geohash is not None, event.geocoding_status), (True, 'resolved'))
+        self.assertEqual(list(event.keyword_tags.values_list('name', flat=True)), ['kayaking', 'outdoors'])
+        self.assertTrue(Occupancy.objects.filter(user=self.user2, date=event.date, event=event).exists())
+        user = CustomUserModel.objects.create(username='jimmy14790', email='tommypaul14789@gmail.com', password='holly!12345')
+        adverts = EventsActivities.objects.adverts_for(user, now=datetime.datetime(2029, 12, 1), search='kayaking')
+        self.assertEqual(len(adverts), 2)
+
+    def test_invalid_rows_are_reported(self):
+        """
+        Tests that invalid rows are skipped, and their errors reported with their line numbers, without rejecting the valid rows.
+        """
+        metrics, errors = self.import_csv(self.csv_row(title='fun   activity'),
+                                          self.csv_row(host_user='nobody'),
+                                          self.csv_row(closing_date='11:00, 20/01/30'),
+                                          # the host is hosting event1 on the same day
+                                          self.csv_row(host_user='jimmy147', when='13:30, 23/12/30'),
+                                          # the host is interested in event1 on the same day
+                                          self.csv_row(when='09:00, 23/12/30'),
+                                          self.csv_row(),
+                                          # a second event hosted on the same day within the file
+                                          self.csv_row(when='18:00, 19/01/30'))
+        self.assertEqual((metrics['imported'], metrics['rejected']), (1, 6))
+        self.assertEqual([error['line'] for error in errors], [2, 3, 4, 5, 6, 8])
+        self.assertEqual(errors[0]['errors'], {'title': ["Must contain only the characters [a-zA-Z0-9,.!/;:], with single spaces between words."]})
+        self.assertEqual(errors[1]['errors'], {'host_user': ['Select a valid choice. That choice is not one of the available choices.']})
+        self.assertEqual(errors[2]['errors'], {'__all__': ['The closing advert date and time cannot be after when the event occurs.']})
+        self.assertEqual(errors[3]['errors'], {'host_user': ['You are already advertising or hosting an event on this date.']})
+        self.assertIn(f'(ID: {self.event1.id}) titled event1', errors[4]['errors']['when'][0])
+        self.assertEqual(errors[5]['errors'], {'host_user': ['You are already advertising or hosting an event on this date.']})
+        self.assertEqual(EventsActivities.objects.filter(host_user=self.user2).count(), 1)
+
+    def test_rows_are_validated_with_the_post_events_form_rules(self):
+        """
+        Tests that the errors reported for rows are those the EventsActivitiesForm reports for the same values, though
+        the model validation is skipped and the model field validators the form fields do not run are run instead.
+        """
+        row = {'host_user': 'jimmy1479', 'title': 'paintballing', 'when': '13:30, 19/01/30', 'closing_date': '11:00, 01/01/30',
+               'max_attendees': '20', 'keywords': '', 'description': 'paintballing then lunch.', 'requirements': 'none',
+               'address_line_one': '58 stanley avenue', 'city_or_town': 'gidea park', 'county': 'essex', 'postcode': 'rm26bt'}
+        rows = [{**row, 'title': 'x   ' * 30, 'keywords': 'outdoors, kayaking'},
+                {**row, 'address_line_one': '58, stanley avenue', 'city_or_town': 'gidea park 2', 'postcode': 'rm2'},
+                {**row, 'county': '', 'max_attendees': 'twenty', 'description': 'x' * 501},
+                {**row, 'when': '13:30, 19/01/20', 'closing_date': '11:00, 20/01/30'}]
+        errors_file = io.StringIO()
+        metrics = EventImport(errors_file).run(enumerate(rows, start=1))
+        self.assertEqual((metrics['imported'], metrics['rejected']), (0, len(rows)))
+        errors = [json.loads(line)['errors'] for line in errors_file.getvalue().splitlines()]
+        form_errors = [EventsActivitiesForm(data=row).errors for row in rows]
+        self.assertEqual(errors, [{field: list(messages) for field, messages in row_errors.items()} for row_errors in form_errors])
+        self.assertEqual(set(errors[1]), {'address_line_one', 'city_or_town', 'postcode'})
+
+    def test_hosted_day_taken_since_validation(self):
+        """
+        Tests that an event whose host's day was taken after its chunk was validated is reported, and the rest of the
+        chunk still inserted.
+        """
+        errors_file = io.StringIO()
+        event_import = EventImport(errors_file)
+        retrieve_chunk_hosts = event_import.retrieve_chunk_hosts
+
+        def retrieve_then_post(chunk):
+            retrieve_chunk_hosts(chunk)
+            EventsActivities.objects.create(host_user=self.user2, title='posted', when='2030-01-20 10:00:00',
+                                            closing_date='2030-01-01 11:00:00', max_attendees=20, keywords='outdoors',
+                                            description='posted.', requirements='none', address_line_one='1 high street',
+                                            city_or_town='romford', county='essex', postcode='rm4 1aa')
+
+        event_import.retrieve_chunk_hosts = retrieve_then_post
+        rows = io.StringIO(self.header + self.csv_row() + self.csv_row(when='13:30, 20/01/30'))
+        metrics = event_import.run(read_csv_rows(rows))
+        self.assertEqual((metrics['imported'], metrics['rejected']), (1, 1))
+        self.assertEqual(json.loads(errors_file.getvalue()),
+                         {'line': 3, 'errors': {'host_user': ['You are already advertising or hosting an event on this date.']}})
+        self.assertEqual(Occupancy.objects.filter(user=self.user2).count(), 3)
+
+    def test_jsonl_rows(self):
+        """
+        Tests that JSON Lines rows are imported, and lines that are not JSON objects reported.
+        """
+        row = {'host_user': 'jimmy1479', 'title': 'paintballing', 'when': '13:30, 19/01/30', 'closing_date': '11:00, 01/01/30',
+               'max_attendees': 20, 'keywords': 'outdoors', 'description': 'paintballing then lunch.', 'requirements': 'none',
+               'address_line_one': '58 stanley avenue', 'city_or_town': 'gidea park', 'county': 'essex', 'postcode': 'rm26bt'}
+        lines = io.StringIO(f'{json.dumps(row)}\n\n[1, 2]\nnot json\n')
+        errors_file = io.StringIO()
+        metrics = EventImport(errors_file).run(read_jsonl_rows(lines))
+        self.assertEqual((metrics['imported'], metrics['rejected']), (1, 2))
+        self.assertEqual([json.loads(line)['line'] for line in errors_file.getvalue().splitlines()], [3, 4])
+        # imported with pending coordinates, as the postcode is not cached
+        event = EventsActivities.objects.get(title='paintballing')
+        self.assertEqual((event.latitude, event.geocoding_status), (None, 'pending'))
+
+    def test_jsonl_rows_with_values_that_are_not_strings(self):
+        """
+        Tests that JSON Lines rows with numbers, booleans or arrays in place of strings are validated, rather than
+        stopping the import.
+        """
+        row = {'host_user': 'jimmy1479', 'title': 'paintballing', 'when': '13:30, 19/01/30', 'closing_date': '11:00, 01/01/30',
+               'max_attendees': 20.0, 'keywords': 'outdoors', 'description': 'paintballing then lunch.', 'requirements': 'none',
+               'address_line_one': '58 stanley avenue', 'city_or_town': 'gidea park', 'county': 'essex', 'postcode': 'rm26bt'}
+        rows = [{**row, 'when': 123}, {**row, 'when': True}, {**row, 'closing_date': 5}, {**row, 'host_user': ['jimmy1479']},
+                {**row, 'title': 1234}]
+        lines = io.StringIO(''.join(f'{json.dumps(row)}\n' for row in rows))
+        errors_file = io.StringIO()
+        metrics = EventImport(errors_file).run(read_jsonl_rows(lines))
+        self.assertEqual((metrics['imported'], metrics['rejected']), (1, 4))
+        errors = [json.loads(line) for line in errors_file.getvalue().splitlines()]
+        self.assertEqual([error['line'] for error in errors], [1, 2, 3, 4])
+        self.assertEqual([error['errors'] for error in errors[:3]], [{'when': ['Enter a valid datetime format.']},
+                                                                    {'when': ['Enter a valid datetime format.']},
+                                                                    {'closing_date': ['Enter a valid datetime format.']}])
+        self.assertEqual(errors[3]['errors'], {'host_user': ['Select a valid choice. That choice is not one of the available choices.']})
+        self.assertEqual(EventsActivities.objects.get(host_user=self.user2, title='1234').max_attendees, 20)
+
+    def test_queries_per_chunk_do_not_grow_with_its_rows(self):
+        """
+        Tests that the rows of a chunk are validated and inserted with the same number of queries however many there are.
+        """
+        query_counts = []
+        for row_count in [2, 20]:
+            rows = [self.csv_row(when=f'13:30, {day:02}/02/30') for day in range(1, row_count + 1)]
+            EventsActivities.objects.filter(host_user=self.user2).delete()
+            with CaptureQueriesContext(connection) as queries:
+                metrics, errors = self.import_csv(*rows)
+            self.assertEqual((metrics['imported'], errors), (row_count, []))
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
@@ -1,5 +1,6 @@
 from datetime import datetime
 from django.test import TestCase
+from home.models import PostcodeCoordinates
 from landing_page.models import CustomUserModel
 from ..forms import EventsActivitiesForm
 from ..models import EventsActivities
@@ -53,10 +54,16 @@ class TestEventsActivitiesForm(TestCase):
                                         city_or_town='adbridge',
                                         county='essex',
                                         postcode='rm4 1AA')
-        new_form = EventsActivitiesForm(data=event)
-        valid = new_form.is_valid()
-        self.assertFalse(valid)
+        # the host's day is no longer queried, only the host user, the occupancy of the day and the host foreign key
+        with self.assertNumQueries(3):
+            new_form = EventsActivitiesForm(data=event)
+            valid = new_form.is_valid()
+        self.assertTrue(valid)
+        new_form.post_clean_processing()
+        # the unique constraint on the host and date rejects the event, and the error is added to the form
+        self.assertIsNone(new_form.save_new_event())
         self.assertFormError(new_form, 'host_user', 'You are already advertising or hosting an event on this date.')
+        self.assertEqual(EventsActivities.objects.filter(host_user=self.event['host_user']).count(), 1)
     
     def test_title_field_validators(self):
         """
@@ -361,3 +368,19 @@ class TestEventsActivitiesForm(TestCase):
         new_form.save()
         self.assertTrue(EventsActivities.objects.filter(host_user=event['host_user'], when=datetime.strptime(event['when'], "%H:%M, %d/%m/%y")).exists())
 
+    def test_set_cached_coordinates(self):
+        """
+        Tests that the coordinates of an event are set from the postcode cache, and otherwise left pending for the
+        geocoding worker, without geocoding the address on the request path.
+        """
+        PostcodeCoordinates.objects.create(postcode='rm26bt', latitude=51.5811, longitude=0.2059)
+        for when, postcode, expected in [('13:30, 19/01/30', 'Rm26Bt', ('51.5811', '0.2059', 'resolved')),
+                                         ('13:30, 20/01/30', 'e16an', (None, None, 'pending'))]:
+            new_form = EventsActivitiesForm(data={**self.event, 'when': when, 'postcode': postcode})
+            self.assertTrue(new_form.is_valid())
+            new_form.post_clean_processing()
+            new_form.set_cached_coordinates()
+            event = new_form.save_new_event()
+            event.refresh_from_db()
+            coordinates = [None if value is None else str(value) for value in [event.latitude, event.longitude]]
+            self.assertEqual((*coordinates, event.geocoding_status), expected)
@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.test import TestCase
+from eventabase.caching import event_cache
+from landing_page.models import CustomUserModel
+from ..fragments import card_key, event_card_versions, render_event_cards, version_key
+from ..models import EventsActivities, Engagement
+
+
+class TestEventCardFragments(TestCase):
+    """
+    Tests for the caching of rendered event cards.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUserModel.objects.create(username='jimmy147', email='tommypaul147@gmail.com', password='holly!123')
+        self.user2 = CustomUserModel.objects.create(username='jimmy1479', email='tommypaul1478@gmail.com', password='holly!1234')
+        self.event = EventsActivities.objects.create(host_user=self.user,
+                                                     status="advertised",
+                                                     title='event1',
+                                                     when="2030-12-23 12:00:00",
+                                                     closing_date="2030-12-15 12:00:00",
+                                                     max_attendees=20,
+                                                     keywords="outdoors,paintballing,competitive",
+                                                     description="Paintballing dayout, followed by lunch.",
+                                                     requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                                     address_line_one='mayhem paintball',
+                                                     city_or_town='adbridge',
+                                                     county='essex',
+                                                     postcode='rm4 1AA')
+
+    def events_data(self):
+        return EventsActivities.hosting_events.retrieve_events_data(self.user)['advertised']
+
+    def test_render_event_cards(self):
+        """
+        Tests that cards are rendered for their type, cached, and then assembled from the cache.
+        """
+        cards = render_event_cards(self.events_data(), 'advertised')
+        self.assertEqual(len(cards), 1)
+        self.assertIn('event1.', cards[0])
+        self.assertIn('No. of users attending so far: 0.', cards[0])
+        self.assertIn('<button class="delete_advert">Delete Advert</button>', cards[0])
+        self.assertIn('<button class="register_interest">', render_event_cards(self.events_data(), 'advert')[0])
+        # the cached card is used rather than rendered again
+        key = card_key(self.event.id, event_card_versions([self.event.id])[self.event.id], 'advertised')
+        event_cache.set(key, 'cached card')
+        self.assertEqual(render_event_cards(self.events_data(), 'advertised'), ['cached card'])
+
+    def test_event_and_engagement_changes_invalidate_cards(self):
+        """
+        Tests that saving an event, or creating or deleting one of its engagements, renders its card again.
+        """
+        render_event_cards(self.events_data(), 'advertised')
+        version = event_card_versions([self.event.id])[self.event.id]
+        self.event.title = 'event2'
+        self.event.save()
+        self.assertIn('event2.', render_event_cards(self.events_data(), 'advertised')[0])
+        self.event.attendees.add(self.user2, through_defaults={'status': 'In'})
+        self.assertIn('No. of users attending so far: 1.', render_event_cards(self.events_data(), 'advertised')[0])
+        Engagement.objects.get(event=self.event, user=self.user2).delete()
+        self.assertIn('No. of users attending so far: 0.', render_event_cards(self.events_data(), 'advertised')[0])
+        self.assertGreater(event_card_versions([self.event.id])[self.event.id], version)
+
+    def test_bulk_updates_invalidate_cards(self):
+        """
+        Tests that correcting the attendee count of an event in bulk renders its card again.
+        """
+        Engagement.objects.bulk_create([Engagement(event=self.event, user=self.user2, status='In')])
+        self.assertIn('No. of users attending so far: 0.', render_event_cards(self.events_data(), 'advertised')[0])
+        EventsActivities.objects.reconcile_attendee_counts()
+        self.assertIn('No. of users attending so far: 1.', render_event_cards(self.events_data(), 'advertised')[0])
+
+    def test_evicted_versions_are_not_reused(self):
+        """
+        Tests that a card cached under an evicted version is not used again.
+        """
+        render_event_cards(self.events_data(), 'advertised')
+        version = event_card_versions([self.event.id])[self.event.id]
+        event_cache.set(card_key(self.event.id, version, 'advertised'), 'stale card')
+        event_cache.delete(version_key(self.event.id))
+        self.assertNotEqual(render_event_cards(self.events_data(), 'advertised'), ['stale card'])
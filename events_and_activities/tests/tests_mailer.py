@@ -0,0 +1,127 @@
+import datetime
+import socket
+from django.test import TestCase, override_settings
+from ..mailer import OutboxWorker
+from ..models import OutboxEmail
+from ..smtp_stub import StubSMTPServer
+
+
+class TestOutboxWorker(TestCase):
+    """
+    Tests for the OutboxWorker, using a local stub SMTP server.
+    """
+    now = datetime.datetime(2030, 12, 15, 12, 0)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.smtp_stub = StubSMTPServer(refused_recipients={'refused@example.com'}).start()
+        cls.addClassCleanup(cls.smtp_stub.stop)
+        smtp_settings = override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                                          EMAIL_HOST=cls.smtp_stub.host, EMAIL_PORT=cls.smtp_stub.port,
+                                          EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='', EMAIL_TIMEOUT=5)
+        smtp_settings.enable()
+        cls.addClassCleanup(smtp_settings.disable)
+
+    def setUp(self):
+        self.smtp_stub.messages = []
+        self.smtp_stub.connection_count = 0
+        for number in range(3):
+            OutboxEmail.objects.create(subject=f'EventID:{number} has been cancelled by the host', message='Hi,',
+                                       recipients=[f'attendee{number}@example.com', f'other{number}@example.com'],
+                                       from_email='host@example.com', next_attempt=self.now)
+
+    def test_enqueue(self):
+        """
+        Tests that emails are queued to be sent straight away, unless they have no recipients.
+        """
+        email = OutboxEmail.objects.enqueue(subject='subject', message='message', recipient_list=['attendee@example.com'],
+                                            from_email='host@example.com')
+        self.assertEqual((email.status, email.attempts, email.recipients), ('pending', 0, ['attendee@example.com']))
+        self.assertIn(email, OutboxEmail.objects.due(datetime.datetime.now()))
+        self.assertIsNone(OutboxEmail.objects.enqueue(subject='subject', message='message', recipient_list=[],
+                                                      from_email='host@example.com'))
+
+    def test_enqueue_each(self):
+        """
+        Tests that a separate email is queued for each distinct recipient.
+        """
+        emails = OutboxEmail.objects.enqueue_each(subject='subject', message='message',
+                                                  recipient_list=['a@example.com', 'b@example.com', 'a@example.com'],
+                                                  from_email='host@example.com')
+        self.assertEqual([email.recipients for email in emails], [['a@example.com'], ['b@example.com']])
+        self.assertEqual(OutboxEmail.objects.filter(subject='subject', status='pending').count(), 2)
+
+    def test_send_due(self):
+        """
+        Tests that the due emails are sent over a single connection, and are not sent again.
+        """
+        OutboxEmail.objects.create(subject='not yet due', message='Hi,', recipients=['attendee@example.com'],
+                                   from_email='host@example.com', next_attempt=self.now + datetime.timedelta(minutes=1))
+        worker = OutboxWorker()
+        self.assertEqual(worker.send_due(self.now), {'sent': 3, 'retrying': 0, 'failed': 0})
+        self.assertEqual(self.smtp_stub.connection_count, 1)
+        self.assertEqual([message['to'] for message in self.smtp_stub.messages],
+                         [[f'attendee{number}@example.com', f'other{number}@example.com'] for number in range(3)])
+        self.assertIn('Subject: EventID:0 has been cancelled by the host', self.smtp_stub.messages[0]['data'])
+        self.assertEqual(OutboxEmail.objects.filter(status='sent', sent=self.now).count(), 3)
+        self.assertEqual(worker.send_due(self.now), {'sent': 0, 'retrying': 0, 'failed': 0})
+        self.assertEqual(self.smtp_stub.connection_count, 1)
+
+    def test_send_due_reopens_the_connection_after_messages_per_connection(self):
+        """
+        Tests that each connection is reused for up to messages_per_connection emails, and that the metrics are recorded.
+        """
+        worker = OutboxWorker(messages_per_connection=2)
+        self.assertEqual(worker.send_due(self.now), {'sent': 3, 'retrying': 0, 'failed': 0})
+        self.assertEqual(self.smtp_stub.connection_count, 2)
+        self.assertEqual(len(self.smtp_stub.messages), 3)
+        self.assertEqual({key: worker.metrics[key] for key in ['sent', 'retrying', 'failed', 'connections']},
+                         {'sent': 3, 'retrying': 0, 'failed': 0, 'connections': 2})
+        self.assertGreater(worker.messages_per_second(), 0)
+
+    def test_send_due_retries_failed_emails_with_backoff(self):
+        """
+        Tests that an email that fails to send is retried after an exponentially increasing delay, and is marked as failed
+        once it has no attempts left, without holding up the other emails in its batch.
+        """
+        refused_email = OutboxEmail.objects.get(subject='EventID:1 has been cancelled by the host')
+        refused_email.recipients = ['refused@example.com']
+        refused_email.save()
+        worker = OutboxWorker(max_attempts=3, retry_delay=60)
+        self.assertEqual(worker.send_due(self.now), {'sent': 2, 'retrying': 1, 'failed': 0})
+        refused_email.refresh_from_db()
+        self.assertEqual((refused_email.status, refused_email.attempts), ('pending', 1))
+        self.assertEqual(refused_email.next_attempt, self.now + datetime.timedelta(seconds=60))
+        self.assertIn('refused@example.com', refused_email.last_error)
+        # not retried before the delay has passed
+        self.assertEqual(worker.send_due(self.now + datetime.timedelta(seconds=59)), {'sent': 0, 'retrying': 0, 'failed': 0})
+        retry_time = self.now + datetime.timedelta(seconds=60)
+        self.assertEqual(worker.send_due(retry_time), {'sent': 0, 'retrying': 1, 'failed': 0})
+        refused_email.refresh_from_db()
+        self.assertEqual(refused_email.next_attempt, retry_time + datetime.timedelta(seconds=120))
+        self.assertEqual(worker.send_due(retry_time + datetime.timedelta(seconds=120)), {'sent': 0, 'retrying': 0, 'failed': 1})
+        refused_email.refresh_from_db()
+        self.assertEqual((refused_email.status, refused_email.attempts), ('failed', 3))
+
+    def test_send_due_while_the_email_host_is_unavailable(self):
+        """
+        Tests that the batch is retried when a connection to the email host cannot be opened.
+        """
+        # a port nothing is listening on
+        with socket.socket() as unused_socket:
+            unused_socket.bind(('127.0.0.1', 0))
+            unused_port = unused_socket.getsockname()[1]
+        with override_settings(EMAIL_PORT=unused_port):
+            self.assertEqual(OutboxWorker().send_due(self.now), {'sent': 0, 'retrying': 3, 'failed': 0})
+        self.assertFalse(OutboxEmail.objects.exclude(status='pending', attempts=1).exists())
+
+    def test_claim_batch(self):
+        """
+        Tests that claimed emails are skipped by other workers until the claim times out.
+        """
+        worker = OutboxWorker(batch_size=2, claim_timeout=300)
+        self.assertEqual(len(worker.claim_batch(self.now)), 2)
+        self.assertEqual(len(worker.claim_batch(self.now)), 1)
+        self.assertEqual(len(worker.claim_batch(self.now)), 0)
+        self.assertEqual(len(worker.claim_batch(self.now + datetime.timedelta(seconds=300))), 2)
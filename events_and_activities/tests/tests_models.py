@@ -1,11 +1,19 @@
 import datetime
-from django.test import TestCase
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.test import Client
 from django.urls import reverse
 from allauth.account.models import EmailAddress
+from eventabase.caching import search_cache
 from landing_page.models import CustomUserModel
 from home.models import UserAddress, UserProfile
-from ..models import EventsActivities, Engagement
+from home.sections import section_version
+from ..models import EventsActivities, Engagement, Keyword, Occupancy
+from ..registration_load import RegistrationLoad
+from ..signals import events_being_deleted
 
 
 class TestEventsActivitiesModel(TestCase):
@@ -103,20 +111,29 @@ class TestEventsActivitiesModel(TestCase):
         Tests that the ProfileMixin methods work as expected for the EventsActivities model.
         """
         # testing retrieve_field_names class method
-        expected_verbose_names = ['engagement', 'ID', 'title', 'host', 'status',
-                                  'when', 'closing date', 'max no. of attendees',
+        expected_verbose_names = ['engagement', 'occupancies', 'event_keywords', 'ID', 'title', 'host', 'status',
+                                  'when', 'date', 'closing date', 'max no. of attendees',
                                   'keywords', 'description', 'requirements',
                                   'Address line 1',
                                   'City/Town',
                                   'County',
                                   'Postcode',
-                                  'attendees']
+                                  'latitude',
+                                  'longitude',
+                                  'geohash',
+                                  'geocoding status',
+                                  'geocode attempts',
+                                  'no. of attendees',
+                                  'attendees',
+                                  'keyword tags']
         self.assertEqual(EventsActivities.retrieve_field_names(), expected_verbose_names)
-        expected_names = ['engagement', 'id', 'title', 'host_user', 'status',
-                          'when', 'closing_date',
+        expected_names = ['engagement', 'occupancies', 'event_keywords', 'id', 'title', 'host_user', 'status',
+                          'when', 'date', 'closing_date',
                           'max_attendees', 'keywords', 'description',
                           'requirements', 'address_line_one', 'city_or_town',
-                          'county', 'postcode', 'attendees']
+                          'county', 'postcode', 'latitude', 'longitude', 'geohash', 'geocoding_status', 'geocode_attempts',
+                          'attendee_count', 'attendees',
+                          'keyword_tags']
         self.assertEqual(EventsActivities.retrieve_field_names(False), expected_names)
         # testing retrieve_field_data method
         user = CustomUserModel.objects.get(username=self.data['username'])
@@ -136,32 +153,46 @@ class TestEventsActivitiesModel(TestCase):
         new_event = EventsActivities.objects.filter(host_user=user, title='Paintballing')[0]
         expected_verbose_data = {'ID': 1, 'host': user, 'status': 'advertised',
                                  'title': 'Paintballing', 'when': datetime.datetime(2022, 12, 23, 12, 0),
+                                 'date': datetime.date(2022, 12, 23),
                                  'closing date': datetime.datetime(2022, 12, 15, 12, 0),
                                  'max no. of attendees': 20,
                                  'keywords': 'outdoors,paintballing,competitive',
                                  'description': 'Paintballing dayout, followed by lunch.',
                                  'requirements': 'min £50 per person. wear suitable shoes. Need to be physically fit.',
                                  'Address line 1': 'mayhem paintball', 'City/Town': 'adbridge', 'County': 'essex',
-                                 'Postcode': 'rm4 1AA'}
+                                 'Postcode': 'rm4 1AA', 'latitude': None, 'longitude': None, 'geohash': None,
+                                 'geocoding status': 'pending', 'geocode attempts': 0, 'no. of attendees': 0}
         retrieved_verbose_data = new_event.retrieve_field_data()
         engagement_field = retrieved_verbose_data.pop('engagement')
+        occupancies_field = retrieved_verbose_data.pop('occupancies')
         attendees_field = retrieved_verbose_data.pop('attendees')
+        event_keywords_field = retrieved_verbose_data.pop('event_keywords')
+        keyword_tags_field = retrieved_verbose_data.pop('keyword tags')
         self.assertEqual(retrieved_verbose_data, expected_verbose_data)
-        # should have no attendees
+        # should have no attendees, occupying only the host's day
         self.assertEqual(engagement_field.count(), 0)
         self.assertEqual(attendees_field.count(), 0)
+        self.assertEqual(list(occupancies_field.values_list('user', flat=True)), [user.username])
+        # should be tagged with its three keywords
+        self.assertEqual(event_keywords_field.count(), 3)
+        self.assertEqual(list(keyword_tags_field.values_list('name', flat=True)), ['competitive', 'outdoors', 'paintballing'])
         expected_data = {'id': 1, 'host_user': user,
                          'status': 'advertised', 'title': 'Paintballing',
                          'when': datetime.datetime(2022, 12, 23, 12, 0),
+                         'date': datetime.date(2022, 12, 23),
                          'closing_date': datetime.datetime(2022, 12, 15, 12, 0),
                          'max_attendees': 20, 'keywords': 'outdoors,paintballing,competitive',
                          'description': 'Paintballing dayout, followed by lunch.',
                          'requirements': 'min £50 per person. wear suitable shoes. Need to be physically fit.',
                          'address_line_one': 'mayhem paintball', 'city_or_town': 'adbridge', 'county': 'essex',
-                         'postcode': 'rm4 1AA'}
+                         'postcode': 'rm4 1AA', 'latitude': None, 'longitude': None, 'geohash': None,
+                         'geocoding_status': 'pending', 'geocode_attempts': 0, 'attendee_count': 0}
         retrieved_data = new_event.retrieve_field_data(False)
         engagement_field = retrieved_data.pop('engagement')
+        retrieved_data.pop('occupancies')
         attendees_field = retrieved_data.pop('attendees')
+        retrieved_data.pop('event_keywords')
+        retrieved_data.pop('keyword_tags')
         self.assertEqual(retrieved_data, expected_data)
         # should have no attendees
         self.assertEqual(engagement_field.count(), 0)
@@ -202,7 +233,7 @@ class TestEventsActivitiesModel(TestCase):
         EventsActivities.objects.create(host_user=user,
                                         status="advertised",
                                         title='event3',
-                                        when="2030-12-23 12:00:00",
+                                        when="2030-12-24 12:00:00",
                                         closing_date="2022-10-15 12:00:00",
                                         max_attendees=20,
                                         keywords="outdoors,paintballing,competitive",
@@ -259,7 +290,7 @@ class TestEventsActivitiesModel(TestCase):
         EventsActivities.objects.create(host_user=user,
                                         status="advertised",
                                         title='event3',
-                                        when="2030-12-23 12:00:00",
+                                        when="2030-12-24 12:00:00",
                                         closing_date="2022-10-15 12:00:00",
                                         max_attendees=20,
                                         keywords="outdoors,paintballing,competitive",
@@ -307,6 +338,213 @@ class TestEventsActivitiesModel(TestCase):
         self.assertTrue(EventsActivities.objects.filter(status='confirmed', title='event3').exists())
 
 
+    def test_with_effective_status_queryset_method(self):
+        """
+        Tests that the event statuses are derived from the event dates, regardless of the stored status.
+        """
+        user = CustomUserModel.objects.get(username=self.data['username'])
+        for title, when, closing_date in [('event1', '2030-12-23 12:00:00', '2028-12-15 12:00:00'),
+                                          ('event2', '2030-12-24 12:00:00', '2022-10-15 12:00:00'),
+                                          ('event3', '2022-10-30 12:00:00', '2022-10-15 12:00:00')]:
+            EventsActivities.objects.create(host_user=user,
+                                            status="advertised",
+                                            title=title,
+                                            when=when,
+                                            closing_date=closing_date,
+                                            max_attendees=20,
+                                            keywords="outdoors,paintballing,competitive",
+                                            description="Paintballing dayout, followed by lunch.",
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1AA')
+        now = datetime.datetime(2026, 1, 1, 12, 0)
+        effective_statuses = dict(EventsActivities.objects.with_effective_status(now).values_list('title', 'effective_status'))
+        self.assertEqual(effective_statuses, {'event1': 'advertised', 'event2': 'confirmed', 'event3': 'completed'})
+        self.assertEqual(list(EventsActivities.objects.with_effective_status(now).filter(effective_status='advertised')
+                                                      .values_list('title', flat=True)), ['event1'])
+        # the stored statuses are left unchanged
+        self.assertEqual(EventsActivities.objects.filter(status='advertised').count(), 3)
+
+    def test_hosting_events_model_manager(self):
+        """
+        Tests the custom HostingEvents model manager of the EventsActivities model.
+        """
+        user = CustomUserModel.objects.get(username=self.data['username'])
+        user2 = CustomUserModel.objects.get(username=self.data2['username'])
+        for title, status, when, closing_date in [('event1', 'advertised', '2030-12-23 12:00:00', '2028-12-15 12:00:00'),
+                                                  ('event2', 'advertised', '2030-12-24 12:00:00', '2029-12-15 12:00:00'),
+                                                  ('event3', 'confirmed', '2030-12-25 12:00:00', '2022-10-15 12:00:00'),
+                                                  ('event4', 'completed', '2022-10-30 12:00:00', '2022-10-15 12:00:00')]:
+            EventsActivities.objects.create(host_user=user,
+                                            status=status,
+                                            title=title,
+                                            when=when,
+                                            closing_date=closing_date,
+                                            max_attendees=20,
+                                            keywords="outdoors,paintballing,competitive",
+                                            description="Paintballing dayout, followed by lunch.",
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1AA')
+        EventsActivities.objects.get(title='event3').attendees.add(user2, through_defaults={'status': 'Att'})
+        with self.assertNumQueries(1):
+            events_data = EventsActivities.hosting_events.retrieve_events_data(user)
+        self.assertEqual(list(events_data.keys()), ['advertised', 'confirmed'])
+        # advertised events are ordered by closing date, latest first
+        self.assertEqual([(data['title'], count) for data, count in events_data['advertised']], [('event2', 0), ('event1', 0)])
+        self.assertEqual([(data['title'], count) for data, count in events_data['confirmed']], [('event3', 1)])
+        self.assertEqual(events_data['confirmed'][0][0]['closing date'], '12:00, 15/10/22')
+        self.assertEqual(events_data['confirmed'][0][0]['host'], user.username)
+
+    def test_search_queryset_method(self):
+        """
+        Tests that events are searched by their title, keywords and description, ranked by relevance, and that the search
+        index is kept in sync as events are updated and deleted.
+        """
+        user = CustomUserModel.objects.get(username=self.data['username'])
+        for day, (title, keywords, description) in enumerate([('paintball', 'outdoors,competitive', 'A day out, followed by lunch.'),
+                                                             ('day out', 'outdoors,paintballing', 'Followed by lunch.'),
+                                                             ('day out', 'outdoors,competitive', 'Paintballing, followed by lunch.'),
+                                                             ('pottery', 'indoors,crafts', 'Throwing pots, followed by lunch.')], start=20):
+            EventsActivities.objects.create(host_user=user,
+                                            status="advertised",
+                                            title=title,
+                                            when=f'2030-12-{day} 12:00:00',
+                                            closing_date='2028-12-15 12:00:00',
+                                            max_attendees=20,
+                                            keywords=keywords,
+                                            description=description,
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1AA')
+        # matches are ranked title first, then keywords, then description
+        results = EventsActivities.objects.search('Paintball').order_by('-search_rank')
+        self.assertEqual([(event.title, event.keywords) for event in results],
+                         [('paintball', 'outdoors,competitive'), ('day out', 'outdoors,paintballing'), ('day out', 'outdoors,competitive')])
+        # every term must match
+        self.assertEqual(list(EventsActivities.objects.search('lunch pots').values_list('title', flat=True)), ['pottery'])
+        # search syntax in user input is treated as plain words
+        self.assertEqual(EventsActivities.objects.search('"pottery" OR').count(), 0)
+        self.assertEqual(EventsActivities.objects.search('*:-').count(), 0)
+
+        event = EventsActivities.objects.get(title='pottery')
+        event.title = 'ceramics'
+        event.save()
+        self.assertFalse(EventsActivities.objects.search('pottery').exists())
+        self.assertTrue(EventsActivities.objects.search('ceramics').exists())
+        event.delete()
+        self.assertFalse(EventsActivities.objects.search('ceramics').exists())
+
+    def test_keyword_tags_and_tagged_queryset_method(self):
+        """
+        Tests that the keyword tags of an event are kept in sync with its keywords field, and that events are filtered by
+        whole keyword tags rather than substrings.
+        """
+        user = CustomUserModel.objects.get(username=self.data['username'])
+        for day, (title, keywords) in enumerate([('event1', 'Outdoors,climbing'), ('event2', 'outdoors,climbing-wall'), ('event3', 'indoors,climbing')], start=20):
+            EventsActivities.objects.create(host_user=user,
+                                            status="advertised",
+                                            title=title,
+                                            when=f'2030-12-{day} 12:00:00',
+                                            closing_date='2028-12-15 12:00:00',
+                                            max_attendees=20,
+                                            keywords=keywords,
+                                            description="Climbing dayout, followed by lunch.",
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1AA')
+        # keywords are shared between events and stored lowercase
+        self.assertEqual(list(Keyword.objects.values_list('name', flat=True)), ['climbing', 'climbing-wall', 'indoors', 'outdoors'])
+        self.assertEqual(list(EventsActivities.objects.tagged(['climbing']).order_by('title').values_list('title', flat=True)),
+                         ['event1', 'event3'])
+        self.assertEqual(list(EventsActivities.objects.tagged(['outdoors', 'climbing']).values_list('title', flat=True)), ['event1'])
+        self.assertFalse(EventsActivities.objects.tagged(['climb']).exists())
+
+        event = EventsActivities.objects.get(title='event3')
+        event.keywords = 'indoors,bouldering'
+        event.save()
+        self.assertEqual(list(event.keyword_tags.values_list('name', flat=True)), ['bouldering', 'indoors'])
+        self.assertEqual(list(EventsActivities.objects.tagged(['climbing']).values_list('title', flat=True)), ['event1'])
+
+    def test_popular_keywords_model_manager(self):
+        """
+        Tests that the popular keywords are counted over open adverts, and cached until refreshed.
+        """
+        cache.clear()
+        user = CustomUserModel.objects.get(username=self.data['username'])
+        for day, (title, keywords, closing_date) in enumerate([('event1', 'outdoors,climbing', '2028-12-15 12:00:00'),
+                                                              ('event2', 'outdoors,hiking', '2028-12-15 12:00:00'),
+                                                              ('event3', 'indoors,climbing', '2028-12-15 12:00:00'),
+                                                              ('event4', 'outdoors,pottery', '2022-10-15 12:00:00')], start=20):
+            EventsActivities.objects.create(host_user=user,
+                                            status="advertised",
+                                            title=title,
+                                            when=f'2030-12-{day} 12:00:00',
+                                            closing_date=closing_date,
+                                            max_attendees=20,
+                                            keywords=keywords,
+                                            description="Dayout, followed by lunch.",
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1AA')
+        expected_popular_keywords = [('climbing', 2), ('outdoors', 2), ('hiking', 1), ('indoors', 1)]
+        self.assertEqual(Keyword.popular.aggregate_counts(now=datetime.datetime(2026, 1, 1, 12, 0)), expected_popular_keywords)
+        self.assertEqual(Keyword.popular.retrieve(), expected_popular_keywords)
+        self.assertEqual(Keyword.popular.retrieve(limit=1), [('climbing', 2)])
+        EventsActivities.objects.get(title='event2').delete()
+        # cached until expired
+        with self.assertNumQueries(0):
+            self.assertEqual(Keyword.popular.retrieve(), expected_popular_keywords)
+        search_cache.delete(Keyword.popular.cache_key)
+        self.assertEqual(Keyword.popular.retrieve(), [('climbing', 2), ('indoors', 1), ('outdoors', 1)])
+        cache.clear()
+
+    def test_within_distance_queryset_method(self):
+        """
+        Tests that events are filtered to those within a distance of a point, by their great circle distance rather than
+        their bounding box, and annotated with that distance.
+        """
+        user = CustomUserModel.objects.get(username=self.data['username'])
+        # central London, Romford, a point at the corner of the 30 km bounding box of central London, Brighton, and an ungeocoded event
+        for day, (title, latitude, longitude) in enumerate([('london', 51.5072, -0.1276), ('romford', 51.5768, 0.1801),
+                                                           ('corner', 51.7072, 0.1724), ('brighton', 50.8225, -0.1372), ('unknown', None, None)], start=20):
+            EventsActivities.objects.create(host_user=user,
+                                            status="advertised",
+                                            title=title,
+                                            when=f'2030-12-{day} 12:00:00',
+                                            closing_date='2028-12-15 12:00:00',
+                                            max_attendees=20,
+                                            keywords='outdoors',
+                                            description="Dayout, followed by lunch.",
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1AA',
+                                            latitude=latitude,
+                                            longitude=longitude)
+        self.assertEqual(dict(EventsActivities.objects.values_list('title', 'geohash')),
+                         {'london': 'gcpvj0e', 'romford': 'u10jkj7', 'corner': 'u10n5vj', 'brighton': 'gcpchgu', 'unknown': None})
+        # romford lies in a neighbouring geohash cell of central London
+        nearby = EventsActivities.objects.within_distance(51.5072, -0.1276, 30).order_by('distance')
+        self.assertEqual([event.title for event in nearby], ['london', 'romford'])
+        self.assertAlmostEqual(nearby[0].distance, 0, places=6)
+        self.assertAlmostEqual(nearby[1].distance, 22.6, delta=0.1)
+        self.assertEqual(list(EventsActivities.objects.within_distance(51.5072, -0.1276, 100)
+                                                      .order_by('distance').values_list('title', flat=True)),
+                         ['london', 'romford', 'corner', 'brighton'])
+
+
 class TestEngagementModel(TestCase):
     """
     Tests for the Engagement through model.
@@ -450,6 +688,163 @@ class TestEngagementModel(TestCase):
         for instance in self.event2.engagement.all():
             self.assertEqual(instance.status, 'Attd')
 
+    def test_with_effective_status_queryset_method(self):
+        """
+        Tests that the engagement statuses are derived from the event dates, regardless of the stored status.
+        """
+        self.event1.attendees.add(self.user2, through_defaults={'status': 'In'})
+        self.event2.attendees.add(self.user3, through_defaults={'status': 'In'})
+        self.event2.when = "2023-01-23 12:00:00"
+        self.event2.save()
+        for now, expected_statuses in [(datetime.datetime(2025, 1, 1, 12, 0), {'jimmy1479': 'In', 'jimmy14798': 'Attd'}),
+                                       (datetime.datetime(2026, 1, 1, 12, 0), {'jimmy1479': 'Att', 'jimmy14798': 'Attd'}),
+                                       (datetime.datetime(2031, 1, 1, 12, 0), {'jimmy1479': 'Attd', 'jimmy14798': 'Attd'})]:
+            with self.subTest(now):
+                effective_statuses = dict(Engagement.objects.with_effective_status(now).values_list('user', 'effective_status'))
+                self.assertEqual(effective_statuses, expected_statuses)
+        # the stored statuses are left unchanged
+        self.assertEqual(Engagement.objects.filter(status='In').count(), 2)
+
+    def test_engaged_events_model_manager(self):
+        """
+        Tests the custom EngagedEvents model manager of the Engagement through model.
+        """
+        # close the event1 advert, then add user as interested in event2, and as attending event1 alongside user3
+        self.event1.closing_date = "2022-10-15 12:00:00"
+        self.event1.save()
+        Engagement.objects.create(event=self.event2, user=self.user, status='In')
+        self.event1.attendees.add(self.user, through_defaults={'status': 'Att'})
+        self.event1.attendees.add(self.user3, through_defaults={'status': 'In'})
+        expected_event_data = {'ID': self.event1.id, 'title': 'event1', 'host': 'jimmy147',
+                               'when': '12:00, 23/12/30', 'closing date': '12:00, 15/10/22',
+                               'max no. of attendees': 20, 'keywords': 'outdoors,paintballing,competitive',
+                               'description': 'Paintballing dayout, followed by lunch.',
+                               'requirements': 'min £50 per person. wear suitable shoes. Need to be physically fit.',
+                               'Address line 1': 'mayhem paintball', 'City/Town': 'adbridge',
+                               'County': 'essex', 'Postcode': 'rm4 1AA'}
+        before_closing_date = datetime.datetime(2025, 1, 1, 12, 0)
+        with self.assertNumQueries(1):
+            events_data = Engagement.engaged_events.retrieve_events_data(self.user, now=before_closing_date)
+        self.assertEqual(list(events_data.keys()), ['In', 'Att'])
+        self.assertEqual(events_data['Att'], [(expected_event_data, 2)])
+        self.assertEqual(len(events_data['In']), 1)
+        self.assertEqual(events_data['In'][0][0]['ID'], self.event2.id)
+        self.assertEqual(events_data['In'][0][1], 1)
+        # the display data keys follow the order used by the event templates
+        self.assertEqual(list(events_data['Att'][0][0].keys()), list(expected_event_data.keys()))
+        # once the closing date has passed the interested event is upcoming, even though its stored status is not yet updated
+        events_data = Engagement.engaged_events.retrieve_events_data(self.user, now=datetime.datetime(2026, 1, 1, 12, 0))
+        self.assertEqual(events_data['In'], [])
+        self.assertEqual(len(events_data['Att']), 2)
+        self.assertEqual(Engagement.objects.get(event=self.event2, user=self.user).status, 'In')
+        # once the events have occurred they are no longer retrieved
+        events_data = Engagement.engaged_events.retrieve_events_data(self.user, now=datetime.datetime(2031, 1, 1, 12, 0))
+        self.assertEqual(events_data, {'In': [], 'Att': []})
+
+    def test_register_interest_queryset_method(self):
+        """
+        Tests that interest is registered until the event has its maximum number of attendees, that registering a user
+        twice does not engage them twice, and that a user occupied with another event on the same day is not registered.
+        """
+        EventsActivities.objects.filter(id=self.event1.id).update(max_attendees=1)
+        self.assertTrue(Engagement.objects.register_interest(self.event1.id, self.user3))
+        self.assertTrue(Engagement.objects.register_interest(self.event1.id, self.user3))
+        self.assertEqual(Engagement.objects.filter(event=self.event1).count(), 1)
+        self.assertEqual(Engagement.objects.get(event=self.event1, user=self.user3).status, 'In')
+        self.assertFalse(Engagement.objects.register_interest(self.event1.id, self.user2))
+        self.assertEqual(Engagement.objects.filter(event=self.event1).count(), 1)
+        # the user is hosting event1 on the same day as event2
+        with self.assertRaises(IntegrityError):
+            Engagement.objects.register_interest(self.event2.id, self.user)
+        self.assertEqual(Engagement.objects.filter(event=self.event2).count(), 0)
+        self.assertEqual(Occupancy.objects.get(user=self.user).event, self.event1)
+        with self.assertRaises(EventsActivities.DoesNotExist):
+            Engagement.objects.register_interest(0, self.user)
+
+    def test_attendee_count_maintenance(self):
+        """
+        Tests that the attendee count of an event follows its engagements as they are created and deleted, whether
+        directly, through the attendees relation or by cascade, and that drifted counts are reconciled.
+        """
+        def attendee_count():
+            return EventsActivities.objects.get(id=self.event1.id).attendee_count
+
+        stale_event = EventsActivities.objects.get(id=self.event1.id)
+        self.event1.attendees.add(self.user2, through_defaults={'status': 'In'})
+        self.event1.attendees.add(self.user2, through_defaults={'status': 'In'})
+        self.assertEqual(attendee_count(), 1)
+        # saving an instance retrieved before the count changed does not overwrite it
+        stale_event.title = 'event3'
+        stale_event.save()
+        self.assertEqual(attendee_count(), 1)
+        self.user3.event.add(self.event1, through_defaults={'status': 'In'})
+        self.assertEqual(attendee_count(), 2)
+        engagement = Engagement.objects.create(event=self.event1, user=self.user, status='In')
+        engagement.status = 'Att'
+        engagement.save()
+        self.assertEqual(attendee_count(), 3)
+        engagement.delete()
+        self.assertEqual(attendee_count(), 2)
+        self.event1.attendees.remove(self.user2)
+        self.assertEqual(attendee_count(), 1)
+        self.event1.attendees.add(self.user2, through_defaults={'status': 'In'})
+        CustomUserModel.objects.get(username=self.user3.username).delete()
+        self.assertEqual(attendee_count(), 1)
+        self.event1.attendees.clear()
+        self.assertEqual(attendee_count(), 0)
+        # bulk created engagements bypass the signals
+        Engagement.objects.bulk_create([Engagement(event=self.event1, user=self.user2, status='In')])
+        self.assertEqual(attendee_count(), 0)
+        versions = [section_version(section, username) for section, username in [('post_events', self.user.username),
+                                                                                  ('search_view_events', self.user2.username)]]
+        self.assertEqual(EventsActivities.objects.reconcile_attendee_counts(), 1)
+        self.assertEqual(attendee_count(), 1)
+        # the sections listing the corrected count are invalidated
+        self.assertGreater(section_version('post_events', self.user.username), versions[0])
+        self.assertGreater(section_version('search_view_events', self.user2.username), versions[1])
+        self.assertEqual(EventsActivities.objects.reconcile_attendee_counts(), 0)
+        # deleting the engagements of a count that has drifted low does not take it below 0
+        Engagement.objects.bulk_create([Engagement(event=self.event1, user=self.user, status='In')])
+        for engagement in Engagement.objects.filter(event=self.event1):
+            engagement.delete()
+        self.assertEqual(attendee_count(), 0)
+        # saving an instance whose row has been deleted fails, unless it is inserted again explicitly
+        EventsActivities.objects.filter(id=self.event1.id).delete()
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            stale_event.save()
+        stale_event.save(force_insert=True)
+        self.assertEqual(EventsActivities.objects.get(id=self.event1.id).title, 'event3')
+
+    def test_occupancy_maintenance(self):
+        """
+        Tests that the occupancies of the users' days follow the events they host and engage with, and that the occupancy
+        of a day is retrieved with its event and the user's engagement status in a single query.
+        """
+        date = datetime.date(2030, 12, 23)
+        with self.assertNumQueries(1):
+            occupancy = Occupancy.objects.occupying(self.user, date).first()
+            self.assertEqual((occupancy.event.title, occupancy.engagement_status), ('event1', None))
+        self.assertIsNone(Occupancy.objects.occupying(self.user3, date).first())
+        self.event1.attendees.add(self.user3, through_defaults={'status': 'Att'})
+        occupancy = Occupancy.objects.occupying(self.user3, date).first()
+        self.assertEqual((occupancy.event, occupancy.engagement_status), (self.event1, 'Att'))
+        # engagements created without checking for clashes do not replace the occupancy of the day
+        Engagement.objects.create(event=self.event2, user=self.user3, status='In')
+        self.assertEqual(Occupancy.objects.get(user=self.user3).event, self.event1)
+        Engagement.objects.get(event=self.event1, user=self.user3).delete()
+        self.assertIsNone(Occupancy.objects.occupying(self.user3, date).first())
+        # the occupancies of an event move with its date
+        self.user3.event.clear()
+        self.user3.event.add(self.event2, through_defaults={'status': 'In'})
+        self.event2.when = datetime.datetime(2030, 12, 24, 12, 0)
+        self.event2.save()
+        self.assertEqual(set(Occupancy.objects.filter(event=self.event2).values_list('user', 'date')),
+                         {(self.user2.username, datetime.date(2030, 12, 24)), (self.user3.username, datetime.date(2030, 12, 24))})
+        Occupancy.objects.all().delete()
+        Occupancy.objects.rebuild()
+        self.assertEqual(Occupancy.objects.count(), 3)
+        self.assertEqual(Occupancy.objects.get(user=self.user3).event, self.event2)
+
     def test_engagement_event_cascade_deletion_(self):
         """
         Tests that when an Event instance is deleted in the EventsActivities model, the related instances through the event foreign key field in the engagement through model
@@ -467,6 +862,34 @@ class TestEngagementModel(TestCase):
         self.assertEqual(Engagement.objects.count(), 1)
         self.assertEqual(len(Engagement.objects.filter(event__title='event1')), 0)
 
+    def test_event_deletion_queries_do_not_grow_with_its_attendees(self):
+        """
+        Tests that an event is deleted with the same number of queries however many attendees it has, freeing their days
+        and invalidating their sections, and that deleting it does not affect the other events.
+        """
+        Engagement.objects.create(event=self.event2, user=self.user3, status='In')
+        query_counts = []
+        for attendee_count in [2, 20]:
+            users = CustomUserModel.objects.bulk_create([CustomUserModel(username=f'attendee{attendee_count}_{number}',
+                                                                         email=f'attendee{attendee_count}_{number}@gmail.com')
+                                                         for number in range(attendee_count)])
+            event = EventsActivities.objects.create(host_user=self.user2, title='popular', when=f'2030-11-{attendee_count:02} 12:00:00',
+                                                    closing_date='2030-10-15 12:00:00', max_attendees=50, keywords='outdoors',
+                                                    description='A day out.', requirements='none', address_line_one='1 high street',
+                                                    city_or_town='romford', county='essex', postcode='rm4 1aa')
+            event.attendees.add(*users, through_defaults={'status': 'In'})
+            versions = [section_version('search_view_events', user.username) for user in users]
+            with CaptureQueriesContext(connection) as queries:
+                event.delete()
+            query_counts.append(len(queries))
+            self.assertFalse(Occupancy.objects.filter(user__in=[self.user2, *users], date=event.date).exists())
+            self.assertTrue(all(section_version('search_view_events', user.username) > version
+                                for user, version in zip(users, versions)))
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(events_being_deleted, set())
+        self.assertEqual(EventsActivities.objects.get(id=self.event2.id).attendee_count, 1)
+        self.assertTrue(Occupancy.objects.filter(user=self.user3, event=self.event2).exists())
+
     def test_engagement_user_cascade_deletion_(self):
         """
         Tests that when a user instance is deleted in the CustomUserModel model, the related instances through the user foreign key field in the engagement through model
@@ -482,4 +905,53 @@ class TestEngagementModel(TestCase):
         # Delete the user3 model instance of the CustomUserModel model
         CustomUserModel.objects.get(username=self.user3.username).delete()
         self.assertEqual(Engagement.objects.count(), 1)
-        self.assertEqual(len(Engagement.objects.filter(user=self.user3)), 0)
\ No newline at end of file
+        self.assertEqual(len(Engagement.objects.filter(user=self.user3)), 0)
+
+
+class TestConcurrentInterestRegistration(TransactionTestCase):
+    """
+    Tests for registering interest in an event from many threads at once.
+    """
+    def setUp(self):
+        cache.clear()
+        self.host = CustomUserModel.objects.create(username='jimmy147', email='tommypaul147@gmail.com', password='holly!123')
+        self.users = [CustomUserModel.objects.create(username=f'jimmy{number}', email=f'tommypaul{number}@gmail.com',
+                                                     password='holly!123') for number in range(40)]
+        self.event = EventsActivities.objects.create(host_user=self.host,
+                                                     status="advertised",
+                                                     title='event1',
+                                                     when="2030-12-23 12:00:00",
+                                                     closing_date="2030-12-15 12:00:00",
+                                                     max_attendees=15,
+                                                     keywords="outdoors,paintballing,competitive",
+                                                     description="Paintballing dayout, followed by lunch.",
+                                                     requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                                     address_line_one='mayhem paintball',
+                                                     city_or_town='adbridge',
+                                                     county='essex',
+                                                     postcode='rm4 1AA')
+
+    def test_concurrent_registrations_do_not_overbook_the_event(self):
+        """
+        Tests that concurrent registrations from more users than the event has places for register exactly its maximum
+        number of attendees.
+        """
+        load = RegistrationLoad(self.event.id, self.users, thread_count=8)
+        metrics = load.run()
+        self.assertEqual(metrics['failed'], 0)
+        self.assertEqual(metrics['registered'], 15)
+        self.assertEqual(metrics['full'], 25)
+        self.assertEqual(Engagement.objects.filter(event=self.event).count(), 15)
+        self.assertGreater(load.registrations_per_second(), 0)
+        self.assertIsNone(load.last_error)
+
+    def test_failed_registrations_are_counted(self):
+        """
+        Tests that registrations failing with a database error other than a locking error are counted as failed, and the
+        last error kept, rather than retried.
+        """
+        load = RegistrationLoad(self.event.id, self.users[:3], thread_count=2)
+        with patch.object(Engagement.objects, 'register_interest', side_effect=OperationalError('disk I/O error')):
+            metrics = load.run()
+        self.assertEqual((metrics['failed'], metrics['registered'], metrics['retries']), (3, 0, 0))
+        self.assertEqual(load.last_error, 'disk I/O error')
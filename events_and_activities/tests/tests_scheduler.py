@@ -0,0 +1,95 @@
+import datetime
+from django.test import TestCase
+from landing_page.models import CustomUserModel
+from ..models import EventsActivities, Engagement
+from ..scheduler import StatusTransitionScheduler
+
+
+class TestStatusTransitionScheduler(TestCase):
+    """
+    Tests for the StatusTransitionScheduler.
+    """
+    def setUp(self):
+        self.user = CustomUserModel.objects.create(username='jimmy147', email='tommypaul147@gmail.com', password='holly!123')
+        self.user2 = CustomUserModel.objects.create(username='jimmy1479', email='tommypaul1478@gmail.com', password='holly!1234')
+        self.event1 = EventsActivities.objects.create(host_user=self.user,
+                                                      status="advertised",
+                                                      title='event1',
+                                                      when="2030-12-23 12:00:00",
+                                                      closing_date="2030-12-15 12:00:00",
+                                                      max_attendees=20,
+                                                      keywords="outdoors,paintballing,competitive",
+                                                      description="Paintballing dayout, followed by lunch.",
+                                                      requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                                      address_line_one='mayhem paintball',
+                                                      city_or_town='adbridge',
+                                                      county='essex',
+                                                      postcode='rm4 1AA')
+        self.event1.attendees.add(self.user2, through_defaults={'status': 'In'})
+
+    def test_load_due_times(self):
+        """
+        Tests that only the due times within the refresh window are pushed onto the heap, each only once.
+        """
+        scheduler = StatusTransitionScheduler(refresh_interval=3600)
+        scheduler.load_due_times(datetime.datetime(2030, 12, 15, 11, 30))
+        self.assertEqual(scheduler.due_times, [datetime.datetime(2030, 12, 15, 12, 0)])
+        scheduler.load_due_times(datetime.datetime(2030, 12, 15, 11, 45))
+        self.assertEqual(scheduler.due_times, [datetime.datetime(2030, 12, 15, 12, 0)])
+        # a window containing no transitions, once the advert closing has been applied
+        scheduler = StatusTransitionScheduler(refresh_interval=3600)
+        scheduler.apply_transitions(datetime.datetime(2030, 12, 18, 12, 0))
+        scheduler.load_due_times(datetime.datetime(2030, 12, 18, 12, 0))
+        self.assertEqual(scheduler.due_times, [])
+        scheduler.load_due_times(datetime.datetime(2030, 12, 23, 11, 30))
+        self.assertEqual(scheduler.due_times, [datetime.datetime(2030, 12, 23, 12, 0)])
+
+    def test_load_due_times_includes_overdue_transitions(self):
+        """
+        Tests that the transitions of an event posted after the last refresh, which fell due before the next, are loaded
+        as overdue and applied at the next refresh.
+        """
+        scheduler = StatusTransitionScheduler(refresh_interval=3600)
+        scheduler.load_due_times(datetime.datetime(2030, 12, 16, 12, 0))
+        self.assertEqual(scheduler.due_times, [datetime.datetime(2030, 12, 15, 12, 0)])
+        result = scheduler.run_pending(datetime.datetime(2030, 12, 16, 12, 0))
+        self.assertEqual(result, {'confirmed': 1, 'completed': 0, 'engagements': 1})
+        # applied transitions are not loaded again
+        scheduler.load_due_times(datetime.datetime(2030, 12, 16, 13, 0))
+        self.assertEqual(scheduler.due_times, [])
+
+    def test_next_wake_time(self):
+        """
+        Tests that the scheduler wakes just after the earliest due time, or at the next refresh if sooner.
+        """
+        scheduler = StatusTransitionScheduler(refresh_interval=3600)
+        next_refresh = datetime.datetime(2030, 12, 15, 12, 30)
+        self.assertEqual(scheduler.next_wake_time(next_refresh), next_refresh)
+        scheduler.load_due_times(datetime.datetime(2030, 12, 15, 11, 30))
+        self.assertEqual(scheduler.next_wake_time(next_refresh), datetime.datetime(2030, 12, 15, 12, 0, 0, 1000))
+        self.assertEqual(scheduler.next_wake_time(datetime.datetime(2030, 12, 15, 11, 45)), datetime.datetime(2030, 12, 15, 11, 45))
+
+    def test_run_pending_applies_transitions_when_due(self):
+        """
+        Tests that the event and engagement statuses are only updated once their due times have passed.
+        """
+        scheduler = StatusTransitionScheduler(refresh_interval=3600)
+        scheduler.load_due_times(datetime.datetime(2030, 12, 15, 11, 30))
+        # nothing is due yet
+        with self.assertNumQueries(0):
+            self.assertIsNone(scheduler.run_pending(datetime.datetime(2030, 12, 15, 11, 59)))
+        # the advert closing date has passed
+        result = scheduler.run_pending(datetime.datetime(2030, 12, 15, 12, 0, 0, 1000))
+        self.assertEqual(result, {'confirmed': 1, 'completed': 0, 'engagements': 1})
+        self.assertEqual(scheduler.due_times, [])
+        self.assertEqual(EventsActivities.objects.get(id=self.event1.id).status, 'confirmed')
+        self.assertEqual(Engagement.objects.get(event=self.event1, user=self.user2).status, 'Att')
+        # the event has occurred
+        scheduler.load_due_times(datetime.datetime(2030, 12, 23, 11, 30))
+        result = scheduler.run_pending(datetime.datetime(2030, 12, 23, 12, 0, 0, 1000))
+        self.assertEqual(result, {'confirmed': 0, 'completed': 1, 'engagements': 1})
+        self.assertEqual(EventsActivities.objects.get(id=self.event1.id).status, 'completed')
+        self.assertEqual(Engagement.objects.get(event=self.event1, user=self.user2).status, 'Attd')
+        # transitions are not reapplied
+        self.assertEqual(scheduler.apply_transitions(datetime.datetime(2031, 1, 1, 12, 0)),
+                         {'confirmed': 0, 'completed': 0, 'engagements': 0})
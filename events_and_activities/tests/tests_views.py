@@ -1,16 +1,23 @@
 import re, json
+from datetime import datetime, timedelta
+from unittest.mock import patch
 from django.test import TestCase
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from django.core import mail
+from django.core.cache import cache
 from django.template.loader import render_to_string
 from eventabase.settings import EMAIL_HOST_USER
 from allauth.account.models import EmailAddress
 from landing_page.models import CustomUserModel
 from home.models import UserAddress, UserProfile
 from ..forms import EventsActivitiesForm
-from ..models import EventsActivities, Engagement
+from ..mailer import OutboxWorker
+from ..models import EventsActivities, Engagement, OutboxEmail
 from ..exceptions import EventClash
+from ..views import SearchAdvertsView
 
 
 class TestPostEventsView(TestCase):
@@ -150,7 +157,7 @@ class TestPostEventsView(TestCase):
         EventsActivities.objects.create(host_user=user,
                                         status="advertised",
                                         title='event3',
-                                        when="2030-12-23 12:00:00",
+                                        when="2030-12-24 12:00:00",
                                         closing_date="2022-10-15 12:00:00",
                                         max_attendees=20,
                                         keywords="outdoors,paintballing,competitive",
@@ -187,15 +194,15 @@ class TestPostEventsView(TestCase):
                                         county='essex',
                                         postcode='rm4 1aa')
         # expected data
-        expected_advertised_event_data = [({'ID': 1, 'host': user, 'title': 'event1',
+        expected_advertised_event_data = [({'ID': 1, 'host': user.username, 'title': 'event1',
                                            'when': '12:00, 23/12/30', 'closing date': '12:00, 15/12/28',
                                            'max no. of attendees': 20, 'keywords': 'outdoors,paintballing,competitive',
                                            'description': 'Paintballing dayout, followed by lunch.',
                                            'requirements': 'min £50 per person. wear suitable shoes. Need to be physically fit.',
                                            'Address line 1': 'mayhem paintball', 'City/Town': 'adbridge',
                                            'County': 'essex', 'Postcode': 'rm4 1aa'}, 0)]
-        expected_upcoming_event_data = [({'ID': 3, 'host': user, 'title': 'event3',
-                                         'when': '12:00, 23/12/30', 'closing date': '12:00, 15/10/22',
+        expected_upcoming_event_data = [({'ID': 3, 'host': user.username, 'title': 'event3',
+                                         'when': '12:00, 24/12/30', 'closing date': '12:00, 15/10/22',
                                          'max no. of attendees': 20, 'keywords': 'outdoors,paintballing,competitive',
                                          'description': 'Paintballing dayout, followed by lunch.',
                                          'requirements': 'min £50 per person. wear suitable shoes. Need to be physically fit.',
@@ -212,6 +219,50 @@ class TestPostEventsView(TestCase):
             with self.subTest(key):
                 self.assertEqual(response.context[key], value)
 
+    def test_number_of_queries_does_not_grow_with_number_of_hosted_events(self):
+        """
+        Tests that the number of queries made when rendering the post events section is independent of the number of events a user is hosting.
+        """
+        user = CustomUserModel.objects.get(username=self.data['username'])
+        user2 = CustomUserModel.objects.get(username=self.data2['username'])
+        client = Client()
+        client.login(email=self.data['email'],
+                     password=self.data['password1'])
+
+        def add_hosted_events(number, status, closing_date):
+            for _ in range(number):
+                # one event a day, as a host cannot have two events on the same day
+                when = datetime(2030, 1, 1, 12, 0) + timedelta(days=EventsActivities.objects.count())
+                event = EventsActivities.objects.create(host_user=user,
+                                                        status=status,
+                                                        title='event',
+                                                        when=when,
+                                                        closing_date=closing_date,
+                                                        max_attendees=20,
+                                                        keywords="outdoors,paintballing,competitive",
+                                                        description="Paintballing dayout, followed by lunch.",
+                                                        requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                                        address_line_one='mayhem paintball',
+                                                        city_or_town='adbridge',
+                                                        county='essex',
+                                                        postcode='rm4 1aa')
+                event.attendees.add(user2, through_defaults={'status': 'In'})
+
+        add_hosted_events(1, 'advertised', "2028-10-15 12:00:00")
+        add_hosted_events(1, 'confirmed', "2022-10-15 12:00:00")
+        with CaptureQueriesContext(connection) as few_events_queries:
+            response = client.get('/home/')
+        self.assertEqual(response.context['advertised_hosting_events_data'][0][1], 1)
+        self.assertEqual(len(response.context['upcoming_hosting_events_data']), 1)
+
+        add_hosted_events(10, 'advertised', "2028-10-15 12:00:00")
+        add_hosted_events(10, 'confirmed', "2022-10-15 12:00:00")
+        with CaptureQueriesContext(connection) as many_events_queries:
+            response = client.get('/home/')
+        self.assertEqual(len(response.context['advertised_hosting_events_data']), 11)
+        self.assertEqual(len(response.context['upcoming_hosting_events_data']), 11)
+        self.assertEqual(len(many_events_queries), len(few_events_queries))
+
     def test_post_events_form_handling_and_processing(self):
         """
         Tests the POST method of the PostEventsView, that is responsible for handling the post events form submission.
@@ -283,6 +334,35 @@ class TestPostEventsView(TestCase):
         self.assertHTMLEqual(response_json['form'], rendered_form)
         self.assertInHTML(msg, response_json['form'], count=1)
 
+    def test_post_events_form_handling_of_a_second_event_on_the_same_day(self):
+        """
+        Tests that the POST method of the PostEventsView rejects a second event hosted by the user on the same day, when
+        its insert is rejected by the unique constraint on the host and date of events, with the error added to the form.
+        """
+        event = {'title': 'paintballing',
+                 'when': '13:30, 19/01/30',
+                 'closing_date': '11:00, 01/01/30',
+                 'max_attendees': 20,
+                 'keywords': 'outdoors,fun',
+                 'description': 'painballing then lunch.',
+                 'requirements': '£50 per person',
+                 'address_line_one': '58 StanLey Avenue',
+                 'city_or_town': 'GIdea Park',
+                 'county': 'ESSEX',
+                 'postcode': 'Rm26Bt'}
+        client = Client()
+        client.login(email=self.data['email'],
+                     password=self.data['password1'])
+        response = client.post(reverse('home:post_events_view'), data=event, mode='same_origin')
+        self.assertEqual(response.json()['valid'], 'true')
+        # a second event later on the same day
+        response = client.post(reverse('home:post_events_view'), data={**event, 'when': '18:00, 19/01/30'}, mode='same_origin')
+        response_json = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_json['valid'], 'false')
+        self.assertIn(EventsActivitiesForm.host_date_taken_msg, response_json['form'])
+        self.assertEqual(EventsActivities.objects.filter(host_user__email=self.data['email']).count(), 1)
+
     def test_response_get_fetch_request_post_events_view(self):
         """
         Tests that a GET request for form refreshing, after closing the modal or clicking cancel, receives the expected responses.
@@ -424,7 +504,7 @@ class TestUpdateEventsView(TestCase):
         self.assertEqual(response.json(), {'successful': 'true'})
         # check event no longer exists
         self.assertEqual((EventsActivities.objects.filter(id=int(event_id)).exists()), False)
-        # check emails have been sent
+        # check emails have been queued, and are sent by the outbox worker
         event_title = event_instance.title
         event_host = event_instance.host_user.username
         event_when = event_instance.when.strftime("%H:%M, %d/%m/%y")
@@ -433,11 +513,17 @@ class TestUpdateEventsView(TestCase):
         message = f'''Hi,
 An event that you have registered your interest in has been cancelled:
 Unfortunately the event titled {event_title}, hosted by {event_host}, and due to occur on the {event_when}, has been cancelled.'''
-        self.assertEqual(len(mail.outbox), 1)
-        self.assertEqual(mail.outbox[0].subject, subject)
-        self.assertEqual(mail.outbox[0].to, recipients)
-        self.assertEqual(mail.outbox[0].body, message)
-        self.assertEqual(mail.outbox[0].from_email, EMAIL_HOST_USER)
+        self.assertEqual(len(mail.outbox), 0)
+        # a separate email for each attendee
+        self.assertEqual([email.recipients for email in OutboxEmail.objects.filter(subject=subject, status='pending').order_by('id')],
+                         [[recipient] for recipient in recipients])
+        OutboxWorker().send_due()
+        self.assertEqual(len(mail.outbox), 2)
+        for sent_email, recipient in zip(mail.outbox, recipients):
+            self.assertEqual(sent_email.subject, subject)
+            self.assertEqual(sent_email.to, [recipient])
+            self.assertEqual(sent_email.body, message)
+            self.assertEqual(sent_email.from_email, EMAIL_HOST_USER)
 
         # Testing cancel event request:
 
@@ -450,7 +536,7 @@ Unfortunately the event titled {event_title}, hosted by {event_host}, and due to
         self.assertEqual(response.json(), {'successful': 'true'})
         # check event no longer exists
         self.assertEqual((EventsActivities.objects.filter(id=int(event_id)).exists()), False)
-        # check emails have been sent
+        # check emails have been queued, and are sent by the outbox worker
         event_title = event_instance.title
         event_host = event_instance.host_user.username
         event_when = event_instance.when.strftime("%H:%M, %d/%m/%y")
@@ -460,10 +546,15 @@ Unfortunately the event titled {event_title}, hosted by {event_host}, and due to
 One of the events you are confirmed to attend has been cancelled:
 Unfortunately the event titled {event_title}, hosted by {event_host}, and due to occur on the {event_when}, has been cancelled.'''
         self.assertEqual(len(mail.outbox), 2)
-        self.assertEqual(mail.outbox[1].subject, subject)
-        self.assertEqual(mail.outbox[1].to, recipients)
-        self.assertEqual(mail.outbox[1].body, message)
-        self.assertEqual(mail.outbox[1].from_email, EMAIL_HOST_USER)
+        self.assertEqual([email.recipients for email in OutboxEmail.objects.filter(subject=subject, status='pending').order_by('id')],
+                         [[recipient] for recipient in recipients])
+        OutboxWorker().send_due()
+        self.assertEqual(len(mail.outbox), 4)
+        for sent_email, recipient in zip(mail.outbox[2:], recipients):
+            self.assertEqual(sent_email.subject, subject)
+            self.assertEqual(sent_email.to, [recipient])
+            self.assertEqual(sent_email.body, message)
+            self.assertEqual(sent_email.from_email, EMAIL_HOST_USER)
     
     def test_post_method_of_update_events_view_with_exception(self):
         """
@@ -623,7 +714,7 @@ class TestViewEventsView(TestCase):
         EventsActivities.objects.create(host_user=user,
                                         status="advertised",
                                         title='event3',
-                                        when="2030-12-23 12:00:00",
+                                        when="2030-12-24 12:00:00",
                                         closing_date="2022-10-15 12:00:00",
                                         max_attendees=20,
                                         keywords="outdoors,paintballing,competitive",
@@ -757,7 +848,7 @@ class TestViewEventsView(TestCase):
         self.assertEqual(response.json(), {'successful': 'true'})
         # check user is no longer attending event5
         self.assertEqual(Engagement.objects.filter(event__title='event5', user=user).exists(), False)
-        # check email has been sent
+        # check email has been queued, and is sent by the outbox worker
         event_instance = EventsActivities.objects.get(id=int(event_id))
         host_email = event_instance.host_user.email
         event_title = event_instance.title
@@ -766,6 +857,9 @@ class TestViewEventsView(TestCase):
         message = f'''Hi,
 {user.username} has withdrawn from one of your upcoming events:
 Unfortunately {user.username} has withdrawn from your event titled {event_title}, due to occur on the {event_when}.'''
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.filter(subject=subject, recipients=[host_email], status='pending').count(), 1)
+        OutboxWorker().send_due()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, subject)
         self.assertEqual(mail.outbox[0].to, [host_email])
@@ -842,6 +936,50 @@ Unfortunately {user.username} has withdrawn from your event titled {event_title}
         # check emails have not been sent
         self.assertEqual(len(mail.outbox), 0)
 
+    def test_number_of_queries_does_not_grow_with_number_of_engaged_events(self):
+        """
+        Tests that the number of queries made when rendering the search and view events section is independent of the number of events a user is engaged in.
+        """
+        user = CustomUserModel.objects.get(username=self.data['username'])
+        user2 = CustomUserModel.objects.get(username=self.data2['username'])
+        client = Client()
+        client.login(email=self.data['email'],
+                     password=self.data['password1'])
+
+        def add_engaged_events(number, status, closing_date):
+            for _ in range(number):
+                # one event a day, as a host cannot have two events on the same day
+                when = datetime(2030, 1, 1, 12, 0) + timedelta(days=EventsActivities.objects.count())
+                event = EventsActivities.objects.create(host_user=user2,
+                                                        status="advertised",
+                                                        title='event',
+                                                        when=when,
+                                                        closing_date=closing_date,
+                                                        max_attendees=20,
+                                                        keywords="outdoors,paintballing,competitive",
+                                                        description="Paintballing dayout, followed by lunch.",
+                                                        requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                                        address_line_one='mayhem paintball',
+                                                        city_or_town='adbridge',
+                                                        county='essex',
+                                                        postcode='rm4 1aa')
+                event.attendees.add(user, through_defaults={'status': status})
+
+        add_engaged_events(1, 'In', "2028-10-15 12:00:00")
+        add_engaged_events(1, 'Att', "2022-10-15 12:00:00")
+        with CaptureQueriesContext(connection) as few_events_queries:
+            response = client.get('/home/')
+        self.assertEqual(len(response.context['interested_events_data']), 1)
+        self.assertEqual(len(response.context['upcoming_events_data']), 1)
+
+        add_engaged_events(10, 'In', "2028-10-15 12:00:00")
+        add_engaged_events(10, 'Att', "2022-10-15 12:00:00")
+        with CaptureQueriesContext(connection) as many_events_queries:
+            response = client.get('/home/')
+        self.assertEqual(len(response.context['interested_events_data']), 11)
+        self.assertEqual(len(response.context['upcoming_events_data']), 11)
+        self.assertEqual(len(many_events_queries), len(few_events_queries))
+
 
 class TestSearchAdvertsView(TestCase):
     """
@@ -1020,7 +1158,7 @@ class TestSearchAdvertsView(TestCase):
         EventsActivities.objects.create(host_user=user,
                                         status="advertised",
                                         title='event4',
-                                        when="2030-12-23 12:00:00",
+                                        when="2030-12-24 12:00:00",
                                         closing_date="2029-10-15 12:00:00",
                                         max_attendees=1,
                                         keywords="outdoors,paintballing,competitive",
@@ -1062,6 +1200,201 @@ class TestSearchAdvertsView(TestCase):
                                   'County': 'essex', 'Postcode': 'rm4 1aa'}, 0)]
         self.assertEqual(len(response.context['event_advert_data']), 1)
         self.assertEqual(response.context['event_advert_data'], expected_advert_data)
+
+    def test_get_method_paginates_adverts_with_keyset_cursor(self):
+        """
+        Tests that adverts are displayed a page at a time in closing date then id order, with the next page retrieved
+        as a rendered fragment via the cursor of the last displayed advert.
+        """
+        user2 = CustomUserModel.objects.get(username=self.data2['username'])
+        # events sharing a closing date are ordered by id
+        for day, (title, closing_date) in enumerate([('event1', '2029-10-15 12:00:00'), ('event2', '2028-10-15 12:00:00'),
+                                                     ('event3', '2029-10-15 12:00:00')], start=20):
+            EventsActivities.objects.create(host_user=user2,
+                                            status="advertised",
+                                            title=title,
+                                            when=f'2030-12-{day} 12:00:00',
+                                            closing_date=closing_date,
+                                            max_attendees=20,
+                                            keywords="outdoors,paintballing,competitive",
+                                            description="Paintballing dayout, followed by lunch.",
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1aa')
+        event1 = EventsActivities.objects.get(title='event1')
+
+        client = Client()
+        client.login(email=self.data['email'],
+                     password=self.data['password1'])
+        with patch.object(SearchAdvertsView, 'adverts_per_page', 2):
+            response = client.get('/events_and_activities/search_event_adverts/')
+            self.assertEqual([event['title'] for event, _ in response.context['event_advert_data']], ['event2', 'event1'])
+            self.assertEqual(response.context['next_cursor'], f'2029-10-15T12:00:00_{event1.id}')
+            self.assertContains(response, f'data-next-cursor="{response.context["next_cursor"]}"')
+
+            response = client.get('/events_and_activities/search_event_adverts/page/',
+                                  {'after': response.context['next_cursor']})
+            response_json = json.loads(response.content)
+            self.assertEqual(response_json['successful'], 'true')
+            self.assertEqual(response_json['next_cursor'], '')
+            self.assertEqual(re.findall(r'Title :</span>\s*<span>(\w+)\.', response_json['adverts']), ['event3'])
+
+            # a malformed cursor is rejected
+            response = client.get('/events_and_activities/search_event_adverts/page/', {'after': 'not-a-cursor'})
+            self.assertEqual(json.loads(response.content), {'successful': 'false'})
+
+    def test_get_method_searches_adverts(self):
+        """
+        Tests that adverts are filtered by the search terms and ordered by relevance, with subsequent pages of results
+        retrieved via the search rank cursor of the last displayed advert.
+        """
+        user2 = CustomUserModel.objects.get(username=self.data2['username'])
+        for day, (title, keywords) in enumerate([('pottery', 'indoors,crafts'), ('paintball', 'outdoors,competitive'),
+                                                 ('day out', 'outdoors,paintballing')], start=20):
+            EventsActivities.objects.create(host_user=user2,
+                                            status="advertised",
+                                            title=title,
+                                            when=f'2030-12-{day} 12:00:00',
+                                            closing_date="2029-10-15 12:00:00",
+                                            max_attendees=20,
+                                            keywords=keywords,
+                                            description="A day out, followed by lunch.",
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1aa')
+
+        client = Client()
+        client.login(email=self.data['email'],
+                     password=self.data['password1'])
+        with patch.object(SearchAdvertsView, 'adverts_per_page', 1):
+            response = client.get('/events_and_activities/search_event_adverts/', {'q': 'paintball'})
+            self.assertEqual([event['title'] for event, _ in response.context['event_advert_data']], ['paintball'])
+            self.assertContains(response, 'value="paintball"')
+            self.assertContains(response, 'data-search="paintball"')
+
+            response = client.get('/events_and_activities/search_event_adverts/page/',
+                                  {'after': response.context['next_cursor'], 'q': 'paintball'})
+            response_json = json.loads(response.content)
+            self.assertEqual(response_json['next_cursor'], '')
+            self.assertEqual(re.findall(r'Title :</span>\s*<span>([\w ]+)\.', response_json['adverts']), ['day out'])
+
+        response = client.get('/events_and_activities/search_event_adverts/', {'q': 'karaoke'})
+        self.assertEqual(response.context['event_advert_data'], [])
+        self.assertContains(response, 'There are currently no adverts matching your search.')
+
+    def test_get_method_pages_through_adverts_of_equal_search_rank(self):
+        """
+        Tests that adverts of equal relevance are each displayed once when paged through via the search rank cursor, in
+        id order.
+        """
+        user2 = CustomUserModel.objects.get(username=self.data2['username'])
+        for day in range(20, 25):
+            EventsActivities.objects.create(host_user=user2,
+                                            status="advertised",
+                                            title='paintball',
+                                            when=f'2030-12-{day} 12:00:00',
+                                            closing_date="2029-10-15 12:00:00",
+                                            max_attendees=20,
+                                            keywords='outdoors,competitive',
+                                            description="A day out, followed by lunch.",
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1aa')
+
+        client = Client()
+        client.login(email=self.data['email'],
+                     password=self.data['password1'])
+        with patch.object(SearchAdvertsView, 'adverts_per_page', 2):
+            response = client.get('/events_and_activities/search_event_adverts/', {'q': 'paintball'})
+            event_ids = [event['ID'] for event, _ in response.context['event_advert_data']]
+            next_cursor = response.context['next_cursor']
+            while next_cursor:
+                response = client.get('/events_and_activities/search_event_adverts/page/', {'after': next_cursor, 'q': 'paintball'})
+                response_json = json.loads(response.content)
+                event_ids += [int(event_id) for event_id in re.findall(r'Id :</span>\s*<span>(\d+)\.', response_json['adverts'])]
+                next_cursor = response_json['next_cursor']
+        self.assertEqual(event_ids, list(EventsActivities.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_get_method_filters_adverts_by_keywords(self):
+        """
+        Tests that adverts are filtered to those tagged with all the given keywords, and that the popular keywords are displayed.
+        """
+        cache.clear()
+        user2 = CustomUserModel.objects.get(username=self.data2['username'])
+        for day, (title, keywords) in enumerate([('event1', 'outdoors,climbing'), ('event2', 'outdoors,climbing-wall'), ('event3', 'indoors,climbing')], start=20):
+            EventsActivities.objects.create(host_user=user2,
+                                            status="advertised",
+                                            title=title,
+                                            when=f'2030-12-{day} 12:00:00',
+                                            closing_date="2029-10-15 12:00:00",
+                                            max_attendees=20,
+                                            keywords=keywords,
+                                            description="A day out, followed by lunch.",
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1aa')
+
+        client = Client()
+        client.login(email=self.data['email'],
+                     password=self.data['password1'])
+        response = client.get('/events_and_activities/search_event_adverts/', {'keywords': 'Climbing,outdoors'})
+        self.assertEqual([event['title'] for event, _ in response.context['event_advert_data']], ['event1'])
+        self.assertEqual(response.context['keywords'], 'climbing,outdoors')
+        self.assertEqual(response.context['popular_keywords'], [('climbing', 2), ('outdoors', 2), ('climbing-wall', 1), ('indoors', 1)])
+        self.assertContains(response, '<a href="?keywords=climbing" aria-label="climbing, 2 adverts">climbing (2)</a>', html=True)
+        cache.clear()
+
+    def test_get_method_filters_adverts_by_distance(self):
+        """
+        Tests that adverts are filtered to those within the given distance of the user's address, nearest first, with
+        subsequent pages retrieved via the distance cursor of the last displayed advert.
+        """
+        user2 = CustomUserModel.objects.get(username=self.data2['username'])
+        # the user's address is in chadwell heath
+        for day, (title, latitude, longitude) in enumerate([('romford', 51.5768, 0.1801), ('chadwell heath', 51.5791, 0.1355),
+                                                            ('brighton', 50.8225, -0.1372), ('unknown', None, None)], start=20):
+            EventsActivities.objects.create(host_user=user2,
+                                            status="advertised",
+                                            title=title,
+                                            when=f'2030-12-{day} 12:00:00',
+                                            closing_date="2029-10-15 12:00:00",
+                                            max_attendees=20,
+                                            keywords='outdoors',
+                                            description="A day out, followed by lunch.",
+                                            requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                            address_line_one='mayhem paintball',
+                                            city_or_town='adbridge',
+                                            county='essex',
+                                            postcode='rm4 1aa',
+                                            latitude=latitude,
+                                            longitude=longitude)
+
+        client = Client()
+        client.login(email=self.data['email'],
+                     password=self.data['password1'])
+        with patch.object(SearchAdvertsView, 'adverts_per_page', 1):
+            response = client.get('/events_and_activities/search_event_adverts/', {'distance': '10'})
+            self.assertEqual([event['title'] for event, _ in response.context['event_advert_data']], ['chadwell heath'])
+            self.assertContains(response, '<option value="10" selected>10 km</option>', html=True)
+
+            response = client.get('/events_and_activities/search_event_adverts/page/',
+                                  {'after': response.context['next_cursor'], 'distance': '10'})
+            response_json = json.loads(response.content)
+            self.assertEqual(response_json['next_cursor'], '')
+            self.assertEqual(re.findall(r'Title :</span>\s*<span>([\w ]+)\.', response_json['adverts']), ['romford'])
+
+        # an invalid distance is ignored
+        response = client.get('/events_and_activities/search_event_adverts/', {'distance': 'far'})
+        self.assertEqual(len(response.context['event_advert_data']), 4)
+        self.assertEqual(response.context['distance'], '')
     
     def test_post_method_response_for_unauthenticated_user(self):
         """
@@ -1151,7 +1484,7 @@ class TestSearchAdvertsView(TestCase):
         EventsActivities.objects.create(host_user=user,
                                         status="advertised",
                                         title='event4',
-                                        when="2030-12-23 12:00:00",
+                                        when="2030-12-24 12:00:00",
                                         closing_date="2029-10-15 12:00:00",
                                         max_attendees=1,
                                         keywords="outdoors,paintballing,competitive",
@@ -1281,7 +1614,7 @@ class TestSearchAdvertsView(TestCase):
                                         postcode='rm4 1aa')
         EventsActivities.objects.get(title='event2').attendees.add(user2, through_defaults={'status': 'Att'})
         # create event on the same date as event1 
-        EventsActivities.objects.create(host_user=user,
+        EventsActivities.objects.create(host_user=user3,
                                         status="advertised",
                                         title='event3',
                                         when="2032-10-30 9:00:00",
@@ -1295,7 +1628,7 @@ class TestSearchAdvertsView(TestCase):
                                         county='essex',
                                         postcode='rm4 1aa')
         # create event on the same date as event2 
-        EventsActivities.objects.create(host_user=user,
+        EventsActivities.objects.create(host_user=user3,
                                         status="advertised",
                                         title='event4',
                                         when="2033-10-30 14:00:00",
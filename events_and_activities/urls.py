@@ -6,5 +6,6 @@ urlpatterns = [
     path('search_event_adverts/', SearchAdvertsView.as_view(extra_context={'page_id': 'search_adverts',
                                                                            'logged_in': True}),
          name='search_adverts_page'),
+    path('search_event_adverts/page/', SearchAdvertsView.as_view(fragment=True), name='search_adverts_fragment'),
     path('retrieve_contact_info/', RetrieveContactInfoView.as_view(), name='retrieve_contact_info')
 ]
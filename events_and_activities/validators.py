@@ -12,8 +12,8 @@ def check_date_has_not_occured(date):
     Raises:
         ValidationError('This date and time is in the past.', 'invalid date') if datetime is in the past.
     """
-    current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
-    current_date_time_object = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
+    # the current date and time to the minute, the precision of the datetime input format
+    current_date_time_object = datetime.now().replace(second=0, microsecond=0)
     if date < current_date_time_object:
         raise ValidationError('This date and time is in the past.', 'invalid date')
 
@@ -1,40 +1,36 @@
 import json
-from django.db.models import Count, F
+from datetime import datetime
 from django.views.generic.edit import FormView, View
 from django.views.generic.base import TemplateView
+from django.db import IntegrityError
 from django.http import JsonResponse
 from django.http.response import HttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.decorators import method_decorator
-from django.template.loader import get_template, render_to_string
+from django.template.loader import render_to_string
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.core import mail
 from eventabase.settings import EMAIL_HOST_USER
-from smtplib import SMTPException
 from allauth.account.decorators import verified_email_required
-from .models import EventsActivities, Engagement
+from .models import EventsActivities, Engagement, Keyword, Occupancy, OutboxEmail
 from .forms import EventsActivitiesForm
+from .fragments import render_event_cards
 from .exceptions import EventClash
-from home.models import UserProfile
+from home.models import UserAddress, UserProfile
+from home.sections import HomepageSections
 
 # Create your views here.
 
 @method_decorator([verified_email_required], name='dispatch')
 class PostEventsView(FormView):
     """
-    Responsible for retrieving and displaying a user's advertised or upcoming events that they are hosting
-    in the post events section of their homepage. Also responsible for handling the post events form
-    creation and submission.
+    Responsible for refreshing the post events form modal of a user's homepage, whose post events section is rendered
+    by HomepageSections. Also responsible for handling the post events form submission.
 
     Attributes:
-        post_events_section_template: template for the post events section of the homepage.
-        post_events_modal_template: template for the post events form modal.
         further_context (dict): context dictionary.
         form_class (obj): form class for the post events form.
     """
-    post_events_section_template = get_template('events_and_activities/post_section.html')
-    post_events_modal_template = get_template('events_and_activities/post_events_modal.html')    
 
     def __init__(self, **kwargs):
         """
@@ -46,54 +42,15 @@ class PostEventsView(FormView):
 
     def get(self, request, *args, **kwargs):
         """
-        Handles GET requests for rendered post_section and post_events_modal templates.
+        Handles GET requests for post events form refreshes.
+
+        Returns:
+            A JSON response containing the rendered post_events_modal template, or a redirect to the homepage if it is
+            not a form refresh request.
         """
-        if request.path != reverse('home:user_homepage'):
-            # establish whether it is a form refresh request
-            if request.environ['QUERY_STRING'] == 'refresh=true':
-                kwargs.update({'get_modal': True, 'modal': 'post_events_modal',
-                               'button1_name': 'Done', 'button2_name': 'Cancel'})
-            else:
-                return redirect(reverse('home:user_homepage'))
-
-        if not kwargs['get_modal']:
-            EventsActivities.expired.update_completed(request.user)
-            EventsActivities.expired.update_expired(request.user)
-            all_posted_events_for_user = EventsActivities.objects.filter(host_user=request.user)
-            all_advertsied_events_for_user = all_posted_events_for_user.filter(status='advertised')
-            all_upcoming_events_for_user = all_posted_events_for_user.filter(status='confirmed')
-
-            all_advertised_hosting_events_data = []
-            for event in all_advertsied_events_for_user:
-                data = event.retrieve_field_data()
-                data.pop('status')
-                data.pop('engagement')
-                data.pop('attendees')
-                data['closing date'] = data['closing date'].strftime("%H:%M, %d/%m/%y")
-                data['when'] = data['when'].strftime("%H:%M, %d/%m/%y")
-                all_advertised_hosting_events_data.append((data, event.attendees.count()))
-
-            all_upcoming_hosting_events_data = []
-            for event in all_upcoming_events_for_user:
-                data = event.retrieve_field_data()
-                data.pop('status')
-                data.pop('engagement')
-                data.pop('attendees')
-                data['closing date'] = data['closing date'].strftime("%H:%M, %d/%m/%y")
-                data['when'] = data['when'].strftime("%H:%M, %d/%m/%y")
-                all_upcoming_hosting_events_data.append((data, event.attendees.count()))
-
-            kwargs.update({'upcoming_hosting_events_data': all_upcoming_hosting_events_data,
-                           'advertised_hosting_events_data': all_advertised_hosting_events_data})
-            rendered_post_events_section_template = self.post_events_section_template.render(kwargs, request)
-            return rendered_post_events_section_template
-
-        post_events_form = self.get_form()
-        kwargs.update({'post_events_form': post_events_form})
-        rendered_post_events_modal_template = self.post_events_modal_template.render(kwargs, request)
-        if request.GET.get('refresh', ''):
-            return JsonResponse({'modal': rendered_post_events_modal_template})
-        return rendered_post_events_modal_template
+        if request.environ['QUERY_STRING'] != 'refresh=true':
+            return redirect(reverse('home:user_homepage'))
+        return JsonResponse({'modal': HomepageSections(request).render_post_events_modal()})
 
     def post(self, request, *args, **kwargs):
         """
@@ -110,16 +67,13 @@ class PostEventsView(FormView):
         form_data = {key: value for key, value in form_data.dict().items() if key != 'csrfmiddlewaretoken'}
         form_data.update({'host_user': request.user})
         new_event_form = EventsActivitiesForm(data=form_data)
-        valid = new_event_form.is_valid()
-        if valid:
+        new_event = None
+        if new_event_form.is_valid():
             new_event_form.post_clean_processing()
-            new_event = new_event_form.save()
-            new_event_data = new_event.retrieve_field_data()
-            new_event_data.pop('status')
-            new_event_data.pop('engagement')
-            new_event_data.pop('attendees')
-            new_event_data['closing date'] = new_event_data['closing date'].strftime("%H:%M, %d/%m/%y")
-            new_event_data['when'] = new_event_data['when'].strftime("%H:%M, %d/%m/%y")
+            new_event_form.set_cached_coordinates()
+            new_event = new_event_form.save_new_event()
+        if new_event:
+            new_event_data = EventsActivities.format_display_data(new_event.retrieve_field_data(verbose_names=False))
             rendered_event = render_to_string(template_name='events_and_activities/event.html',
                                               context={'event': new_event_data},
                                               request=request)
@@ -137,8 +91,8 @@ class PostEventsView(FormView):
 class UpdateEventsView(View):
     """
     Responsible for processing requests to delete a host user's existing event advert, as well as cancel one of their
-    upcoming events. Updates the EventsActivities model database by deleting the matching event. Emails are sent to
-    notify an attendee that an event/advert has been cancelled/deleted.
+    upcoming events. Updates the EventsActivities model database by deleting the matching event. Emails are queued in the
+    outbox to notify an attendee that an event/advert has been cancelled/deleted.
     """
     def post(self, request):
         """
@@ -178,8 +132,8 @@ Unfortunately the event titled {event_title}, hosted by {event_host}, and due to
                     message = f'''Hi,
 An event that you have registered your interest in has been cancelled:
 Unfortunately the event titled {event_title}, hosted by {event_host}, and due to occur on the {event_when}, has been cancelled.'''
-                mail.send_mail(subject=subject, message=message, recipient_list=recipients, from_email=EMAIL_HOST_USER)
-        except (SMTPException, Exception) as error:
+                OutboxEmail.objects.enqueue_each(subject=subject, message=message, recipient_list=recipients, from_email=EMAIL_HOST_USER)
+        except Exception as error:
             print(error)
 
         return JsonResponse({'successful': 'true'})
@@ -188,13 +142,12 @@ Unfortunately the event titled {event_title}, hosted by {event_host}, and due to
 @method_decorator([verified_email_required], name='dispatch')
 class ViewEventsView(FormView):
     """
-    Responsible for retrieving and displaying a user's interested or upcoming events in the search and view events section of their homepage.
+    Responsible for handling a user's withdrawal from one of the interested or upcoming events listed in the search and
+    view events section of their homepage, which is rendered by HomepageSections.
 
     Attributes:
-        search_view_events_section_template: template for the search adverts and view engaged events section of the homepage.
         further_context (dict): context dictionary.
     """
-    search_view_events_section_template = get_template('events_and_activities/search_view_events.html')
 
     def __init__(self, **kwargs):
         """
@@ -205,68 +158,9 @@ class ViewEventsView(FormView):
 
     def get(self, request, *args, **kwargs):
         """
-        Handles GET requests for the rendered search_view_events_section template.
+        Redirects GET requests to the homepage, which renders the search_view_events section.
         """
-        if request.path != reverse('home:user_homepage'):
-            return redirect(reverse('home:user_homepage'))
-
-        if not kwargs['get_modal']:
-            # Updating the user's status for each of their engaged events where necessary
-            Engagement.user_status.update_status(request.user)
-
-            # retrieving the user's events for which they have registered their interest
-            interested_events = Engagement.objects.filter(user=request.user, status='In').select_related('event').order_by("event__when").values('event__id',
-                                                                                                                                                 'event__title',
-                                                                                                                                                 'event__host_user',
-                                                                                                                                                 'event__when',
-                                                                                                                                                 'event__closing_date',
-                                                                                                                                                 'event__max_attendees',
-                                                                                                                                                 'event__keywords',
-                                                                                                                                                 'event__description',
-                                                                                                                                                 'event__requirements',
-                                                                                                                                                 'event__address_line_one',
-                                                                                                                                                 'event__city_or_town',
-                                                                                                                                                 'event__county',
-                                                                                                                                                 'event__postcode')
-
-            new_keys = EventsActivities.retrieve_field_names(verbose_names=True)
-            new_keys.remove('status')
-            new_keys.remove('engagement')
-            new_keys.remove('attendees')
-
-            interested_events_data = []
-            for event in interested_events:
-                event['event__closing_date'] = event['event__closing_date'].strftime("%H:%M, %d/%m/%y")
-                event['event__when'] = event['event__when'].strftime("%H:%M, %d/%m/%y")
-                new_keys_event = dict(zip(new_keys, event.values()))
-                interested_events_data.append((new_keys_event, Engagement.objects.get(event=event['event__id'], user=request.user).event.attendees.count()))
-
-            # retrieving the user's events for which they are confirmed to attend
-            upcoming_events = Engagement.objects.filter(user=request.user, status='Att').select_related('event').order_by("event__when").values('event__id',
-                                                                                                                                                'event__title',
-                                                                                                                                                'event__host_user',
-                                                                                                                                                'event__when',
-                                                                                                                                                'event__closing_date',
-                                                                                                                                                'event__max_attendees',
-                                                                                                                                                'event__keywords',
-                                                                                                                                                'event__description',
-                                                                                                                                                'event__requirements',
-                                                                                                                                                'event__address_line_one',
-                                                                                                                                                'event__city_or_town',
-                                                                                                                                                'event__county',
-                                                                                                                                                'event__postcode')
-
-            upcoming_events_data = []
-            for event in upcoming_events:
-                event['event__closing_date'] = event['event__closing_date'].strftime("%H:%M, %d/%m/%y")
-                event['event__when'] = event['event__when'].strftime("%H:%M, %d/%m/%y")
-                new_keys_event = dict(zip(new_keys, event.values()))
-                upcoming_events_data.append((new_keys_event, Engagement.objects.get(event=event['event__id'], user=request.user).event.attendees.count()))
-
-            kwargs.update({'interested_events_data': interested_events_data,
-                           'upcoming_events_data': upcoming_events_data})
-            rendered_search_view_events_section_template = self.search_view_events_section_template.render(kwargs, request)
-            return rendered_search_view_events_section_template
+        return redirect(reverse('home:user_homepage'))
 
     def post(self, request):
         """
@@ -291,8 +185,8 @@ class ViewEventsView(FormView):
                 message = f'''Hi,
 {request.user.username} has withdrawn from one of your upcoming events:
 Unfortunately {request.user.username} has withdrawn from your event titled {event_title}, due to occur on the {event_when}.'''
-                mail.send_mail(subject=subject, message=message, recipient_list=[host_email], from_email=EMAIL_HOST_USER)
-        except (SMTPException, Exception) as error:
+                OutboxEmail.objects.enqueue(subject=subject, message=message, recipient_list=[host_email], from_email=EMAIL_HOST_USER)
+        except Exception as error:
             print(error)
 
         return JsonResponse({'successful': 'true'})
@@ -304,10 +198,23 @@ class SearchAdvertsView(TemplateView):
     Responsible for retrieving and displaying current event adverts as part of the search event adverts page,
     as well as handling a user's request to register their interest in an event.
 
+    Adverts are displayed a page at a time, in closing date order, or in order of relevance when the user searches them
+    with the '?q=' parameter. They can be filtered to those tagged with all of the comma separated '?keywords=' parameter,
+    and to those within the '?distance=' in km of the user's address, nearest first.
+    Subsequent pages are retrieved via fetch requests using the keyset cursor of the last displayed advert.
+
     Attributes:
         template_name (str): name of the template used to render the search event adverts page.
+        advert_page_template (str): name of the template used to render a page of adverts.
+        adverts_per_page (int): maximum number of adverts displayed per page.
+        fragment (bool): whether GET requests are for a page of adverts as a rendered fragment, rather than the whole page.
+        distance_options (list): the distances in km the user can filter adverts by.
     """
     template_name = 'events_and_activities/search_event_adverts.html'
+    advert_page_template = 'events_and_activities/advert_page.html'
+    adverts_per_page = 20
+    fragment = False
+    distance_options = [5, 10, 25, 50, 100]
 
     def __init__(self, **kwargs):
         """
@@ -315,51 +222,125 @@ class SearchAdvertsView(TemplateView):
         """
         super().__init__(**kwargs)
 
+    @staticmethod
+    def encode_cursor(advert, ordering):
+        """
+        Returns:
+            The keyset cursor string of an advert, from the value of the field the adverts are ordered by, and its id.
+
+        Args:
+            advert (dict): the advert values.
+            ordering (str): the field the adverts are ordered by, as returned by advert_ordering.
+        """
+        position = advert[ordering.lstrip('-')]
+        if ordering == 'closing_date':
+            return f"{position.isoformat()}_{advert['id']}"
+        return f"{position!r}_{advert['id']}"
+
+    @staticmethod
+    def decode_cursor(cursor, ordering):
+        """
+        Raises:
+            ValueError: if the cursor string is malformed.
+
+        Returns:
+            A (value, id) tuple decoded from a keyset cursor string, the value being that of the field the adverts are ordered by.
+
+        Args:
+            cursor (str): the keyset cursor string.
+            ordering (str): the field the adverts are ordered by, as returned by advert_ordering.
+        """
+        position, event_id = cursor.rsplit('_', 1)
+        if ordering == 'closing_date':
+            return datetime.fromisoformat(position), int(event_id)
+        return float(position), int(event_id)
+
+    @staticmethod
+    def retrieve_near(user, distance):
+        """
+        Returns:
+            A (latitude, longitude, distance) tuple locating the user's address, or None if the distance is not a positive
+            number of km or the user's address has no coordinates.
+
+        Args:
+            user (obj): a CustomUserModel model instance.
+            distance (str): the distance in km, as given in the request.
+        """
+        try:
+            distance = float(distance)
+        except ValueError:
+            return None
+        if not distance > 0:
+            return None
+        coordinates = UserAddress.objects.filter(user_profile__user=user).values_list('latitude', 'longitude').first()
+        if not coordinates or None in coordinates:
+            return None
+        return (*coordinates, distance)
+
     def get(self, request, *args, **kwargs):
         """
-        Handles GET requests for the search event adverts page.
+        Handles GET requests for the search event adverts page, or for the page of adverts following the '?after=' cursor.
+        Adverts are filtered by the '?q=' search terms, '?keywords=' keywords and '?distance=' distance, if given.
+
+        Returns:
+            The rendered search event adverts page, or a JSON response with the rendered page of adverts and the cursor
+            for the next page, if the request is for a fragment.
         """
         if not UserProfile.objects.filter(user=request.user).exists():
             return redirect(reverse('home:user_homepage'))
-        
-        EventsActivities.expired.update_expired()
-        event_adverts = (EventsActivities.objects.filter(status='advertised')
-                                                 .exclude(host_user=request.user)
-                                                 .exclude(attendees=request.user)
-                                                 .annotate(attendee_count=Count('attendees'))
-                                                 .exclude(attendee_count__gte=F('max_attendees'))
-                                                 .order_by('closing_date')
-                                                 .values('id',
-                                                         'title',
-                                                         'host_user',
-                                                         'when',
-                                                         'closing_date',
-                                                         'max_attendees',
-                                                         'keywords',
-                                                         'description',
-                                                         'requirements',
-                                                         'address_line_one',
-                                                         'city_or_town',
-                                                         'county',
-                                                         'postcode',
-                                                         'attendee_count'))
-
-        new_keys = EventsActivities.retrieve_field_names(verbose_names=True)
-        new_keys.remove('status')
-        new_keys.remove('engagement')
-        new_keys.remove('attendees')
-
-        event_advert_data = []
-        for advert in event_adverts:
-            attendee_count = advert.pop('attendee_count')
-            advert['closing_date'] = advert['closing_date'].strftime("%H:%M, %d/%m/%y")
-            advert['when'] = advert['when'].strftime("%H:%M, %d/%m/%y")
-            new_keys_advert = dict(zip(new_keys, advert.values()))
-            event_advert_data.append((new_keys_advert, attendee_count))
-
-        kwargs.update({'event_advert_data': event_advert_data})
+
+        search = request.GET.get('q', '').strip()
+        keywords = Keyword.parse_names(request.GET.get('keywords', ''))
+        near = self.retrieve_near(request.user, request.GET.get('distance', ''))
+        ordering = EventsActivities.objects.advert_ordering(search, near)
+        after = None
+        if request.GET.get('after', ''):
+            try:
+                after = self.decode_cursor(request.GET['after'], ordering)
+            except ValueError:
+                if self.fragment:
+                    return JsonResponse({'successful': 'false'})
+                return redirect(reverse('events_and_activities:search_adverts_page'))
+
+        # one more advert than displayed is retrieved, to establish whether there is a next page
+        event_adverts = list(EventsActivities.objects.adverts_for(request.user, after=after, search=search,
+                                                                  keywords=keywords, near=near)[:self.adverts_per_page + 1])
+        next_cursor = ''
+        if len(event_adverts) > self.adverts_per_page:
+            event_adverts = event_adverts[:self.adverts_per_page]
+            next_cursor = self.encode_cursor(event_adverts[-1], ordering)
+        event_advert_data = [(EventsActivities.format_display_data(advert), advert['attendee_count']) for advert in event_adverts]
+        event_advert_cards = render_event_cards(event_advert_data, 'advert')
+
+        if self.fragment:
+            rendered_advert_page = render_to_string(template_name=self.advert_page_template,
+                                                    context={'event_advert_cards': event_advert_cards},
+                                                    request=request)
+            return JsonResponse({'successful': 'true', 'adverts': rendered_advert_page, 'next_cursor': next_cursor})
+
+        kwargs.update({'event_advert_data': event_advert_data, 'event_advert_cards': event_advert_cards,
+                       'next_cursor': next_cursor, 'search': search,
+                       'keywords': ','.join(keywords), 'popular_keywords': Keyword.popular.retrieve(),
+                       'distance': near[2] if near else '', 'distance_options': self.distance_options})
         return super().get(request, *args, **kwargs)
 
+    def check_clash(self, user, date):
+        """
+        Checks that a user is not hosting, interested in or attending another event on the day of the event they wish to
+        register their interest in, with a single lookup of the occupancy of their day.
+
+        Raises:
+            EventClash: if the user is occupied with another event on the day.
+        """
+        occupancy = Occupancy.objects.occupying(user, date).first()
+        if occupancy is None:
+            return
+        if occupancy.engagement_status is None:
+            raise EventClash(occupancy.event.title, occupancy.event.id, host=True)
+        if occupancy.engagement_status == 'In':
+            raise EventClash(occupancy.event.title, occupancy.event.id, interested=True)
+        raise EventClash(occupancy.event.title, occupancy.event.id, attending=True)
+
     def post(self, request, *args, **kwargs):
         """
         Returns:
@@ -369,19 +350,14 @@ class SearchAdvertsView(TemplateView):
 
         try:
             event = EventsActivities.objects.get(id=int(event_id))
-            event_when = event.when
-            if EventsActivities.objects.filter(host_user=request.user).filter(when__date=event_when.date()).exists():
-                clashing_event = EventsActivities.objects.get(host_user=request.user, when__date=event_when.date())
-                raise EventClash(clashing_event.title, clashing_event.id, host=True)
-            relevant_user_engaged_events = Engagement.objects.filter(user=request.user).filter(event__when__date=event_when.date())
-            if relevant_user_engaged_events.filter(status='In').exists():
-                clashing_event = relevant_user_engaged_events.get(status='In')
-                raise EventClash(clashing_event.event.title, clashing_event.event.id, interested=True)
-            if relevant_user_engaged_events.filter(status='Att').exists():
-                clashing_event = relevant_user_engaged_events.get(status='Att')
-                raise EventClash(clashing_event.event.title, clashing_event.event.id, attending=True)
-            if not event.attendees.count() >= event.max_attendees:
-                event.attendees.add(request.user, through_defaults={'status': 'In'})
+            self.check_clash(request.user, event.date)
+            try:
+                registered = Engagement.objects.register_interest(event.id, request.user)
+            except IntegrityError:
+                # the user's day was occupied by a concurrent request since it was checked
+                self.check_clash(request.user, event.date)
+                raise
+            if registered:
                 return JsonResponse({'successful': 'true'})
             else:
                 msg = 'Interest not registered. Sorry but the maximum number of people for this event have just now registered their interest.'
@@ -437,7 +413,8 @@ persists, please contact us.'''
         else:
             try:
                 event = EventsActivities.objects.get(id=int(event_id))
-                attendees_contact_info = event.attendees.all().values_list('username', 'email')
+                # ordered by when each attendee registered their interest
+                attendees_contact_info = event.engagement.order_by('id').values_list('user__username', 'user__email')
             except Exception as error:
                 print(error)
                 msg = '''Unable to retrieve the contact information of the attendees of this event at this time. Please refresh the page and try again. If the problem
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class HomeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'home'
+
+    def ready(self):
+        from eventabase.caching import check_shared_cache
+        from . import signals  # noqa: F401
+        checks.register(check_shared_cache, checks.Tags.caches)
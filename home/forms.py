@@ -1,12 +1,8 @@
-import os
 import re
 from pprint import pprint
-from urllib.parse import quote
-import requests
-from requests.structures import CaseInsensitiveDict
 from django.forms.models import ModelForm
 from django.forms.fields import DateField
-from home.models import UserProfile, UserAddress
+from home.models import PostcodeCoordinates, UserProfile, UserAddress
 from landing_page.forms import FormFieldMixin
 
 
@@ -49,29 +45,15 @@ class EditAddress(ModelForm, FormFieldMixin):
             setattr(self.instance, field, value)
         self.instance.user_profile = user_profile
 
-    def set_coordintes(self):
+    def set_cached_coordinates(self):
         """
-        Obtains latitude and longitude coordinates for a user address using the Geoapify API.
+        Sets the coordinates of a user address from the postcode cache, or otherwise leaves them pending, to be resolved
+        by the geocoding worker.
         """
-        # Retrieve user address data from the submitted EditAddress form.
-        address_terms = [getattr(self.instance, field_name) for field_name in self.cleaned_data.keys()]
-        API_KEY = os.environ.get('GEOAPIFY_API_KEY')
-        text_param = ', '.join(address_terms)
-        text_param_url_safe = quote(text_param)
-        url = f'https://api.geoapify.com/v1/geocode/search?text={text_param_url_safe}&lang=en&filter=countrycode:gb&format=json&apiKey={API_KEY}'
-        headers = CaseInsensitiveDict()
-        headers["Accept"] = "application/json"
-        try:
-            response = requests.get(url, headers=headers)
-            # First result used. Accuracy very much depends on the provided user address validity. May filter results further in the future.
-            first_result = response.json()['results'][0]
-        except (IndexError, KeyError, AttributeError) as error:
-            print(error)
-            return True
-        latitude = round(float(first_result['lat']), 4)
-        longitude = round(float(first_result['lon']), 4)
-        self.instance.latitude = latitude
-        self.instance.longitude = longitude
+        coordinates = PostcodeCoordinates.objects.lookup(self.instance.postcode)
+        self.instance.latitude, self.instance.longitude = coordinates or (None, None)
+        self.instance.geocode_attempts = 0
+        self.instance.geocoding_status = 'pending'
 
 
 class EditPersonalInfo(ModelForm, FormFieldMixin):
@@ -0,0 +1,123 @@
+"""
+A local stand-in for the Geoapify geocoding API, so that the geocoding of addresses can be tested and load tested without
+network access.
+
+Point the GEOCODER setting URL (or the GEOCODER_URL environment variable) at a running stub, started with the
+run_geocoder_stub command or, in tests, by starting a StubGeocoderServer in a thread.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubGeocoderRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers geocoding requests in the format of the Geoapify geocoding API.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/v1/geocode/search':
+            self.send_json(404, {'error': 'Not Found'})
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.server.request_count += 1
+        text = parse_qs(url.query).get('text', [''])[0].strip().lower()
+        coordinates = self.server.geocode(text)
+        results = [{'lat': coordinates[0], 'lon': coordinates[1], 'formatted': text}] if coordinates else []
+        self.send_json(200, {'results': results})
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StubGeocoderServer(ThreadingHTTPServer):
+    """
+    HTTP server standing in for the Geoapify geocoding API.
+
+    Addresses found in the results mapping are geocoded to the mapped coordinates. Any other address is geocoded to
+    coordinates within the UK derived from a hash of the address, or to no result if the stub only knows the mapped addresses.
+
+    Attributes:
+        results (dict): lower case address text to (latitude, longitude) mapping.
+        known_addresses_only (boolean): whether addresses missing from the results mapping have no result.
+        latency (float): the number of seconds each request is delayed by, to simulate a slow upstream.
+        request_count (int): the number of geocoding requests answered.
+        connection_count (int): the number of connections accepted, which is less than the request count when connections are reused.
+        verbose (boolean): whether requests are logged to stderr.
+    """
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), results=None, known_addresses_only=False, latency=0, verbose=False):
+        super().__init__(address, StubGeocoderRequestHandler)
+        self.results = {text.lower(): coordinates for text, coordinates in (results or {}).items()}
+        self.known_addresses_only = known_addresses_only
+        self.latency = latency
+        self.request_count = 0
+        self.connection_count = 0
+        self.verbose = verbose
+        self.thread = None
+
+    def get_request(self):
+        connection = super().get_request()
+        self.connection_count += 1
+        return connection
+
+    def handle_error(self, request, client_address):
+        # raised when responding to clients that timed out waiting on a delayed response
+        if self.verbose:
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def geocode(self, text):
+        """
+        Returns:
+            The (latitude, longitude) of an address, or None if it has no result.
+        """
+        if text in self.results:
+            return self.results[text]
+        if self.known_addresses_only or not text:
+            return None
+        digest = hashlib.sha256(text.encode()).digest()
+        # spread over the mainland UK bounding box
+        latitude = 50.0 + int.from_bytes(digest[:4], 'big') / 2 ** 32 * 8.6
+        longitude = -5.7 + int.from_bytes(digest[4:8], 'big') / 2 ** 32 * 7.4
+        return round(latitude, 6), round(longitude, 6)
+
+    def start(self):
+        """
+        Serves requests in a daemon thread.
+
+        Returns:
+            The server instance.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving requests and closes the server socket.
+        """
+        self.shutdown()
+        self.server_close()
+        if self.thread:
+            self.thread.join()
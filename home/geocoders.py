@@ -0,0 +1,204 @@
+"""
+Geocoding of addresses to coordinates, through the backend configured by the GEOCODER setting.
+
+Backends share a single requests session per process, so that connections to the geocoding API are kept alive and pooled
+rather than a new TLS connection being opened for every address saved. A circuit breaker stops requests being made while
+the API is failing or slow, so that profile saves fail fast rather than tying up a worker.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+DEFAULT_GEOCODER = {
+    'BACKEND': 'home.geocoders.GeoapifyGeocoder',
+    'URL': 'https://api.geoapify.com',
+    'API_KEY': None,
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 5,
+    'FAILURE_THRESHOLD': 5,
+    'RESET_TIMEOUT': 30,
+    'SLOW_CALL_DURATION': 2,
+    'POOL_SIZE': 10,
+}
+
+
+class GeocodingError(Exception):
+    """
+    Raised when an address could not be geocoded because the geocoder is unavailable, rather than the address having no result.
+    """
+
+
+class CircuitBreaker():
+    """
+    Fails calls to an upstream service fast while it is failing or slow.
+
+    The circuit is closed while calls succeed, and opens after failure_threshold consecutive calls have failed or taken
+    longer than slow_call_duration. While open, calls are refused until reset_timeout has passed, after which a single
+    trial call is allowed: the circuit closes again if it succeeds, and otherwise reopens.
+
+    Attributes:
+        failure_threshold (int): the number of consecutive failed or slow calls that opens the circuit.
+        reset_timeout (float): the number of seconds the circuit stays open before a trial call is allowed.
+        slow_call_duration (float): the number of seconds after which a successful call counts as failed.
+        failures (int): the current number of consecutive failed or slow calls.
+        opened_at (float): the clock time the circuit opened, or None while it is closed.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30, slow_call_duration=2, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_duration = slow_call_duration
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_call = False
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow_call(self):
+        """
+        Returns:
+            True if a call may be made, which once the reset timeout has passed is a single trial call.
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if not self.trial_call and self.clock() - self.opened_at >= self.reset_timeout:
+                self.trial_call = True
+                return True
+            return False
+
+    def record_call(self, duration, failed=False):
+        """
+        Records the outcome of a call, opening or closing the circuit accordingly.
+
+        Args:
+            duration (float): the number of seconds the call took.
+            failed (boolean): whether the call failed.
+        """
+        with self.lock:
+            self.trial_call = False
+            if failed or duration > self.slow_call_duration:
+                self.failures += 1
+                if self.opened_at is not None or self.failures >= self.failure_threshold:
+                    self.opened_at = self.clock()
+            else:
+                self.failures = 0
+                self.opened_at = None
+
+
+class Geocoder(ABC):
+    """
+    Base geocoder backend. Backends must implement geocode.
+    """
+    @abstractmethod
+    def geocode(self, address):
+        """
+        Args:
+            address (str): the address to geocode, as comma separated terms.
+
+        Returns:
+            A (latitude, longitude) tuple of floats rounded to 4 decimal places, or None if the address has no result.
+
+        Raises:
+            GeocodingError: if the geocoder is unavailable.
+        """
+
+    def geocode_batch(self, addresses, max_workers=4):
+        """
+        Geocodes several addresses, making up to max_workers requests concurrently.
+
+        Backends whose provider has a batch geocoding endpoint may override this to geocode the addresses in fewer requests.
+
+        Args:
+            addresses (list): the addresses to geocode, as comma separated terms.
+            max_workers (int): the most requests made at once.
+
+        Returns:
+            A dictionary of the addresses geocoded to their coordinates, or to None if they have no result. Addresses that
+            could not be geocoded because the geocoder is unavailable are left out.
+        """
+        def geocode_or_skip(address):
+            try:
+                return address, self.geocode(address), True
+            except GeocodingError as error:
+                print(error)
+                return address, None, False
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(geocode_or_skip, addresses)
+            return {address: coordinates for address, coordinates, geocoded in results if geocoded}
+
+
+class GeoapifyGeocoder(Geocoder):
+    """
+    Geocoder backend using the Geoapify geocoding API, or a stand-in for it at another URL.
+
+    Attributes:
+        url (str): the base URL of the API.
+        api_key (str): the Geoapify API key. Without one the geocoder is unavailable.
+        timeout (tuple): the connect and read timeouts of a request, in seconds.
+        session (obj): the requests session shared by all requests, pooling their connections.
+        circuit_breaker (obj): a CircuitBreaker instance.
+    """
+    def __init__(self, url, api_key=None, connect_timeout=3.05, read_timeout=5, failure_threshold=5, reset_timeout=30,
+                 slow_call_duration=2, pool_size=10):
+        self.url = urljoin(url, '/v1/geocode/search')
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.headers['Accept'] = 'application/json'
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout, slow_call_duration)
+
+    def geocode(self, address):
+        if not self.api_key:
+            raise GeocodingError('No geocoding API key is configured.')
+        if not self.circuit_breaker.allow_call():
+            raise GeocodingError('Geocoding requests are suspended while the API is failing.')
+        params = {'text': address, 'lang': 'en', 'filter': 'countrycode:gb', 'format': 'json', 'apiKey': self.api_key}
+        start = time.monotonic()
+        try:
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            results = response.json()['results']
+            # First result used. Accuracy very much depends on the provided address validity.
+            coordinates = (round(float(results[0]['lat']), 4), round(float(results[0]['lon']), 4)) if results else None
+        except (requests.RequestException, ValueError, KeyError, TypeError) as error:
+            self.circuit_breaker.record_call(time.monotonic() - start, failed=True)
+            raise GeocodingError(error) from error
+        self.circuit_breaker.record_call(time.monotonic() - start)
+        return coordinates
+
+
+@lru_cache(maxsize=None)
+def get_geocoder():
+    """
+    Returns:
+        The geocoder backend instance configured by the GEOCODER setting, shared by the whole process.
+    """
+    options = {**DEFAULT_GEOCODER, **getattr(settings, 'GEOCODER', {})}
+    backend = import_string(options.pop('BACKEND'))
+    return backend(**{option.lower(): value for option, value in options.items()})
+
+
+@receiver(setting_changed)
+def reset_geocoder(setting, **kwargs):
+    """
+    Discards the geocoder backend instance when the GEOCODER setting is overridden, as in tests.
+    """
+    if setting == 'GEOCODER':
+        get_geocoder.cache_clear()
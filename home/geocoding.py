@@ -0,0 +1,130 @@
+import time
+from django.db import transaction
+from .geocoders import get_geocoder
+from .geohash import encode
+from events_and_activities.models import EventsActivities, events_updated
+from .models import PostcodeCoordinates, UserAddress
+from .sections import invalidate_sections
+
+
+class GeocodingWorker():
+    """
+    Resolves the coordinates of the user addresses and events saved with pending coordinates, in batches, off the
+    request path.
+
+    Each batch is first resolved from the postcode cache, and the remaining addresses are geocoded concurrently by the
+    configured geocoder. An address the geocoder has no result for is retried in later batches, up to max_attempts times,
+    after which its coordinates are marked as failed. Addresses are left pending, without counting an attempt, while the
+    geocoder is unavailable.
+
+    Attributes:
+        batch_size (int): the most addresses resolved per batch.
+        max_workers (int): the most geocoder requests made at once.
+        max_attempts (int): the number of times an address is geocoded without a result before it is marked as failed.
+        models (list): the models whose addresses are resolved, each having the address, coordinates and geocoding
+                       status fields of UserAddress, and a geocoding_text method.
+    """
+    models = [UserAddress, EventsActivities]
+
+    def __init__(self, batch_size=50, max_workers=4, max_attempts=3):
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+
+    def resolve_pending(self):
+        """
+        Resolves a batch of the addresses with pending coordinates of each of the models.
+
+        Returns:
+            A dictionary containing the number of addresses resolved, failed, and still pending, out of those in the batches.
+        """
+        result = {'resolved': 0, 'failed': 0, 'pending': 0}
+        for model in self.models:
+            for outcome, count in self.resolve_pending_batch(model).items():
+                result[outcome] += count
+        return result
+
+    def resolve_pending_batch(self, model):
+        """
+        Resolves a batch of the addresses of a model with pending coordinates, those attempted the fewest times first.
+
+        Args:
+            model (class): UserAddress or EventsActivities.
+
+        Returns:
+            A dictionary containing the number of addresses resolved, failed, and still pending, out of those in the batch.
+        """
+        addresses = list(model.objects.filter(geocoding_status='pending')
+                                      .order_by('geocode_attempts', 'pk')[:self.batch_size])
+        result = {'resolved': 0, 'failed': 0, 'pending': 0}
+        if not addresses:
+            return result
+
+        coordinates = {}
+        for address in addresses:
+            cached_coordinates = PostcodeCoordinates.objects.lookup(address.postcode)
+            if cached_coordinates:
+                coordinates[address.geocoding_text()] = cached_coordinates
+        uncached_addresses = {address.geocoding_text() for address in addresses} - coordinates.keys()
+        geocoded = get_geocoder().geocode_batch(sorted(uncached_addresses), max_workers=self.max_workers)
+        coordinates.update(geocoded)
+
+        updated_addresses = []
+        with transaction.atomic():
+            for address in addresses:
+                text = address.geocoding_text()
+                if coordinates.get(text):
+                    latitude, longitude = coordinates[text]
+                    if text in geocoded:
+                        PostcodeCoordinates.objects.store(address.postcode, latitude, longitude)
+                    updates = {'latitude': latitude, 'longitude': longitude, 'geohash': encode(latitude, longitude),
+                               'geocoding_status': 'resolved'}
+                elif text in coordinates:
+                    attempts = address.geocode_attempts + 1
+                    updates = {'geocode_attempts': attempts,
+                               'geocoding_status': 'failed' if attempts >= self.max_attempts else 'pending'}
+                else:
+                    result['pending'] += 1
+                    continue
+                # applied only if the address has not been edited since it was retrieved
+                updated = (model.objects.filter(pk=address.pk, geocoding_status='pending',
+                                                geocode_attempts=address.geocode_attempts,
+                                                address_line_one=address.address_line_one,
+                                                city_or_town=address.city_or_town,
+                                                county=address.county,
+                                                postcode=address.postcode)
+                                        .update(**updates))
+                if updated:
+                    result[updates['geocoding_status']] += 1
+                    updated_addresses.append(address)
+            if updated_addresses:
+                self.invalidate_cached_data(model, updated_addresses)
+        return result
+
+    def invalidate_cached_data(self, model, addresses):
+        """
+        Invalidates the data cached from addresses the worker has updated, since QuerySet.update does not send post_save.
+
+        Args:
+            model (class): UserAddress or EventsActivities.
+            addresses (list): the updated model instances.
+        """
+        if model is UserAddress:
+            invalidate_sections([address.user_profile_id for address in addresses], ['profile'])
+        else:
+            events_updated.send(sender=model, event_ids=[address.pk for address in addresses])
+
+    def run(self, interval=10, log=print):
+        """
+        Resolves batches of pending addresses, waiting an interval whenever none were resolved or failed.
+
+        Args:
+            interval (int): the number of seconds to wait between polls for pending addresses.
+            log (function): called with a summary of each batch.
+        """
+        while True:
+            result = self.resolve_pending()
+            if result['resolved'] or result['failed']:
+                log(f'Addresses geocoded: {result}')
+            else:
+                time.sleep(interval)
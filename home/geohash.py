@@ -0,0 +1,119 @@
+"""
+Geohash encoding of coordinates, used to index the locations of user addresses and events.
+
+A geohash names a cell of a grid over the earth, and every further character subdivides the cell into 32. The geohashes
+of nearby locations therefore share a prefix, so the locations within a cell can be found with an index range seek on a
+geohash column, on any database.
+"""
+from math import cos, radians
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# the precision stored for a location, a cell of roughly 150m by 150m
+GEOHASH_PRECISION = 7
+# the most cells a proximity query is expanded to, each looked up with an index range seek
+MAX_COVERING_CELLS = 36
+KM_PER_DEGREE = 111.195
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Returns the geohash of the cell containing a location.
+
+    Args:
+        latitude (float): latitude of the location in degrees.
+        longitude (float): longitude of the location in degrees.
+        precision (int): the number of characters of the geohash.
+
+    Returns:
+        The geohash string, or None if either coordinate is missing.
+    """
+    if latitude is None or longitude is None:
+        return None
+    latitude, longitude = float(latitude), float(longitude)
+    latitude_range, longitude_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    value = 0
+    even_bit = True
+    while len(geohash) < precision:
+        # bits alternate between bisecting the longitude and latitude ranges, starting with longitude
+        coordinate, coordinate_range = (longitude, longitude_range) if even_bit else (latitude, latitude_range)
+        middle = (coordinate_range[0] + coordinate_range[1]) / 2
+        if coordinate >= middle:
+            value = value * 2 + 1
+            coordinate_range[0] = middle
+        else:
+            value = value * 2
+            coordinate_range[1] = middle
+        even_bit = not even_bit
+        bits += 1
+        if bits == 5:
+            geohash.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(geohash)
+
+
+def cell_size(precision):
+    """
+    Returns the (height, width) in degrees of the cells of a geohash precision.
+
+    Args:
+        precision (int): the number of characters of the geohash.
+    """
+    longitude_bits = (5 * precision + 1) // 2
+    latitude_bits = 5 * precision // 2
+    return 180.0 / 2 ** latitude_bits, 360.0 / 2 ** longitude_bits
+
+
+def covering_cells(latitude, longitude, distance):
+    """
+    Returns geohash prefixes whose cells together cover every location within a distance of a point.
+
+    Expands from the cell containing the point to its neighbouring cells, as many as span the bounding box of the distance,
+    at the finest precision needing no more than MAX_COVERING_CELLS cells.
+
+    Args:
+        latitude (float): latitude of the point in degrees.
+        longitude (float): longitude of the point in degrees.
+        distance (float): the distance from the point in km.
+
+    Returns:
+        A list of geohash prefixes, or None if the distance is too large to be covered by a bounded number of cells.
+    """
+    latitude, longitude = float(latitude), float(longitude)
+    latitude_delta = distance / KM_PER_DEGREE
+    if abs(latitude) + latitude_delta >= 90.0:
+        return None
+    # a degree of longitude shrinks with the cosine of the latitude; the box is widened to its edge nearest a pole
+    longitude_delta = distance / (KM_PER_DEGREE * cos(radians(abs(latitude) + latitude_delta)))
+    if longitude_delta >= 180.0:
+        return None
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        # the rows and columns of the grid of cells spanned by the bounding box
+        first_row = int((latitude - latitude_delta + 90.0) // height)
+        last_row = int((latitude + latitude_delta + 90.0) // height)
+        first_column = int((longitude - longitude_delta + 180.0) // width)
+        last_column = int((longitude + longitude_delta + 180.0) // width)
+        if (last_row - first_row + 1) * (last_column - first_column + 1) <= MAX_COVERING_CELLS:
+            cells = []
+            for row in range(first_row, last_row + 1):
+                for column in range(first_column, last_column + 1):
+                    # encoded from the centre of the cell, with longitudes wrapping around the antimeridian
+                    cell = encode((row + 0.5) * height - 90.0, ((column + 0.5) * width) % 360.0 - 180.0, precision)
+                    if cell not in cells:
+                        cells.append(cell)
+            return cells
+    return None
+
+
+def prefix_range(prefix):
+    """
+    Returns the (lowest, highest) bounds of the geohashes starting with a prefix, for an index range lookup.
+
+    Args:
+        prefix (str): a geohash prefix.
+    """
+    # every geohash starting with the prefix sorts before the prefix padded with the last base32 character
+    return prefix, prefix + BASE32[-1] * (GEOHASH_PRECISION - len(prefix))
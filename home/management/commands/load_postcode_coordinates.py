@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from home.models import PostcodeCoordinates
+
+
+class Command(BaseCommand):
+    """
+    Bulk loads a postcode dump into the postcode cache, so that addresses with those postcodes are geocoded locally.
+    """
+    help = 'Loads postcode coordinates from a CSV file with postcode, latitude and longitude columns.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path of the CSV file.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Number of rows inserted per query.')
+
+    def handle(self, *args, **options):
+        with open(options['csv_path'], newline='', encoding='utf-8') as csv_file:
+            loaded = PostcodeCoordinates.objects.load_csv(csv_file, batch_size=options['batch_size'])
+        self.stdout.write(f'Postcodes loaded: {loaded}')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from home.geocoder_stub import StubGeocoderServer
+
+
+class Command(BaseCommand):
+    """
+    Runs a local stand-in for the Geoapify geocoding API, for load testing the profile save path without network access.
+
+    Start the development server with the GEOCODER_URL environment variable set to the printed URL, and
+    GEOAPIFY_API_KEY set to any value.
+    """
+    help = 'Serves stub geocoding API responses on a local port.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Host to listen on.')
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on.')
+        parser.add_argument('--latency', type=float, default=0, help='Seconds each response is delayed by.')
+        parser.add_argument('--verbose-requests', action='store_true', help='Log each request.')
+
+    def handle(self, *args, **options):
+        server = StubGeocoderServer((options['host'], options['port']), latency=options['latency'],
+                                    verbose=options['verbose_requests'])
+        self.stdout.write(f'Stub geocoder serving at {server.url}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Stub geocoder stopped.')
+        finally:
+            server.server_close()
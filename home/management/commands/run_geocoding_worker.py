@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from home.geocoding import GeocodingWorker
+
+
+class Command(BaseCommand):
+    """
+    Runs the geocoding worker, which resolves the coordinates of the user addresses and events saved with pending
+    coordinates.
+    """
+    help = 'Resolves the pending coordinates of user addresses and events in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=10,
+                            help='Number of seconds between polls for pending addresses.')
+        parser.add_argument('--batch-size', type=int, default=50, help='Number of addresses of each model resolved per batch.')
+        parser.add_argument('--workers', type=int, default=4, help='Number of concurrent geocoder requests.')
+        parser.add_argument('--once', action='store_true',
+                            help='Resolve a single batch and exit, for running from a periodic job.')
+
+    def handle(self, *args, **options):
+        worker = GeocodingWorker(batch_size=options['batch_size'], max_workers=options['workers'])
+        if options['once']:
+            result = worker.resolve_pending()
+            self.stdout.write(f'Addresses geocoded: {result}')
+            return
+        try:
+            worker.run(interval=options['interval'], log=self.stdout.write)
+        except KeyboardInterrupt:
+            self.stdout.write('Geocoding worker stopped.')
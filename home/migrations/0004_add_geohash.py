@@ -0,0 +1,36 @@
+# Generated by Django 4.1 on 2026-10-18 08:06
+
+from django.db import migrations, models
+from home.geohash import encode
+
+
+def populate_address_geohashes(apps, schema_editor):
+    """
+    Sets the geohash of the existing user addresses from their coordinates.
+    """
+    UserAddress = apps.get_model('home', 'UserAddress')
+    addresses = []
+    for instance in UserAddress.objects.exclude(latitude=None).exclude(longitude=None).only('latitude', 'longitude').iterator():
+        instance.geohash = encode(instance.latitude, instance.longitude)
+        addresses.append(instance)
+    UserAddress.objects.bulk_update(addresses, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0003_alter_useraddress_options_alter_userprofile_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useraddress',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=7, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='useraddress',
+            index=models.Index(fields=['geohash'], name='address_geohash_idx'),
+        ),
+        migrations.RunPython(populate_address_geohashes, migrations.RunPython.noop),
+    ]
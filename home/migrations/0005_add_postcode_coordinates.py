@@ -0,0 +1,32 @@
+# Generated by Django 4.1 on 2026-10-18 08:15
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0004_add_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostcodeCoordinates',
+            fields=[
+                ('postcode', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('latitude', models.DecimalField(decimal_places=4, max_digits=8, validators=[django.core.validators.DecimalValidator(8, 4)])),
+                ('longitude', models.DecimalField(decimal_places=4, max_digits=8, validators=[django.core.validators.DecimalValidator(8, 4)])),
+                ('expires', models.DateTimeField(blank=True, null=True)),
+                ('last_used', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Postcode Coordinates',
+                'verbose_name_plural': 'Postcode Coordinates',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postcodecoordinates',
+            index=models.Index(fields=['expires', 'last_used'], name='postcode_expires_used_idx'),
+        ),
+    ]
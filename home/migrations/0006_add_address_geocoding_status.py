@@ -0,0 +1,47 @@
+# Generated by Django 4.1 on 2026-10-18 08:21
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def resolve_existing_addresses(apps, schema_editor):
+    """
+    Marks the coordinates of the existing user addresses, which were geocoded when saved, as resolved.
+    """
+    UserAddress = apps.get_model('home', 'UserAddress')
+    UserAddress.objects.exclude(latitude=None).update(geocoding_status='resolved')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0005_add_postcode_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useraddress',
+            name='geocode_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='geocode attempts'),
+        ),
+        migrations.AddField(
+            model_name='useraddress',
+            name='geocoding_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('resolved', 'Resolved'), ('failed', 'Failed')], default='pending', editable=False, max_length=8, verbose_name='geocoding status'),
+        ),
+        migrations.AlterField(
+            model_name='useraddress',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=8, null=True, validators=[django.core.validators.DecimalValidator(8, 4)]),
+        ),
+        migrations.AlterField(
+            model_name='useraddress',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=8, null=True, validators=[django.core.validators.DecimalValidator(8, 4)]),
+        ),
+        migrations.AddIndex(
+            model_name='useraddress',
+            index=models.Index(condition=models.Q(('geocoding_status', 'pending')), fields=['geocode_attempts'], name='address_pending_geocoding_idx'),
+        ),
+        migrations.RunPython(resolve_existing_addresses, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,17 @@
 import re
+import csv
+from math import cos, radians
+from datetime import datetime, timedelta
 from django.db import models
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
 from django.core.validators import (RegexValidator,
                                     MaxLengthValidator,
                                     DecimalValidator)
 from landing_page.models import CustomUserModel
+from .geohash import GEOHASH_PRECISION, covering_cells, encode, prefix_range
+
+EARTH_RADIUS_KM = 6371.0088
 
 # Create your models here.
 
@@ -47,6 +55,43 @@ class ProfileMixin(models.Model):
         return field_data
 
 
+class ProximityQuerySet(models.QuerySet):
+    """
+    QuerySet for models with latitude, longitude and geohash fields, providing proximity queries.
+    """
+    def within_distance(self, latitude, longitude, distance):
+        """
+        Filters to the rows located within a distance of a point, annotated with their distance in km as 'distance'.
+
+        Candidates are first pruned to the geohash cells covering the distance, using index range seeks on the geohash
+        field. The exact great circle distance is then computed by the database for the remaining candidates only, using
+        the haversine formula.
+
+        The cells are looked up in a subquery, so that the geohash index is used whichever other filters are applied.
+
+        Args:
+            latitude (float): latitude of the point in degrees.
+            longitude (float): longitude of the point in degrees.
+            distance (float): the maximum distance from the point in km.
+        """
+        latitude, longitude = float(latitude), float(longitude)
+        queryset = self
+        cells = covering_cells(latitude, longitude, distance)
+        if cells is not None:
+            cell_filter = Q()
+            for cell in cells:
+                cell_filter |= Q(geohash__range=prefix_range(cell))
+            queryset = queryset.filter(pk__in=self.model._default_manager.filter(cell_filter).values('pk'))
+
+        row_latitude = Radians(Cast('latitude', FloatField()))
+        row_longitude = Radians(Cast('longitude', FloatField()))
+        half_chord = (Power(Sin((row_latitude - Value(radians(latitude))) / 2), 2)
+                      + Cos(row_latitude) * Value(cos(radians(latitude)))
+                      * Power(Sin((row_longitude - Value(radians(longitude))) / 2), 2))
+        return (queryset.annotate(distance=Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(half_chord)))
+                        .filter(distance__lte=distance))
+
+
 class UserProfile(ProfileMixin):
     """
     User profile model to store registered user personal information.
@@ -109,10 +154,16 @@ class UserAddress(ProfileMixin):
         postcode (character field): UK postcode for user's address
         latitude (decimal field): latitude of the user's address
         longitude (text field): longitude of user's address
+        geohash (character field): geohash of the user's address coordinates, indexed for proximity queries.
+        geocoding_status (character field): whether the coordinates are pending, resolved, or failed to be resolved.
+        geocode_attempts (positive small integer field): the number of times the address has been geocoded without a result.
     """
     class Meta:
         verbose_name = 'User Address'
         verbose_name_plural = 'User Addresses'
+        indexes = [models.Index(fields=['geohash'], name='address_geohash_idx'),
+                   models.Index(fields=['geocode_attempts'], name='address_pending_geocoding_idx',
+                                condition=Q(geocoding_status='pending'))]
 
     user_profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE,
                                         to_field='user', primary_key=True,
@@ -147,15 +198,210 @@ class UserAddress(ProfileMixin):
                                                            message="Must be a valid postcode format."),
                                             MaxLengthValidator(10)])
 
+    # null while the coordinates are pending, until they are resolved by the geocoding worker.
     latitude = models.DecimalField(max_digits=8, decimal_places=4,
-                                   blank=False,
+                                   blank=True, null=True,
                                    validators=[DecimalValidator(8, 4)])
 
     longitude = models.DecimalField(max_digits=8, decimal_places=4,
-                                    blank=False,
+                                    blank=True, null=True,
                                     validators=[DecimalValidator(8, 4)])
 
+    # set from the coordinates whenever the address is saved
+    geohash = models.CharField(max_length=GEOHASH_PRECISION, blank=True, null=True, editable=False)
+
+    GEOCODING_STATUSES = [('pending', 'Pending'), ('resolved', 'Resolved'), ('failed', 'Failed')]
+
+    geocoding_status = models.CharField(max_length=8, choices=GEOCODING_STATUSES, default='pending', editable=False,
+                                        verbose_name='geocoding status')
+
+    geocode_attempts = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='geocode attempts')
+
     def __str__(self):
         return str(self.user_profile)
 
-    objects = models.Manager()
\ No newline at end of file
+    def save(self, *args, **kwargs):
+        self.geohash = encode(self.latitude, self.longitude)
+        # an address with coordinates is resolved, and one whose coordinates have been cleared is pending again
+        if self.geohash:
+            self.geocoding_status = 'resolved'
+        elif self.geocoding_status == 'resolved':
+            self.geocoding_status = 'pending'
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'geohash', 'geocoding_status'}
+        super().save(*args, **kwargs)
+
+    def geocoding_text(self):
+        """
+        Returns:
+            The address as the comma separated terms sent to the geocoder.
+        """
+        return ', '.join([self.address_line_one, self.city_or_town, self.county, self.postcode])
+
+    objects = ProximityQuerySet.as_manager()
+
+
+class PostcodeCache(models.Manager):
+    """
+    Model manager for the PostcodeCoordinates model, used to geocode addresses by postcode without an API request.
+
+    Coordinates geocoded by the API are cached for a limited time, and only the most recently used are kept. Coordinates
+    bulk loaded from a postcode dump never expire and are never evicted.
+
+    Attributes:
+        ttl (timedelta): how long geocoded coordinates are cached for.
+        max_entries (int): the most geocoded coordinates cached, beyond which the least recently used are evicted.
+    """
+    ttl = timedelta(days=90)
+    max_entries = 100000
+
+    @staticmethod
+    def normalise(postcode):
+        """
+        Returns a postcode in the form it is cached under, lower case without spaces.
+
+        Args:
+            postcode (str): a UK postcode.
+        """
+        return re.sub(r'\s+', '', postcode).lower()
+
+    @staticmethod
+    def current_time(now=None):
+        """
+        Returns the given time, or otherwise the current time to the minute.
+        """
+        if not now:
+            current_date_time = datetime.now().strftime("%H:%M, %d/%m/%y")
+            now = datetime.strptime(current_date_time, "%H:%M, %d/%m/%y")
+        return now
+
+    def lookup(self, postcode, now=None):
+        """
+        Returns the cached coordinates of a postcode, marking them as used.
+
+        Args:
+            postcode (str): a UK postcode.
+            now (datetime): the time to compare the expiry against. Defaults to the current time.
+
+        Returns:
+            A (latitude, longitude) tuple of decimals, or None if the postcode is not cached or its coordinates have expired.
+        """
+        now = self.current_time(now)
+        entries = self.filter(Q(expires=None) | Q(expires__gt=now), postcode=self.normalise(postcode))
+        coordinates = entries.values_list('latitude', 'longitude').first()
+        if coordinates:
+            entries.exclude(expires=None).update(last_used=now)
+        return coordinates
+
+    def lookup_many(self, postcodes, now=None):
+        """
+        Returns the cached coordinates of a number of postcodes, marking them as used, with a single query.
+
+        Args:
+            postcodes (iterable): UK postcodes.
+            now (datetime): the time to compare the expiry against. Defaults to the current time.
+
+        Returns:
+            A dictionary of normalised postcode-(latitude, longitude) pairs, of the postcodes cached and unexpired.
+        """
+        now = self.current_time(now)
+        entries = self.filter(Q(expires=None) | Q(expires__gt=now), postcode__in={self.normalise(postcode) for postcode in postcodes})
+        coordinates = {postcode: (latitude, longitude) for postcode, latitude, longitude
+                       in entries.values_list('postcode', 'latitude', 'longitude')}
+        if coordinates:
+            entries.exclude(expires=None).update(last_used=now)
+        return coordinates
+
+    def store(self, postcode, latitude, longitude, now=None):
+        """
+        Caches the coordinates geocoded for a postcode, then evicts the expired and least recently used coordinates.
+
+        Args:
+            postcode (str): a UK postcode.
+            latitude (float): latitude of the postcode in degrees.
+            longitude (float): longitude of the postcode in degrees.
+            now (datetime): the time the coordinates were geocoded. Defaults to the current time.
+        """
+        now = self.current_time(now)
+        self.update_or_create(postcode=self.normalise(postcode),
+                              defaults={'latitude': round(float(latitude), 4), 'longitude': round(float(longitude), 4),
+                                        'expires': now + self.ttl, 'last_used': now})
+        self.evict(now)
+
+    def evict(self, now=None):
+        """
+        Deletes the expired geocoded coordinates, and the least recently used beyond max_entries.
+
+        Args:
+            now (datetime): the time to compare the expiry against. Defaults to the current time.
+        """
+        now = self.current_time(now)
+        self.filter(expires__lte=now).delete()
+        geocoded = self.exclude(expires=None)
+        excess = geocoded.count() - self.max_entries
+        if excess > 0:
+            self.filter(pk__in=list(geocoded.order_by('last_used').values_list('pk', flat=True)[:excess])).delete()
+
+    def load_csv(self, csv_file, batch_size=10000):
+        """
+        Bulk loads the coordinates of a postcode dump, replacing any cached coordinates of the same postcodes.
+
+        Args:
+            csv_file (obj): an open text file of CSV rows with postcode, latitude and longitude columns, and a header row.
+            batch_size (int): the number of rows inserted per query.
+
+        Returns:
+            The number of postcodes loaded. Rows without coordinates are skipped.
+        """
+        loaded = 0
+        batch = []
+        for row in csv.DictReader(csv_file):
+            row = {column.strip().lower(): value.strip() for column, value in row.items() if column}
+            if not row.get('postcode') or not row.get('latitude') or not row.get('longitude'):
+                continue
+            batch.append(PostcodeCoordinates(postcode=self.normalise(row['postcode']),
+                                             latitude=round(float(row['latitude']), 4),
+                                             longitude=round(float(row['longitude']), 4)))
+            if len(batch) == batch_size:
+                loaded += self._load_batch(batch)
+                batch = []
+        return loaded + self._load_batch(batch)
+
+    def _load_batch(self, batch):
+        self.bulk_create(batch, update_conflicts=True, unique_fields=['postcode'],
+                         update_fields=['latitude', 'longitude', 'expires', 'last_used'])
+        return len(batch)
+
+
+class PostcodeCoordinates(models.Model):
+    """
+    Model caching the coordinates of UK postcodes, so that addresses can be geocoded locally.
+
+    Attributes:
+        postcode (character field): normalised postcode, lower case without spaces.
+        latitude (decimal field): latitude of the postcode.
+        longitude (decimal field): longitude of the postcode.
+        expires (datetime field): when coordinates geocoded by the API expire. Null for coordinates loaded from a postcode dump.
+        last_used (datetime field): when geocoded coordinates were last looked up, for least recently used eviction.
+    """
+    class Meta:
+        verbose_name = 'Postcode Coordinates'
+        verbose_name_plural = 'Postcode Coordinates'
+        indexes = [models.Index(fields=['expires', 'last_used'], name='postcode_expires_used_idx')]
+
+    postcode = models.CharField(max_length=10, primary_key=True)
+
+    latitude = models.DecimalField(max_digits=8, decimal_places=4,
+                                   validators=[DecimalValidator(8, 4)])
+
+    longitude = models.DecimalField(max_digits=8, decimal_places=4,
+                                    validators=[DecimalValidator(8, 4)])
+
+    expires = models.DateTimeField(blank=True, null=True)
+
+    last_used = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return self.postcode
+
+    objects = PostcodeCache()
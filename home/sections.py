@@ -0,0 +1,274 @@
+"""
+Rendering and caching of the homepage sections: the profile, the post events section and the search and view events
+section, along with the edit profile and post events modals.
+
+The sections are rendered by HomepageSections, which is used directly by both the homepage and the fetch endpoints
+refreshing its modals, so that each request checks the user's email verification once, in the view handling it, and
+retrieves the user's profile and address at most once.
+
+Each section's data is cached in the profile cache under the username of its user and a version counter, which is bumped
+by the signals in home.signals whenever a change affects what the section shows that user. The event sections are also
+cached only until the next of their events passes its closing date or date, as the statuses they are listed under are
+derived from the current time rather than stored.
+"""
+import time
+from datetime import datetime
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils.functional import cached_property
+from eventabase.caching import profile_cache
+from events_and_activities.forms import EventsActivitiesForm
+from events_and_activities.fragments import render_event_cards
+from events_and_activities.models import EventsActivities, Engagement
+from .forms import EditAddress, EditPersonalInfo
+from .models import UserAddress, UserProfile
+
+SECTIONS = ['profile', 'post_events', 'search_view_events']
+EVENT_DATE_FORMAT = "%H:%M, %d/%m/%y"
+
+
+def version_key(section, username):
+    return f'section_version:{section}:{username}'
+
+
+def section_key(section, username, version):
+    return f'section:{section}:{username}:{version}'
+
+
+def new_version():
+    """
+    Returns:
+        A version number greater than any a section could have reached before, for sections whose version is not cached,
+        so that data cached under an evicted version is never used again.
+    """
+    return time.time_ns()
+
+
+def bump_section_version(section, username):
+    """
+    Invalidates the cached data of a user's section, by bumping its version.
+
+    Args:
+        section (str): the section, one of SECTIONS.
+        username (str): the username of the user.
+    """
+    try:
+        profile_cache.incr(version_key(section, username))
+    except ValueError:
+        profile_cache.set(version_key(section, username), new_version(), None)
+
+
+def invalidate_sections(usernames, sections):
+    """
+    Invalidates the cached data of sections for each of a set of users straight away, and again once the current
+    transaction commits, so that data retrieved by concurrent requests before the commit is not reused.
+
+    Args:
+        usernames (iterable): the usernames of the users.
+        sections (list): the sections to invalidate, from SECTIONS.
+    """
+    usernames = set(usernames)
+
+    def bump_versions():
+        for username in usernames:
+            for section in sections:
+                bump_section_version(section, username)
+
+    bump_versions()
+    transaction.on_commit(bump_versions)
+
+
+def section_version(section, username):
+    """
+    Returns:
+        The current version of a user's section.
+    """
+    version = profile_cache.get(version_key(section, username))
+    if version is None:
+        profile_cache.add(version_key(section, username), new_version(), None)
+        version = profile_cache.get(version_key(section, username))
+    return version
+
+
+def cached_section(user, section, compute, timeout=None):
+    """
+    Returns the cached data of a user's section, computing and caching it if its current version is not cached.
+
+    Args:
+        user (obj): a CustomUserModel model instance.
+        section (str): the section, one of SECTIONS.
+        compute (callable): called without arguments to compute the section data.
+        timeout (int or callable): as for NamespacedCache.get_or_set. Defaults to the profile cache timeout.
+    """
+    key = section_key(section, user.username, section_version(section, user.username))
+    if timeout is None:
+        return profile_cache.get_or_set(key, compute)
+    return profile_cache.get_or_set(key, compute, timeout)
+
+
+def events_data_timeout(events_data, now=None):
+    """
+    Returns the number of seconds a section's events data can be cached for, before one of its events changes status.
+
+    Args:
+        events_data (dict): lists of (event data, attendee count) tuples keyed by status, as retrieved for the event templates.
+        now (datetime): the current time. Defaults to datetime.now().
+
+    Returns:
+        The seconds until the next closing date or date of the events, no more than the profile cache timeout and no less than 1.
+    """
+    if now is None:
+        now = datetime.now()
+    timeout = profile_cache.timeout
+    for status_events_data in events_data.values():
+        for event_data, _ in status_events_data:
+            for field_name in ['closing date', 'when']:
+                status_change = datetime.strptime(event_data[field_name], EVENT_DATE_FORMAT)
+                if status_change > now:
+                    timeout = min(timeout, (status_change - now).total_seconds())
+    return max(int(timeout), 1)
+
+
+class HomepageSections():
+    """
+    Renders the sections and modals of a user's homepage, from their data cached per section.
+
+    Attributes:
+        request (obj): the request the sections are rendered for, by a view that has checked the user's email verification.
+        user (obj): the user the sections are rendered for.
+        hidden_address_fields (list): the verbose names of the address fields not displayed in the profile.
+    """
+    profile_template = get_template('home/profile.html')
+    edit_profile_modal_template = get_template('home/edit_profile_modal.html')
+    post_events_section_template = get_template('events_and_activities/post_section.html')
+    post_events_modal_template = get_template('events_and_activities/post_events_modal.html')
+    search_view_events_section_template = get_template('events_and_activities/search_view_events.html')
+    hidden_address_fields = ['user profile', 'latitude', 'longitude', 'geohash', 'geocoding status', 'geocode attempts']
+
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+
+    def retrieve_profile_data(self):
+        """
+        Retrieves the data displayed in the user's profile, and used to prepopulate their edit profile form, retrieving
+        their profile and address with a single query.
+
+        Returns:
+            A dictionary of whether it is the user's first login, their profile and address data for display, and the
+            initial data of their personal info and address forms.
+        """
+        user_profile = UserProfile.objects.select_related('user', 'address').filter(user=self.user).first()
+        user_address = None
+        if user_profile:
+            try:
+                user_address = user_profile.address
+            except UserAddress.DoesNotExist:
+                # a user with a profile will have an address as well, since both are created at the same time using the
+                # same form submission.
+                pass
+            user_profile_data = user_profile.retrieve_field_data()
+            user_profile_data['date of birth'] = user_profile_data['date of birth'].strftime('%d/%m/%Y')
+            personal_info_initial = {field_name: value for field_name, value in user_profile.retrieve_field_data(False).items()
+                                     if field_name in EditPersonalInfo.base_fields}
+            personal_info_initial['date_of_birth'] = personal_info_initial['date_of_birth'].strftime('%d/%m/%Y')
+        else:
+            user_profile_data = {key: '' for key in UserProfile.retrieve_field_names()}
+            personal_info_initial = {}
+        user_profile_data.pop('user')
+        user_profile_data.pop('address')
+
+        if user_address:
+            user_address_data = user_address.retrieve_field_data()
+            address_initial = {field_name: value for field_name, value in user_address.retrieve_field_data(False).items()
+                               if field_name in EditAddress.base_fields}
+        else:
+            user_address_data = {key: '' for key in UserAddress.retrieve_field_names()}
+            address_initial = {}
+        for field in self.hidden_address_fields:
+            user_address_data.pop(field)
+
+        return {'first_login': user_profile is None,
+                'user_profile_data': user_profile_data,
+                'user_address_data': user_address_data,
+                'personal_info_initial': personal_info_initial,
+                'address_initial': address_initial}
+
+    @cached_property
+    def profile(self):
+        """
+        The profile data of the user, as returned by retrieve_profile_data, from the cache if it is unchanged.
+        """
+        return cached_section(self.user, 'profile', self.retrieve_profile_data)
+
+    @property
+    def first_login(self):
+        return self.profile['first_login']
+
+    def modal_context(self, modal):
+        """
+        Returns:
+            The context shared by the modal templates.
+
+        Args:
+            modal (str): the id of the modal.
+        """
+        return {'first_login': self.first_login, 'modal': modal, 'username': self.user.username,
+                'button1_name': 'Done', 'button2_name': 'Cancel'}
+
+    def render_profile(self):
+        """
+        Returns:
+            The rendered profile.
+        """
+        return self.profile_template.render({'user_profile_data': self.profile['user_profile_data'].items(),
+                                             'user_address_data': self.profile['user_address_data'].items()})
+
+    def render_edit_profile_modal(self):
+        """
+        Returns:
+            The rendered edit profile modal, with its forms prepopulated from the user's profile and address, if they have one.
+        """
+        context = self.modal_context('edit_profile_modal')
+        context.update({'personal_info_form': EditPersonalInfo(initial=self.profile['personal_info_initial']),
+                        'address_form': EditAddress(initial=self.profile['address_initial'])})
+        return self.edit_profile_modal_template.render(context, self.request)
+
+    def render_post_events_section(self):
+        """
+        Returns:
+            The rendered post events section, listing the user's advertised and upcoming hosted events, along with their
+            attendee counts.
+        """
+        hosting_events_data = cached_section(self.user, 'post_events',
+                                             lambda: EventsActivities.hosting_events.retrieve_events_data(self.user),
+                                             events_data_timeout)
+        context = {'upcoming_hosting_events_data': hosting_events_data['confirmed'],
+                   'advertised_hosting_events_data': hosting_events_data['advertised'],
+                   'upcoming_hosting_cards': render_event_cards(hosting_events_data['confirmed'], 'upcoming'),
+                   'advertised_hosting_cards': render_event_cards(hosting_events_data['advertised'], 'advertised')}
+        return self.post_events_section_template.render(context, self.request)
+
+    def render_post_events_modal(self):
+        """
+        Returns:
+            The rendered post events modal, with a blank post events form.
+        """
+        context = self.modal_context('post_events_modal')
+        context.update({'post_events_form': EventsActivitiesForm()})
+        return self.post_events_modal_template.render(context, self.request)
+
+    def render_search_view_events_section(self):
+        """
+        Returns:
+            The rendered search and view events section, listing the user's interested and upcoming events, along with
+            their attendee counts.
+        """
+        engaged_events_data = cached_section(self.user, 'search_view_events',
+                                             lambda: Engagement.engaged_events.retrieve_events_data(self.user),
+                                             events_data_timeout)
+        context = {'interested_events_data': engaged_events_data['In'],
+                   'upcoming_events_data': engaged_events_data['Att'],
+                   'interested_cards': render_event_cards(engaged_events_data['In'], 'interested'),
+                   'upcoming_cards': render_event_cards(engaged_events_data['Att'], 'attending')}
+        return self.search_view_events_section_template.render(context, self.request)
@@ -0,0 +1,120 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from events_and_activities.models import EventsActivities, Engagement, events_updated
+from events_and_activities.signals import events_being_deleted
+from .models import UserAddress, UserProfile
+from .sections import invalidate_sections
+
+
+def event_audience(event_id):
+    """
+    Returns:
+        A (host username, engaged usernames) tuple for an event, whose homepage sections list it. The host username is
+        None if the event does not exist.
+
+    Args:
+        event_id (int): the id of the event.
+    """
+    host_username = None
+    engaged_usernames = set()
+    for host_user, engaged_user in EventsActivities.objects.filter(id=event_id).values_list('host_user', 'engagement__user'):
+        host_username = host_user
+        if engaged_user is not None:
+            engaged_usernames.add(engaged_user)
+    return host_username, engaged_usernames
+
+
+def invalidate_event_sections(event_id, host_username=None, engaged_usernames=()):
+    """
+    Invalidates the cached event sections of the host of an event and of the users engaged with it, since its details
+    and attendee count are listed in both.
+
+    Args:
+        event_id (int): the id of the event.
+        host_username (str): the username of the host, if the event no longer exists to look it up.
+        engaged_usernames (iterable): the usernames of users no longer engaged with the event.
+    """
+    current_host_username, current_engaged_usernames = event_audience(event_id)
+    invalidate_sections({host_username or current_host_username} - {None}, ['post_events'])
+    invalidate_sections(current_engaged_usernames | set(engaged_usernames), ['search_view_events'])
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_profile_section(sender, instance, **kwargs):
+    """
+    Invalidates the cached profile section of a user whose profile is created, updated or deleted.
+    """
+    invalidate_sections([instance.user_id], ['profile'])
+
+
+@receiver([post_save, post_delete], sender=UserAddress)
+def invalidate_address_profile_section(sender, instance, **kwargs):
+    """
+    Invalidates the cached profile section of a user whose address is created, updated or deleted.
+    """
+    invalidate_sections([instance.user_profile_id], ['profile'])
+
+
+@receiver(post_save, sender=EventsActivities)
+def invalidate_changed_event_sections(sender, instance, **kwargs):
+    """
+    Invalidates the cached event sections listing a created or updated event.
+    """
+    invalidate_event_sections(instance.id, host_username=instance.host_user_id)
+
+
+@receiver(events_updated, sender=EventsActivities)
+def invalidate_updated_events_sections(sender, event_ids, **kwargs):
+    """
+    Invalidates the cached event sections listing events updated in bulk.
+    """
+    for event_id in event_ids:
+        invalidate_event_sections(event_id)
+
+
+@receiver(pre_delete, sender=EventsActivities)
+def retrieve_deleted_event_audience(sender, instance, **kwargs):
+    """
+    Retrieves the engaged users of an event about to be deleted, whose sections are invalidated once it is, in a single
+    query rather than as each of its engagements is deleted.
+    """
+    instance.deleted_event_audience = event_audience(instance.id)[1]
+
+
+@receiver(post_delete, sender=EventsActivities)
+def invalidate_deleted_event_sections(sender, instance, **kwargs):
+    """
+    Invalidates the cached event sections of the host and engaged users of a deleted event.
+    """
+    invalidate_sections([instance.host_user_id], ['post_events'])
+    invalidate_sections(getattr(instance, 'deleted_event_audience', ()), ['search_view_events'])
+
+
+@receiver([post_save, post_delete], sender=Engagement)
+def invalidate_engaged_event_sections(sender, instance, **kwargs):
+    """
+    Invalidates the cached event sections listing an event whose engagements have changed, unless the event is being
+    deleted, whose sections are invalidated once it is.
+    """
+    if instance.event_id in events_being_deleted:
+        return
+    invalidate_event_sections(instance.event_id, engaged_usernames=[instance.user_id])
+
+
+@receiver(m2m_changed, sender=EventsActivities.attendees.through)
+def invalidate_attended_event_sections(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidates the cached event sections listing the events whose attendees are added or removed through the attendees
+    relation, which creates and deletes engagements without sending their post_save and post_delete signals.
+    """
+    if action not in ['post_add', 'post_remove', 'pre_clear']:
+        return
+    if not reverse:
+        if action == 'pre_clear':
+            pk_set = set(instance.engagement.values_list('user', flat=True))
+        invalidate_event_sections(instance.id, engaged_usernames=pk_set or ())
+    else:
+        if action == 'pre_clear':
+            pk_set = set(instance.engagement.values_list('event_id', flat=True))
+        for event_id in pk_set or ():
+            invalidate_event_sections(event_id, engaged_usernames=[instance.username])
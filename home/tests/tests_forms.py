@@ -1,9 +1,13 @@
+import io
 from datetime import date
-from unittest.mock import patch
-from django.test import TestCase
+from decimal import Decimal
+from django.conf import settings
+from django.test import TestCase, override_settings
 from landing_page.models import CustomUserModel
 from ..forms import EditAddress, EditPersonalInfo
-from ..models import UserAddress, UserProfile
+from ..geocoder_stub import StubGeocoderServer
+from ..geocoding import GeocodingWorker
+from ..models import PostcodeCoordinates, UserAddress, UserProfile
 
 
 class TestEditPersonalInfoForm(TestCase):
@@ -220,7 +224,18 @@ class TestEditAddressForm(TestCase):
                     'county': 'KENT',
                     'postcode': 'Rm26Bt'}
 
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # geocode addresses using a local stub geocoder
+        cls.geocoder_stub = StubGeocoderServer(results={'58 stanley avenue, gidea park, essex, rm26bt': (51.5811, 0.2059)}).start()
+        cls.addClassCleanup(cls.geocoder_stub.stop)
+        geocoder_settings = override_settings(GEOCODER={**settings.GEOCODER, 'URL': cls.geocoder_stub.url, 'API_KEY': 'stub'})
+        geocoder_settings.enable()
+        cls.addClassCleanup(geocoder_settings.disable)
+
     def setUp(self):
+        self.geocoder_stub.request_count = 0
         # create user
         username = 'taylor111'
         email = 'marktaylor@hotmail.com'
@@ -325,26 +340,59 @@ class TestEditAddressForm(TestCase):
             received = getattr(new_form.instance, field_name)
             self.assertEqual(received, value)
     
-    @patch('home.forms.requests')
-    def test_the_set_coordinates_method(self, mock_requests):
+    def test_pending_addresses_are_geocoded_by_the_geocoding_worker(self):
         """
-        Tests that the method works as expected.
+        Tests that an address saved with its coordinates pending is geocoded by the geocoding worker, the coordinates
+        obtained being cached, and that an address the geocoder has no result for is left without coordinates.
         """
-        url = 'https://api.geoapify.com/v1/geocode/search?text=58%20stanley%20avenue%2C%20gidea%20park%2C%20essex%2C%20rm26bt&lang=en&filter=countrycode:gb&format=json&apiKey=9ecb78e37e4c446a80037538de50e34b'
-        headers = {'Accept': 'application/json'}
         profile = UserProfile.objects.get(user__username='taylor111')
-        self.address.update({'user_profile': profile})
-        # create valid form from address dict
         new_form = EditAddress(data=self.address)
-        # check form is valid, as it should be using self.address
-        valid = new_form.is_valid()
-        self.assertTrue(valid)
+        self.assertTrue(new_form.is_valid())
+        new_form.post_clean_processing(user_profile=profile)
+        new_form.set_cached_coordinates()
+        new_form.save()
+        self.assertEqual(GeocodingWorker().resolve_pending(), {'resolved': 1, 'failed': 0, 'pending': 0})
+        self.assertEqual(self.geocoder_stub.request_count, 1)
+        address = UserAddress.objects.get(user_profile=profile)
+        self.assertEqual((address.latitude, address.longitude), (Decimal('51.5811'), Decimal('0.2059')))
+        self.assertEqual(PostcodeCoordinates.objects.lookup('RM2 6BT'), (Decimal('51.5811'), Decimal('0.2059')))
+        # an address the geocoder has no result for
+        new_form = EditAddress(data={**self.address, 'address_line_one': 'ffff', 'postcode': 'e1 6an'}, instance=address)
+        self.assertTrue(new_form.is_valid())
+        new_form.post_clean_processing(user_profile=profile)
+        new_form.set_cached_coordinates()
+        new_form.save()
+        self.geocoder_stub.known_addresses_only = True
+        try:
+            GeocodingWorker(max_attempts=1).resolve_pending()
+        finally:
+            self.geocoder_stub.known_addresses_only = False
+        address = UserAddress.objects.get(user_profile=profile)
+        self.assertEqual((address.latitude, address.geocoding_status), (None, 'failed'))
+
+    def test_the_set_cached_coordinates_method(self):
+        """
+        Tests that addresses are saved with cached postcode coordinates, or otherwise with their coordinates pending,
+        without a geocoder request.
+        """
+        profile = UserProfile.objects.get(user__username='taylor111')
+        new_form = EditAddress(data=self.address)
+        self.assertTrue(new_form.is_valid())
         new_form.post_clean_processing(user_profile=profile)
-        new_form.set_coordintes()
-        mock_requests.get.assert_called_once_with(url, headers=headers)
-        # default return_value of __float__ MagicMock object magic method is 1.0
-        self.assertEqual(new_form.instance.latitude, 1.0)
-        self.assertEqual(new_form.instance.longitude, 1.0)
+        new_form.set_cached_coordinates()
+        address = new_form.save()
+        self.assertEqual(address.geocoding_status, 'pending')
+        self.assertIsNone(address.latitude)
+        self.assertIsNone(address.geohash)
+        # a cached postcode
+        PostcodeCoordinates.objects.load_csv(io.StringIO('postcode,latitude,longitude\nRM2 6BT,51.5812,0.2058\n'))
+        new_form = EditAddress(data=self.address, instance=address)
+        self.assertTrue(new_form.is_valid())
+        new_form.set_cached_coordinates()
+        address = new_form.save()
+        self.assertEqual(address.geocoding_status, 'resolved')
+        self.assertEqual((address.latitude, address.longitude), (Decimal('51.5812'), Decimal('0.2058')))
+        self.assertEqual(self.geocoder_stub.request_count, 0)
 
     def test_address_form_instance_creation(self):
         """
@@ -360,7 +408,7 @@ class TestEditAddressForm(TestCase):
         valid = new_form.is_valid()
         self.assertTrue(valid)
         new_form.post_clean_processing(user_profile=profile)
-        new_form.set_coordintes()
+        new_form.set_cached_coordinates()
         # save the instance and check it now exits    
         new_form.save()
         self.assertTrue(UserAddress.objects.filter(user_profile=profile).exists())
@@ -372,7 +420,7 @@ class TestEditAddressForm(TestCase):
         profile = UserProfile.objects.get(user__username='taylor111')
         new_form = EditAddress(data=self.address)
         new_form.post_clean_processing(user_profile=profile)
-        new_form.set_coordintes()
+        new_form.set_cached_coordinates()
         new_form.save()
         # assert that the just created address instance exists
         self.assertTrue(UserAddress.objects.filter(user_profile=profile).exists())
@@ -382,7 +430,7 @@ class TestEditAddressForm(TestCase):
         valid = new_form.is_valid()
         self.assertTrue(valid)
         new_form.post_clean_processing(user_profile=profile)
-        new_form.set_coordintes()
+        new_form.set_cached_coordinates()
         new_form.save()
         self.assertTrue(UserAddress.objects.filter(user_profile=profile).exists())
         address = UserAddress.objects.get(user_profile=profile)
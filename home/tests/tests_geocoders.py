@@ -0,0 +1,136 @@
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from ..geocoder_stub import StubGeocoderServer
+from ..geocoders import CircuitBreaker, GeoapifyGeocoder, Geocoder, GeocodingError, get_geocoder
+
+
+class TestCircuitBreaker(SimpleTestCase):
+    """
+    Tests for the CircuitBreaker class.
+    """
+    def setUp(self):
+        self.time = 0
+        self.circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, slow_call_duration=2,
+                                              clock=lambda: self.time)
+
+    def test_circuit_opens_after_consecutive_failed_or_slow_calls(self):
+        """
+        Tests that the circuit opens after the threshold of consecutive failed or slow calls, but not for interleaved successes.
+        """
+        self.circuit_breaker.record_call(0.1, failed=True)
+        self.circuit_breaker.record_call(0.1)
+        self.circuit_breaker.record_call(0.1, failed=True)
+        self.assertTrue(self.circuit_breaker.allow_call())
+        # a successful but slow call
+        self.circuit_breaker.record_call(2.5)
+        self.assertTrue(self.circuit_breaker.is_open)
+        self.assertFalse(self.circuit_breaker.allow_call())
+
+    def test_circuit_allows_a_single_trial_call_after_the_reset_timeout(self):
+        """
+        Tests that once the reset timeout has passed a single trial call is allowed, which closes the circuit if it succeeds
+        and otherwise reopens it.
+        """
+        for _ in range(2):
+            self.circuit_breaker.record_call(0.1, failed=True)
+        self.time = 29
+        self.assertFalse(self.circuit_breaker.allow_call())
+        self.time = 30
+        self.assertTrue(self.circuit_breaker.allow_call())
+        self.assertFalse(self.circuit_breaker.allow_call())
+        self.circuit_breaker.record_call(0.1, failed=True)
+        self.assertFalse(self.circuit_breaker.allow_call())
+        self.time = 60
+        self.assertTrue(self.circuit_breaker.allow_call())
+        self.circuit_breaker.record_call(0.1)
+        self.assertFalse(self.circuit_breaker.is_open)
+        self.assertTrue(self.circuit_breaker.allow_call())
+
+
+class TestGeoapifyGeocoder(SimpleTestCase):
+    """
+    Tests for the GeoapifyGeocoder backend, using a local stub geocoder.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.geocoder_stub = StubGeocoderServer(results={'58 stanley avenue, gidea park, essex, rm26bt': (51.58113, 0.20587)},
+                                               known_addresses_only=True).start()
+        cls.addClassCleanup(cls.geocoder_stub.stop)
+
+    def setUp(self):
+        self.geocoder_stub.latency = 0
+        self.geocoder_stub.request_count = 0
+        self.geocoder_stub.connection_count = 0
+
+    def test_geocode(self):
+        """
+        Tests that addresses are geocoded to the coordinates of the first result, over a single reused connection.
+        """
+        geocoder = GeoapifyGeocoder(self.geocoder_stub.url, api_key='stub')
+        self.assertEqual(geocoder.geocode('58 Stanley Avenue, Gidea Park, Essex, RM26BT'), (51.5811, 0.2059))
+        self.assertIsNone(geocoder.geocode('ffff, ffff, ffff, rm26bt'))
+        self.assertEqual(geocoder.geocode('58 stanley avenue, gidea park, essex, rm26bt'), (51.5811, 0.2059))
+        self.assertEqual(self.geocoder_stub.request_count, 3)
+        self.assertEqual(self.geocoder_stub.connection_count, 1)
+        # no requests are made without an API key
+        with self.assertRaises(GeocodingError):
+            GeoapifyGeocoder(self.geocoder_stub.url).geocode('58 stanley avenue, gidea park, essex, rm26bt')
+        self.assertEqual(self.geocoder_stub.request_count, 3)
+
+    def test_geocode_fails_for_a_result_without_coordinates(self):
+        """
+        Tests that a result missing its coordinates is a geocoding failure, counted by the circuit breaker.
+        """
+        geocoder = GeoapifyGeocoder(self.geocoder_stub.url, api_key='stub', failure_threshold=2)
+        for result in [{'formatted': 'rm26bt'}, {'lat': None, 'lon': 0.2059}]:
+            with patch.object(geocoder.session, 'get') as get:
+                get.return_value.json.return_value = {'results': [result]}
+                with self.assertRaises(GeocodingError):
+                    geocoder.geocode('58 stanley avenue, gidea park, essex, rm26bt')
+        self.assertTrue(geocoder.circuit_breaker.is_open)
+
+    def test_geocode_batch(self):
+        """
+        Tests that a batch of addresses is geocoded concurrently, and that addresses the geocoder is unavailable for are left out.
+        """
+        geocoder = GeoapifyGeocoder(self.geocoder_stub.url, api_key='stub')
+        addresses = ['58 stanley avenue, gidea park, essex, rm26bt', 'ffff, ffff, ffff, rm26bt']
+        self.assertEqual(geocoder.geocode_batch(addresses, max_workers=2),
+                         {'58 stanley avenue, gidea park, essex, rm26bt': (51.5811, 0.2059), 'ffff, ffff, ffff, rm26bt': None})
+        self.assertEqual(self.geocoder_stub.request_count, 2)
+        self.assertEqual(GeoapifyGeocoder(self.geocoder_stub.url).geocode_batch(addresses), {})
+
+    def test_geocode_fails_fast_once_the_upstream_is_slow(self):
+        """
+        Tests that requests time out when the upstream is slow, and that no further requests are made once the circuit opens.
+        """
+        self.geocoder_stub.latency = 0.5
+        geocoder = GeoapifyGeocoder(self.geocoder_stub.url, api_key='stub', read_timeout=0.1, failure_threshold=2)
+        for _ in range(4):
+            with self.assertRaises(GeocodingError):
+                geocoder.geocode('58 stanley avenue, gidea park, essex, rm26bt')
+        self.assertTrue(geocoder.circuit_breaker.is_open)
+        self.assertEqual(self.geocoder_stub.connection_count, 2)
+
+    def test_get_geocoder(self):
+        """
+        Tests that the configured geocoder backend is shared, until the GEOCODER setting changes.
+        """
+        with override_settings(GEOCODER={'URL': self.geocoder_stub.url, 'API_KEY': 'stub', 'READ_TIMEOUT': 1}):
+            geocoder = get_geocoder()
+            self.assertIsInstance(geocoder, GeoapifyGeocoder)
+            self.assertIs(get_geocoder(), geocoder)
+            self.assertEqual(geocoder.url, f'{self.geocoder_stub.url}/v1/geocode/search')
+            self.assertEqual(geocoder.timeout, (3.05, 1))
+        self.assertIsNot(get_geocoder(), geocoder)
+
+    def test_backend_without_geocode_cannot_be_created(self):
+        """
+        Tests that a geocoder backend that does not implement geocode fails when it is created.
+        """
+        class IncompleteGeocoder(Geocoder):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteGeocoder()
@@ -0,0 +1,121 @@
+from decimal import Decimal
+from unittest.mock import patch
+from django.conf import settings
+from django.test import TestCase, override_settings
+from events_and_activities.models import EventsActivities
+from landing_page.models import CustomUserModel
+from ..geocoder_stub import StubGeocoderServer
+from ..geocoders import get_geocoder
+from ..geocoding import GeocodingWorker
+from ..models import PostcodeCoordinates, UserAddress, UserProfile
+from ..sections import section_version
+
+
+class TestGeocodingWorker(TestCase):
+    """
+    Tests for the GeocodingWorker class, using a local stub geocoder.
+    """
+    addresses = [{'address_line_one': '58 stanley avenue', 'city_or_town': 'gidea park', 'county': 'essex',
+                  'postcode': 'rm26bt'},
+                 {'address_line_one': 'ffff', 'city_or_town': 'ffff', 'county': 'ffff', 'postcode': 'e16an'},
+                 {'address_line_one': '60 crawley lane', 'city_or_town': 'gidea park', 'county': 'essex',
+                  'postcode': 'rm26bt'}]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # geocode addresses using a local stub geocoder, which only has a result for the first address
+        cls.geocoder_stub = StubGeocoderServer(results={'58 stanley avenue, gidea park, essex, rm26bt': (51.5811, 0.2059)},
+                                               known_addresses_only=True).start()
+        cls.addClassCleanup(cls.geocoder_stub.stop)
+        geocoder_settings = override_settings(GEOCODER={**settings.GEOCODER, 'URL': cls.geocoder_stub.url, 'API_KEY': 'stub'})
+        geocoder_settings.enable()
+        cls.addClassCleanup(geocoder_settings.disable)
+
+    def setUp(self):
+        self.geocoder_stub.request_count = 0
+        # create users with profiles, and addresses with pending coordinates
+        for number, address in enumerate(self.addresses):
+            user = CustomUserModel.objects.create(username=f'user{number}', email=f'user{number}@gmail.com',
+                                                  password='alpha555')
+            profile = UserProfile.objects.create(user=user, first_name='mark', last_name='taylor',
+                                                 date_of_birth='2000-10-11', sex='male', bio='I like comedy events.')
+            UserAddress.objects.create(user_profile=profile, **address)
+
+    def test_resolve_pending(self):
+        """
+        Tests that a batch of pending addresses is resolved, addresses sharing a postcode being geocoded once, and that
+        addresses without a result are retried until max_attempts before being marked as failed.
+        """
+        worker = GeocodingWorker(batch_size=2, max_attempts=2)
+        versions = {username: section_version('profile', username) for username in ['user0', 'user1', 'user2']}
+        # the first batch has the addresses attempted fewest times, in user order
+        self.assertEqual(worker.resolve_pending(), {'resolved': 1, 'failed': 0, 'pending': 1})
+        self.assertEqual(self.geocoder_stub.request_count, 2)
+        address = UserAddress.objects.get(user_profile__user__username='user0')
+        self.assertEqual((address.latitude, address.longitude), (Decimal('51.5811'), Decimal('0.2059')))
+        self.assertEqual(address.geohash, 'u10jkwj')
+        self.assertEqual(address.geocoding_status, 'resolved')
+        self.assertEqual(UserAddress.objects.get(user_profile__user__username='user1').geocode_attempts, 1)
+        # the profile sections of the updated addresses are invalidated
+        self.assertGreater(section_version('profile', 'user0'), versions['user0'])
+        self.assertGreater(section_version('profile', 'user1'), versions['user1'])
+        self.assertEqual(section_version('profile', 'user2'), versions['user2'])
+        self.assertTrue(PostcodeCoordinates.objects.lookup('RM2 6BT'))
+        # the third address is resolved from the postcode cache
+        self.assertEqual(worker.resolve_pending(), {'resolved': 1, 'failed': 1, 'pending': 0})
+        self.assertEqual(self.geocoder_stub.request_count, 3)
+        self.assertEqual(UserAddress.objects.get(user_profile__user__username='user2').geocoding_status, 'resolved')
+        self.assertEqual(UserAddress.objects.get(user_profile__user__username='user1').geocoding_status, 'failed')
+        self.assertEqual(worker.resolve_pending(), {'resolved': 0, 'failed': 0, 'pending': 0})
+
+    def test_resolve_pending_events(self):
+        """
+        Tests that events saved with pending coordinates are resolved alongside the addresses, from the postcode cache
+        where their postcode was geocoded for an address.
+        """
+        host = CustomUserModel.objects.get(username='user1')
+        for day, address in enumerate([self.addresses[1], self.addresses[2]], start=20):
+            EventsActivities.objects.create(host_user=host, title='paintballing', when=f'2030-12-{day} 12:00:00',
+                                            closing_date='2030-12-15 12:00:00', max_attendees=20, keywords='outdoors',
+                                            description='paintballing then lunch.', requirements='none', **address)
+        self.assertEqual(EventsActivities.objects.filter(geocoding_status='pending').count(), 2)
+        worker = GeocodingWorker(batch_size=1, max_attempts=1)
+        version = section_version('post_events', 'user1')
+        # the first address, then the first event without a result
+        self.assertEqual(worker.resolve_pending(), {'resolved': 1, 'failed': 1, 'pending': 0})
+        # the host's section listing the updated event is invalidated
+        self.assertGreater(section_version('post_events', 'user1'), version)
+        self.assertEqual(EventsActivities.objects.get(when='2030-12-20 12:00:00').geocoding_status, 'failed')
+        # the second address without a result, then the second event from the postcode cache
+        self.assertEqual(worker.resolve_pending(), {'resolved': 1, 'failed': 1, 'pending': 0})
+        event = EventsActivities.objects.get(when='2030-12-21 12:00:00')
+        self.assertEqual((event.latitude, event.longitude, event.geohash, event.geocoding_status),
+                         (Decimal('51.5811'), Decimal('0.2059'), 'u10jkwj', 'resolved'))
+        self.assertEqual(EventsActivities.objects.within_distance(51.5811, 0.2059, 1).get(), event)
+
+    def test_resolve_pending_while_the_geocoder_is_unavailable(self):
+        """
+        Tests that addresses are left pending, without counting an attempt, while the geocoder is unavailable.
+        """
+        with override_settings(GEOCODER={**settings.GEOCODER, 'URL': self.geocoder_stub.url, 'API_KEY': None}):
+            self.assertEqual(GeocodingWorker().resolve_pending(), {'resolved': 0, 'failed': 0, 'pending': 3})
+        self.assertEqual(self.geocoder_stub.request_count, 0)
+        self.assertFalse(UserAddress.objects.exclude(geocoding_status='pending', geocode_attempts=0).exists())
+
+    def test_resolve_pending_skips_addresses_edited_during_the_batch(self):
+        """
+        Tests that the coordinates of an address edited while it was being geocoded are not overwritten.
+        """
+        geocoder = get_geocoder()
+        geocode_batch = geocoder.geocode_batch
+
+        def edit_address_then_geocode_batch(addresses, max_workers):
+            UserAddress.objects.filter(user_profile__user__username='user0').update(address_line_one='60 crawley lane')
+            return geocode_batch(addresses, max_workers)
+
+        with patch.object(geocoder, 'geocode_batch', side_effect=edit_address_then_geocode_batch):
+            self.assertEqual(GeocodingWorker(batch_size=1).resolve_pending(), {'resolved': 0, 'failed': 0, 'pending': 0})
+        address = UserAddress.objects.get(user_profile__user__username='user0')
+        self.assertEqual(address.geocoding_status, 'pending')
+        self.assertIsNone(address.latitude)
@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase
+from .. import geohash
+
+
+class TestGeohash(SimpleTestCase):
+    """
+    Tests for the geohash functions.
+    """
+    def test_encode(self):
+        """
+        Tests that coordinates are encoded to the geohash of the cell containing them.
+        """
+        self.assertEqual(geohash.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geohash.encode(51.5072, -0.1276), 'gcpvj0e')
+        self.assertIsNone(geohash.encode(None, None))
+
+    def test_covering_cells(self):
+        """
+        Tests that the covering cells of a distance contain every location within that distance, and that larger distances
+        use coarser cells.
+        """
+        cells = geohash.covering_cells(51.5072, -0.1276, 10)
+        self.assertLessEqual(len(cells), geohash.MAX_COVERING_CELLS)
+        # about 9 km north, south, east and west of central London
+        for latitude, longitude in [(51.588, -0.1276), (51.426, -0.1276), (51.5072, 0.002), (51.5072, -0.257)]:
+            with self.subTest((latitude, longitude)):
+                self.assertTrue(any(geohash.encode(latitude, longitude).startswith(cell) for cell in cells))
+        self.assertLess(len(geohash.covering_cells(51.5072, -0.1276, 100)[0]), len(cells[0]))
+        self.assertIsNone(geohash.covering_cells(51.5072, -0.1276, 5000))
+
+    def test_covering_cells_wrap_around_the_antimeridian(self):
+        """
+        Tests that the covering cells of a point next to the antimeridian include the cells on its other side.
+        """
+        cells = geohash.covering_cells(0.0, 179.99, 100)
+        self.assertTrue(any(geohash.encode(0.0, -179.99).startswith(cell) for cell in cells))
+
+    def test_prefix_range(self):
+        """
+        Tests that the prefix range bounds every geohash starting with the prefix, and no other.
+        """
+        lowest, highest = geohash.prefix_range('gcpv')
+        self.assertTrue(lowest <= 'gcpv000' <= 'gcpvj0e' <= 'gcpvzzz' <= highest)
+        self.assertFalse(lowest <= 'gcpu' + 'zzz' <= highest)
+        self.assertFalse(lowest <= 'gcpw000' <= highest)
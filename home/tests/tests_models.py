@@ -1,7 +1,11 @@
 import datetime
+import io
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.management import call_command
 from django.test import TestCase
 from landing_page.models import CustomUserModel
-from ..models import UserAddress, UserProfile
+from ..models import PostcodeCoordinates, UserAddress, UserProfile
 
 
 class TestUserProfileModel(TestCase):
@@ -132,9 +136,11 @@ class TestUserAddressModel(TestCase):
         Tests that the ProfileMixin methods work as expected for the UserAddress model.
         """
         # testing retrieve_field_names class method
-        expected_names = ['user_profile', 'address_line_one', 'city_or_town', 'county', 'postcode', 'latitude', 'longitude']
+        expected_names = ['user_profile', 'address_line_one', 'city_or_town', 'county', 'postcode', 'latitude', 'longitude',
+                          'geohash', 'geocoding_status', 'geocode_attempts']
         self.assertEqual(UserAddress.retrieve_field_names(False), expected_names)
-        expected_verbose_names = ['user profile', 'Address line 1', 'City/Town', 'County', 'Postcode', 'latitude', 'longitude']
+        expected_verbose_names = ['user profile', 'Address line 1', 'City/Town', 'County', 'Postcode', 'latitude', 'longitude',
+                                  'geohash', 'geocoding status', 'geocode attempts']
         self.assertEqual(UserAddress.retrieve_field_names(), expected_verbose_names)
         # # testing retrieve_field_data method
         user = CustomUserModel.objects.get(username='taylor111')
@@ -152,7 +158,10 @@ class TestUserAddressModel(TestCase):
                                  'County': 'essex',
                                  'Postcode': 'rm26bt',
                                  'latitude': 51.5811,
-                                 'longitude': 0.2059}
+                                 'longitude': 0.2059,
+                                 'geohash': 'u10jkwj',
+                                 'geocoding status': 'resolved',
+                                 'geocode attempts': 0}
         self.assertEqual(new_address.retrieve_field_data(), expected_verbose_data)
         expected_data = {'user_profile': new_profile,
                          'address_line_one': '58 stanley avenue',
@@ -160,6 +169,113 @@ class TestUserAddressModel(TestCase):
                          'county': 'essex',
                          'postcode': 'rm26bt',
                          'latitude': 51.5811,
-                         'longitude': 0.2059}
+                         'longitude': 0.2059,
+                         'geohash': 'u10jkwj',
+                         'geocoding_status': 'resolved',
+                         'geocode_attempts': 0}
         self.assertEqual(new_address.retrieve_field_data(False), expected_data)
 
+    def test_geohash_set_on_save(self):
+        """
+        Tests that the geohash of an address is set from its coordinates whenever it is saved.
+        """
+        profile = UserProfile.objects.get(user__username='taylor111')
+        new_address = UserAddress.objects.create(user_profile=profile, **self.address)
+        self.assertEqual(UserAddress.objects.get(user_profile=profile).geohash, 'u10jkwj')
+        # moving to central London
+        new_address.latitude = 51.5072
+        new_address.longitude = -0.1276
+        new_address.save(update_fields=['latitude', 'longitude'])
+        self.assertEqual(UserAddress.objects.get(user_profile=profile).geohash, 'gcpvj0e')
+
+    def test_geocoding_status_set_on_save(self):
+        """
+        Tests that an address is resolved once it has coordinates, and pending again once they are cleared.
+        """
+        profile = UserProfile.objects.get(user__username='taylor111')
+        new_address = UserAddress.objects.create(user_profile=profile, **{**self.address, 'latitude': None, 'longitude': None})
+        self.assertEqual(new_address.geocoding_status, 'pending')
+        new_address.latitude = self.address['latitude']
+        new_address.longitude = self.address['longitude']
+        new_address.save(update_fields=['latitude', 'longitude'])
+        self.assertEqual(UserAddress.objects.get(user_profile=profile).geocoding_status, 'resolved')
+        new_address.latitude = new_address.longitude = None
+        new_address.save()
+        self.assertEqual(UserAddress.objects.get(user_profile=profile).geocoding_status, 'pending')
+        self.assertIsNone(UserAddress.objects.get(user_profile=profile).geohash)
+
+    def test_within_distance_queryset_method(self):
+        """
+        Tests that addresses are filtered to those within a distance of a point, and annotated with that distance.
+        """
+        profile = UserProfile.objects.get(user__username='taylor111')
+        UserAddress.objects.create(user_profile=profile, **self.address)
+        # the address is about 24.5 km from central London
+        nearby = UserAddress.objects.within_distance(51.5072, -0.1276, 30)
+        self.assertEqual(list(nearby), [UserAddress.objects.get(user_profile=profile)])
+        self.assertAlmostEqual(nearby[0].distance, 24.5, delta=0.1)
+        self.assertFalse(UserAddress.objects.within_distance(51.5072, -0.1276, 20).exists())
+
+
+class TestPostcodeCoordinatesModel(TestCase):
+    """
+    Tests for the PostcodeCoordinates model.
+    """
+    now = datetime.datetime(2030, 1, 1, 12, 0)
+    postcode_dump = ('id,postcode,latitude,longitude\n'
+                     '1,RM2 6BT,51.581100,0.205900\n'
+                     '2,RM6 5UH,51.579100,0.135500\n'
+                     '3,ZZ9 9ZZ,,\n')
+
+    def test_postcode_cache_lookup(self):
+        """
+        Tests that cached coordinates are found by normalised postcode until they expire.
+        """
+        PostcodeCoordinates.objects.store('RM2 6BT', 51.5811, 0.2059, now=self.now)
+        self.assertEqual(PostcodeCoordinates.objects.get().postcode, 'rm26bt')
+        expected_coordinates = (Decimal('51.5811'), Decimal('0.2059'))
+        self.assertEqual(PostcodeCoordinates.objects.lookup('rm2 6bt', now=self.now), expected_coordinates)
+        self.assertEqual(PostcodeCoordinates.objects.lookup(' Rm26Bt', now=self.now), expected_coordinates)
+        self.assertIsNone(PostcodeCoordinates.objects.lookup('rm65uh', now=self.now))
+        expiry = self.now + PostcodeCoordinates.objects.ttl
+        self.assertIsNone(PostcodeCoordinates.objects.lookup('rm26bt', now=expiry))
+        # expired coordinates are deleted when coordinates are next stored
+        PostcodeCoordinates.objects.store('rm65uh', 51.5791, 0.1355, now=expiry)
+        self.assertEqual(list(PostcodeCoordinates.objects.values_list('postcode', flat=True)), ['rm65uh'])
+
+    def test_postcode_cache_least_recently_used_eviction(self):
+        """
+        Tests that the least recently used geocoded coordinates are evicted beyond max_entries, but never loaded coordinates.
+        """
+        PostcodeCoordinates.objects.load_csv(io.StringIO(self.postcode_dump))
+        with patch.object(PostcodeCoordinates.objects, 'max_entries', 2):
+            PostcodeCoordinates.objects.store('e1 6an', 51.5202, -0.0712, now=self.now)
+            PostcodeCoordinates.objects.store('sw1a 1aa', 51.5010, -0.1416, now=self.now + datetime.timedelta(minutes=1))
+            # using the first stored coordinates, so that the second become the least recently used
+            PostcodeCoordinates.objects.lookup('e1 6an', now=self.now + datetime.timedelta(minutes=2))
+            PostcodeCoordinates.objects.store('n1 9gu', 51.5308, -0.1238, now=self.now + datetime.timedelta(minutes=3))
+        self.assertEqual(list(PostcodeCoordinates.objects.values_list('postcode', flat=True).order_by('postcode')),
+                         ['e16an', 'n19gu', 'rm26bt', 'rm65uh'])
+
+    def test_postcode_cache_csv_loading(self):
+        """
+        Tests that a postcode dump is bulk loaded, skipping rows without coordinates and replacing cached coordinates.
+        """
+        PostcodeCoordinates.objects.store('rm26bt', 50.0, 0.0, now=self.now)
+        self.assertEqual(PostcodeCoordinates.objects.load_csv(io.StringIO(self.postcode_dump), batch_size=1), 2)
+        self.assertEqual(list(PostcodeCoordinates.objects.values_list('postcode', 'latitude', 'longitude', 'expires')),
+                         [('rm26bt', Decimal('51.5811'), Decimal('0.2059'), None),
+                          ('rm65uh', Decimal('51.5791'), Decimal('0.1355'), None)])
+        # loaded coordinates never expire
+        self.assertIsNotNone(PostcodeCoordinates.objects.lookup('rm26bt', now=datetime.datetime(2100, 1, 1)))
+
+    def test_load_postcode_coordinates_command(self):
+        """
+        Tests that the management command loads a postcode dump file.
+        """
+        output = io.StringIO()
+        with patch('home.management.commands.load_postcode_coordinates.open',
+                   return_value=io.StringIO(self.postcode_dump), create=True):
+            call_command('load_postcode_coordinates', 'postcodes.csv', stdout=output)
+        self.assertEqual(output.getvalue(), 'Postcodes loaded: 2\n')
+        self.assertEqual(PostcodeCoordinates.objects.count(), 2)
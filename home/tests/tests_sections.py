@@ -0,0 +1,131 @@
+import datetime
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from allauth.account.models import EmailAddress
+from events_and_activities.models import EventsActivities, Engagement
+from landing_page.models import CustomUserModel
+from ..models import UserAddress, UserProfile
+from ..sections import SECTIONS, events_data_timeout, section_version
+
+
+class TestHomepageSections(TestCase):
+    """
+    Tests for the caching of the homepage section data per user.
+    """
+    def setUp(self):
+        cache.clear()
+        self.host = CustomUserModel.objects.create(username='jimmy147', email='tommypaul147@gmail.com', password='holly!123')
+        self.attendee = CustomUserModel.objects.create(username='jimmy1479', email='tommypaul1478@gmail.com', password='holly!1234')
+        self.other_user = CustomUserModel.objects.create(username='jimmy14790', email='tommypaul14789@gmail.com', password='holly!12345')
+        EmailAddress.objects.create(user=self.host, email=self.host.email, verified=True, primary=True)
+        self.profile = UserProfile.objects.create(user=self.host, first_name='jimmy', last_name='knighton',
+                                                  date_of_birth='1926-03-25', sex='male', bio='I enjoy all outdoor activities.')
+        self.address = UserAddress.objects.create(user_profile=self.profile, address_line_one='57 portland gardens',
+                                                  city_or_town='chadwell heath', county='essex', postcode='rm65uh',
+                                                  latitude=51.5791, longitude=0.1355)
+        self.event = EventsActivities.objects.create(host_user=self.host,
+                                                     status="advertised",
+                                                     title='event1',
+                                                     when="2030-12-23 12:00:00",
+                                                     closing_date="2030-12-15 12:00:00",
+                                                     max_attendees=20,
+                                                     keywords="outdoors,paintballing,competitive",
+                                                     description="Paintballing dayout, followed by lunch.",
+                                                     requirements="min £50 per person. wear suitable shoes. Need to be physically fit.",
+                                                     address_line_one='mayhem paintball',
+                                                     city_or_town='adbridge',
+                                                     county='essex',
+                                                     postcode='rm4 1AA')
+        Engagement.objects.create(event=self.event, user=self.attendee, status='In')
+
+    def section_versions(self):
+        return {(section, user.username): section_version(section, user.username)
+                for section in SECTIONS for user in [self.host, self.attendee, self.other_user]}
+
+    def assertInvalidated(self, change, expected_sections):
+        """
+        Asserts that a change bumps the versions of exactly the expected (section, username) pairs.
+        """
+        versions = self.section_versions()
+        change()
+        changed_versions = self.section_versions()
+        self.assertEqual({section for section, version in changed_versions.items() if version != versions[section]},
+                         expected_sections)
+
+    def test_repeat_homepage_visit_retrieves_unchanged_sections_from_the_cache(self):
+        """
+        Tests that the sections of a repeat homepage visit are retrieved without querying the profile and event tables,
+        and that they are retrieved again once changed.
+        """
+        client = Client()
+        client.force_login(self.host)
+        section_tables = [model._meta.db_table for model in [UserProfile, UserAddress, EventsActivities, Engagement]]
+        with CaptureQueriesContext(connection) as first_visit:
+            client.get('/home/')
+        with CaptureQueriesContext(connection) as repeat_visit:
+            response = client.get('/home/')
+        self.assertEqual([query['sql'] for query in repeat_visit.captured_queries
+                          if any(table in query['sql'] for table in section_tables)], [])
+        self.assertLess(len(repeat_visit), len(first_visit))
+        self.assertEqual(response.context['advertised_hosting_events_data'][0][1], 1)
+        self.assertEqual(dict(response.context['user_profile_data'])['first name'], 'jimmy')
+
+        self.event.attendees.add(self.other_user, through_defaults={'status': 'In'})
+        self.profile.first_name = 'tommy'
+        self.profile.save()
+        response = client.get('/home/')
+        self.assertEqual(response.context['advertised_hosting_events_data'][0][1], 2)
+        self.assertIn('No. of users attending so far: 2.', response.context['advertised_hosting_cards'][0])
+        self.assertEqual(dict(response.context['user_profile_data'])['first name'], 'tommy')
+
+    def test_homepage_checks_verification_and_retrieves_the_profile_once(self):
+        """
+        Tests that the homepage renders its sections without dispatching their views, checking the user's email
+        verification once and retrieving their profile and address with a single query.
+        """
+        client = Client()
+        client.force_login(self.host)
+        # the session, user and email verification, along with the profile and address, and the hosted and engaged events
+        with self.assertNumQueries(6):
+            response = client.get('/home/')
+        self.assertTemplateUsed(response, 'home/edit_profile_modal.html')
+        self.assertTemplateUsed(response, 'events_and_activities/post_events_modal.html')
+        self.assertEqual(response.context['personal_info_form'].initial['date_of_birth'], '25/03/1926')
+        self.assertEqual(response.context['address_form'].initial['postcode'], 'rm65uh')
+        # the session, user and email verification only
+        with self.assertNumQueries(3):
+            client.get('/home/')
+        with self.assertNumQueries(3):
+            response = client.get('/home/profile_form/?refresh=true&first_login=false')
+        self.assertIn('value="rm65uh"', response.json()['modal'])
+
+    def test_changes_invalidate_the_affected_users_sections(self):
+        """
+        Tests that profile, address, event and engagement changes invalidate the sections of exactly the users shown them.
+        """
+        self.assertInvalidated(self.profile.save, {('profile', 'jimmy147')})
+        self.assertInvalidated(self.address.save, {('profile', 'jimmy147')})
+        self.assertInvalidated(self.event.save, {('post_events', 'jimmy147'), ('search_view_events', 'jimmy1479')})
+        self.assertInvalidated(lambda: self.event.attendees.add(self.other_user, through_defaults={'status': 'In'}),
+                               {('post_events', 'jimmy147'), ('search_view_events', 'jimmy1479'),
+                                ('search_view_events', 'jimmy14790')})
+        self.assertInvalidated(Engagement.objects.get(user=self.attendee).delete,
+                               {('post_events', 'jimmy147'), ('search_view_events', 'jimmy1479'),
+                                ('search_view_events', 'jimmy14790')})
+        self.assertInvalidated(self.other_user.event.clear,
+                               {('post_events', 'jimmy147'), ('search_view_events', 'jimmy14790')})
+        self.assertInvalidated(self.event.delete, {('post_events', 'jimmy147')})
+
+    def test_events_data_timeout(self):
+        """
+        Tests that event sections are cached until the next of their events changes status, for no longer than the
+        profile cache timeout.
+        """
+        events_data = EventsActivities.hosting_events.retrieve_events_data(self.host, now=datetime.datetime(2030, 12, 1))
+        self.assertEqual(events_data_timeout(events_data, now=datetime.datetime(2030, 12, 15, 11, 0)), 60 * 60)
+        self.assertEqual(events_data_timeout(events_data, now=datetime.datetime(2030, 12, 15, 11, 59)), 60)
+        self.assertEqual(events_data_timeout(events_data, now=datetime.datetime(2030, 12, 23, 11, 58, 30)), 90)
+        self.assertEqual(events_data_timeout(events_data, now=datetime.datetime(2030, 12, 23, 12, 0)), 60 * 60)
+        self.assertEqual(events_data_timeout({'advertised': [], 'confirmed': []}), 60 * 60)
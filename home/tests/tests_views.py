@@ -1,11 +1,13 @@
 import re
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, override_settings
 from django.test import Client
 from django.urls import reverse
 from allauth.account.models import EmailAddress
 from landing_page.models import CustomUserModel
 from ..models import UserAddress, UserProfile
 from ..forms import EditAddress, EditPersonalInfo
+from ..geocoder_stub import StubGeocoderServer
 
 
 # Create your tests here.
@@ -41,6 +43,13 @@ class TestHomeViews(TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
+        # geocode addresses using a local stub geocoder, which has no result for addresses other than self.address
+        cls.geocoder_stub = StubGeocoderServer(results={'58 stanley avenue, gidea park, essex, rm26bt': (51.5811, 0.2059)},
+                                               known_addresses_only=True).start()
+        cls.addClassCleanup(cls.geocoder_stub.stop)
+        geocoder_settings = override_settings(GEOCODER={**settings.GEOCODER, 'URL': cls.geocoder_stub.url, 'API_KEY': 'stub'})
+        geocoder_settings.enable()
+        cls.addClassCleanup(geocoder_settings.disable)
         # Sign-up new users 
         client = Client()
         client.post('/accounts/signup/', cls.data)
@@ -472,7 +481,8 @@ class TestHomeViews(TestCase):
 
     def test_response_post_request_profile_form_view_by_existing_user_for_api_error_(self):
         """
-        Tests that a post request with valid form data for existing user, during an API related error, receives the expected responses.
+        Tests that a post request with valid form data for existing user, for an address the geocoder has no result for, receives the
+        expected responses, and that the address is saved with its coordinates pending.
         """
         client = Client()
         # existing user sign-in with data
@@ -498,13 +508,18 @@ class TestHomeViews(TestCase):
         response = client.post(reverse('home:profile_form_view'), data=address_form_data, mode='same_origin')
         response_json = response.json()
         self.assertEqual(response.status_code, 200)
-        # check the user profile section, only has the personal info fields updated (user address fields should not change as instance not saved.)
+        # check the user profile section has both the personal info and user address fields updated
         rendered_home_page = client.get('/home/')
         self.assertContains(rendered_home_page, response_json['profile'], html=True)
+        address = UserAddress.objects.get(user_profile__user__email=self.data['email'])
+        self.assertEqual(address.address_line_one, 20*'f')
+        self.assertEqual(address.geocoding_status, 'pending')
+        self.assertIsNone(address.latitude)
         
     def test_response_post_request_profile_form_view_by_new_user_for_api_error(self):
         """
-        Tests that a post request with valid form data for new user, during an API related error, receives the expected responses.
+        Tests that a post request with valid form data for new user, for an address the geocoder has no result for, receives the
+        expected responses, and that the profile is created with the address coordinates pending.
         """
         client = Client()
         # new user sign-in with data2
@@ -530,9 +545,12 @@ class TestHomeViews(TestCase):
         response = client.post(reverse('home:profile_form_view'), data=address_form_data, mode='same_origin')
         response_json = response.json()
         self.assertEqual(response.status_code, 200)
-        # check the user profile section unchanged as user profile instance deleted and user address instance not saved and so created.)
+        # check the user profile section has been created
         rendered_home_page = client.get('/home/')
         self.assertContains(rendered_home_page, response_json['profile'], html=True)
+        address = UserAddress.objects.get(user_profile__user__email=self.data2['email'])
+        self.assertEqual(address.geocoding_status, 'pending')
+        self.assertIsNone(address.latitude)
 
     def test_response_get_fetch_request_profile_form_view(self):
         """
@@ -553,3 +571,37 @@ class TestHomeViews(TestCase):
         # Check that the prefilled values have been restored. CSRF's are different only.
         self.assertHTMLEqual(re.sub("(<input).+(name=\"csrf).+>", "", rendered_edit_profile_modal),
                              re.sub("(<input).+(name=\"csrf).+>", "", response_json['modal']))
+
+    def test_lazy_home_page_sections(self):
+        """
+        Tests that when the LAZY_HOMEPAGE_SECTIONS setting is on, the home page is rendered as a shell of placeholders,
+        without retrieving the user's profile or events, and that each section can then be fetched to replace its placeholder.
+        """
+        client = Client()
+        client.login(email=self.data['email'],
+                     password=self.data['password1'])
+        rendered_home_page = client.get('/home/')
+        with override_settings(LAZY_HOMEPAGE_SECTIONS=True):
+            # the session, user and email verification only
+            with self.assertNumQueries(3):
+                response = client.get('/home/')
+            self.assertTemplateNotUsed(response, 'home/profile.html')
+            self.assertTemplateNotUsed(response, 'home/edit_profile_modal.html')
+            for url, response_key in [('/home/sections/profile/', 'section'),
+                                      ('/home/profile_form/?refresh=true&amp;first_login=false', 'modal'),
+                                      ('/home/sections/post_events/', 'section'),
+                                      ('/home/post_events/?refresh=true', 'modal'),
+                                      ('/home/sections/search_view_events/', 'section')]:
+                with self.subTest(url):
+                    self.assertContains(response, f'data-url="{url}" data-response-key="{response_key}"')
+            for section, context_key in [('profile', 'profile'), ('post_events', 'post_events'),
+                                         ('search_view_events', 'search_view_events')]:
+                with self.subTest(section):
+                    response = client.get(reverse('home:homepage_section', args=[section]), mode='same_origin')
+                    self.assertHTMLEqual(response.json()['section'], rendered_home_page.context[context_key])
+            self.assertEqual(client.get('/home/sections/profile/').json()['first_login'], 'false')
+            self.assertEqual(client.get('/home/sections/reviews/').status_code, 404)
+            client.logout()
+            client.login(email=self.data2['email'],
+                         password=self.data2['password1'])
+            self.assertEqual(client.get('/home/sections/profile/').json()['first_login'], 'true')
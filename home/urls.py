@@ -7,6 +7,8 @@ urlpatterns = [
     path('', views.UserHomePage.as_view(extra_context={'page_id': 'home_page',
                                                        'logged_in': True}),
          name='user_homepage'),
+    path('sections/<str:section>/', views.HomepageSectionView.as_view(),
+         name='homepage_section'),
     path('profile_form/', views.ProfileFormView.as_view(),
          name='profile_form_view'),
     path('post_events/', PostEventsView.as_view(), name='post_events_view'),
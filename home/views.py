@@ -1,106 +1,32 @@
-from django.views.generic.base import TemplateView
+from django.views.generic.base import TemplateView, View
 from django.views.generic.edit import FormView
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import Http404, JsonResponse
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.template.loader import get_template, render_to_string
 from allauth.account.decorators import verified_email_required
-from events_and_activities.views import PostEventsView, ViewEventsView
 from .forms import EditAddress, EditPersonalInfo
 from .models import UserProfile, UserAddress
+from .sections import HomepageSections
 
 # Create your views here.
 
 
-class HomeViewsMixin():
-    """
-    Features methods for retrieving a user's profile from a request, and for rendering the profile template.
-
-    Attributes:
-        profile_template (template): the profile template used for rendering.
-    """
-    profile_template = get_template('home/profile.html')
-
-    def retrieve_profile_from_request(self):
-        """
-        Returns a user's profile if one exists or None.
-
-        Raises:
-            ObjectDoesNotExist: if a profile does not exist.
-        """
-        user = self.request.user
-        if UserProfile.objects.filter(user=user).exists():
-            return user.profile
-        return None
-
-    def render_profile_template(self, to_string=False):
-        """
-        Renders the profile template for a user's homepage.
-
-        Either renders to string or renders to response for different end purposes.
-
-        Args:
-            to_string (boolean): determines the profile render method used.
-
-        Returns:
-            A list containing the rendered profile, the user profile instance, and the user address instance.
-        """
-        user_profile = self.retrieve_profile_from_request()
-        if user_profile:
-            user_profile_data = user_profile.retrieve_field_data()
-            user_profile_data['date of birth'] = user_profile_data['date of birth'].strftime('%d/%m/%Y')
-            self.first_login = False
-            self.further_context['first_login'] = self.first_login
-            user_profile_data.pop('user')
-            if UserAddress.objects.filter(user_profile=user_profile).exists():
-                user_profile_data.pop('address')
-                user_address = UserAddress.objects.get(user_profile=user_profile)
-                user_address_data = user_address.retrieve_field_data()
-                for field in ['user profile', 'latitude', 'longitude']:
-                    user_address_data.pop(field)
-            else:
-                # this branch may be redundant, as if a user has a profile they will have an address as well,
-                # since both are created at the same time using the same form submission.
-                user_address = user_profile_data.pop('address')
-                user_address_data = UserAddress.retrieve_field_names()
-                user_address_data = {key: '' for key in user_address_data}
-                for field in ['user profile', 'latitude', 'longitude']:
-                    user_address_data.pop(field)
-        else:
-            self.first_login = True
-            user_profile_data = UserProfile.retrieve_field_names()
-            user_profile_data = {key: '' for key in user_profile_data}
-            user_profile_data.pop('user')
-            user_address = user_profile_data.pop('address')
-            user_address_data = UserAddress.retrieve_field_names()
-            user_address_data = {key: '' for key in user_address_data}
-            for field in ['user profile', 'latitude', 'longitude']:
-                user_address_data.pop(field)
-
-        if not to_string:
-            rendered_profile_template = self.profile_template.render({'user_profile_data': user_profile_data.items(),
-                                                                      'user_address_data': user_address_data.items()})
-        else:
-            rendered_profile_template = render_to_string(template_name='home/profile.html',
-                                                         context={'user_profile_data': user_profile_data.items(),
-                                                                  'user_address_data': user_address_data.items()})
-
-        self.further_context.update({'profile': rendered_profile_template})
-        return [rendered_profile_template, user_profile, user_address]
-
-
 @method_decorator(verified_email_required, name='dispatch')
-class UserHomePage(TemplateView, HomeViewsMixin):
+class UserHomePage(TemplateView):
     """
     View for the user home page. Responsible for retrieving core information and allowing key site activity.
 
     Attributes:
         template_name (str): name of the template used to render the home page.
+        section_placeholder_template (template): the template used to render the placeholders of lazily loaded sections and modals.
         first_login (boolean): indicates whether the user has logged in before.
         further_context (dict): contains context used in rendering the template.
     """
     template_name = "home/home.html"
+    section_placeholder_template = get_template('home/section_placeholder.html')
 
     def __init__(self, **kwargs):
         """
@@ -130,65 +56,105 @@ class UserHomePage(TemplateView, HomeViewsMixin):
         """
         return self.request.user.is_staff
 
+    def render_section_placeholder(self, url, response_key, modal=None):
+        """
+        Renders the placeholder of a lazily loaded section or modal.
+
+        Args:
+            url (str): the url the section or modal is fetched from.
+            response_key (str): the key of the rendered section or modal in the JSON response.
+            modal (str): the id of the modal, which is fetched when first opened rather than once the page has loaded.
+
+        Returns:
+            The rendered placeholder.
+        """
+        return self.section_placeholder_template.render({'url': url, 'response_key': response_key, 'modal': modal})
+
     def get(self, request, *args, **kwargs):
         """
         Handles GET request.
 
+        The sections and modals are rendered directly by HomepageSections, rather than by dispatching their views, so that
+        the user's email verification is checked once and their profile and address are retrieved at most once. When the
+        LAZY_HOMEPAGE_SECTIONS setting is on, placeholders are rendered in their place instead, to be replaced by fetch
+        requests to HomepageSectionView and the modal refresh endpoints.
+
         Returns:
             A HTTP response containing the rendered with context home page template.
         """
-
-        # profile view section:
         self.further_context.update({'username': self.request.user.username,
                                      'button1_name': 'Done',
                                      'button2_name': 'Cancel'})
-        rendered_profile_template, user_profile, user_address = self.render_profile_template()
-
-        self.get_context_data(**kwargs)
-        kwargs.update(self.further_context)
-        rendered_edit_profile_modal = ProfileFormView.as_view()(request,
-                                                                *args,
-                                                                user_profile=user_profile,
-                                                                user_address=user_address,
-                                                                modal='edit_profile_modal',
-                                                                **kwargs)
-        kwargs.update({'edit_profile_modal': rendered_edit_profile_modal})
-
-        # post events view section:
-        rendered_post_events_section_template = PostEventsView.as_view()(request,
-                                                                         *args,
-                                                                         get_modal=False,
-                                                                         **kwargs)
-        rendered_post_events_modal = PostEventsView.as_view()(request,
-                                                              *args,
-                                                              get_modal=True,
-                                                              modal='post_events_modal',
-                                                              **kwargs)
-        kwargs.update({'post_events': rendered_post_events_section_template, 'post_events_modal': rendered_post_events_modal})
-
-        # search and view events section:
-        rendered_search_view_events_section_template = ViewEventsView.as_view()(request,
-                                                                                *args,
-                                                                                get_modal=False,
-                                                                                **kwargs)
-        kwargs.update({'search_view_events': rendered_search_view_events_section_template})
+        if settings.LAZY_HOMEPAGE_SECTIONS:
+            self.further_context.update({
+                'profile': self.render_section_placeholder(reverse('home:homepage_section', args=['profile']), 'section'),
+                'edit_profile_modal': self.render_section_placeholder(f"{reverse('home:profile_form_view')}?refresh=true&first_login=false",
+                                                                      'modal', modal='edit_profile_modal'),
+                'post_events': self.render_section_placeholder(reverse('home:homepage_section', args=['post_events']), 'section'),
+                'post_events_modal': self.render_section_placeholder(f"{reverse('home:post_events_view')}?refresh=true",
+                                                                     'modal', modal='post_events_modal'),
+                'search_view_events': self.render_section_placeholder(reverse('home:homepage_section', args=['search_view_events']),
+                                                                      'section')})
+            return super().get(request, *args, **kwargs)
+
+        sections = HomepageSections(request)
+        self.first_login = sections.first_login
+        self.further_context.update({'first_login': self.first_login,
+                                     # profile view section:
+                                     'profile': sections.render_profile(),
+                                     'edit_profile_modal': sections.render_edit_profile_modal(),
+                                     # post events view section:
+                                     'post_events': sections.render_post_events_section(),
+                                     'post_events_modal': sections.render_post_events_modal(),
+                                     # search and view events section:
+                                     'search_view_events': sections.render_search_view_events_section()})
         return super().get(request, *args, **kwargs)
 
 
 @method_decorator(verified_email_required, name='dispatch')
-class ProfileFormView(FormView, HomeViewsMixin):
+class HomepageSectionView(View):
+    """
+    Returns a rendered section of a user's homepage, for homepages whose sections are fetched once the page has loaded.
+
+    Attributes:
+        section_renderers (dict): the names of the HomepageSections methods rendering each section.
+    """
+    section_renderers = {'profile': 'render_profile',
+                         'post_events': 'render_post_events_section',
+                         'search_view_events': 'render_search_view_events_section'}
+
+    def get(self, request, section):
+        """
+        Handles GET requests for a rendered section.
+
+        Raises:
+            Http404: if there is no such section.
+
+        Returns:
+            A JSON response containing the rendered section, along with whether it is the user's first login for the
+            profile section, in which case the edit profile modal is fetched and displayed straight away.
+        """
+        if section not in self.section_renderers:
+            raise Http404('No such homepage section.')
+        sections = HomepageSections(request)
+        data = {'section': getattr(sections, self.section_renderers[section])()}
+        if section == 'profile':
+            data['first_login'] = 'true' if sections.first_login else 'false'
+        return JsonResponse(data)
+
+
+@method_decorator(verified_email_required, name='dispatch')
+class ProfileFormView(FormView):
     """
-    Generates the initial profile modal form for a user, and processes form submission and profile updating.
+    Refreshes the edit profile modal form for a user, and processes form submission and profile updating.
 
     Attributes:
-        modal_template (template): the template used to render the edit profile modal.
         initial (dict): contains the initial form data to prepopulate a form.
         first_login (boolean): indicates whether the user has logged in before.
         further_context (dict): contains context used in rendering the template.
         form_class (form): The default form class.
     """
     prefix = None
-    modal_template = get_template('home/edit_profile_modal.html')
 
     def __init__(self, **kwargs):
         """
@@ -203,46 +169,15 @@ class ProfileFormView(FormView, HomeViewsMixin):
 
     def get(self, request, *args, **kwargs):
         """
-        Handles GET request for edit profile form.
+        Handles GET request for edit profile form refreshes.
 
         Returns:
-            Either an empty modal form, or a prepopulated form if the user already has a profile.
+            A JSON response containing the rendered edit profile modal, with its forms prepopulated if the user already has
+            a profile, or a redirect to the homepage if it is not a form refresh request.
         """
-
-        if request.path != reverse('home:user_homepage'):
-            # establish whether it is a form refresh request
-            if request.environ['QUERY_STRING'] == 'refresh=true&first_login=false':
-                user = request.user
-                user_profile = user.profile
-                user_address = user_profile.address
-                kwargs.update({'user_profile': user_profile, 'user_address': user_address, 'first_login': False,
-                               'modal': 'edit_profile_modal', 'username': self.request.user.username,
-                               'button1_name': 'Done', 'button2_name': 'Cancel'})
-            else:
-                return redirect(reverse('home:user_homepage'))
-
-        if not kwargs['first_login']:
-            self.initial = kwargs['user_profile'].retrieve_field_data(False)
-            unformatted_date = self.initial['date_of_birth']
-            self.initial['date_of_birth'] = unformatted_date.strftime('%d/%m/%Y')
-            form = self.get_form()
-            kwargs.update({'personal_info_form': form})
-
-            self.initial.update(kwargs['user_address'].retrieve_field_data(False))
-            self.form_class = EditAddress
-            form = self.get_form()
-            kwargs.update({'address_form': form})
-        else:
-            form = self.get_form()
-            kwargs.update({'personal_info_form': form})
-            self.form_class = EditAddress
-            form = self.get_form()
-            kwargs.update({'address_form': form})
-
-        rendered_modal_template = self.modal_template.render(kwargs, request)
-        if request.GET.get('refresh', ''):
-            return JsonResponse({'modal': rendered_modal_template})
-        return rendered_modal_template
+        if request.environ['QUERY_STRING'] != 'refresh=true&first_login=false':
+            return redirect(reverse('home:user_homepage'))
+        return JsonResponse({'modal': HomepageSections(request).render_edit_profile_modal()})
 
     def post(self, request, *args, **kwargs):
         """
@@ -302,14 +237,10 @@ class ProfileFormView(FormView, HomeViewsMixin):
             else:
                 if form.has_changed():
                     form.post_clean_processing(user_profile=user_profile)
-                    error = form.set_coordintes()
-                    if not error:
-                        form.save()
-                    else:
-                        if self.first_login:
-                            user_profile.delete()
-                        data.update({'error': 'true'})
-                rendered_profile_template = self.render_profile_template(to_string=True)[0]
+                    # saved without waiting on the geocoder, any coordinates not in the postcode cache being resolved by the geocoding worker.
+                    form.set_cached_coordinates()
+                    form.save()
+                rendered_profile_template = HomepageSections(request).render_profile()
                 # retrieving the inner html of the grid container element
                 trimmed_rendered_profile_template = rendered_profile_template[rendered_profile_template.index('<div class="left'):-6]
                 data.update({'profile': trimmed_rendered_profile_template})
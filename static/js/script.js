@@ -38,6 +38,7 @@ let withdrawButtons = [...document.getElementsByClassName('withdraw')];
 let searchAdvertsButton = document.getElementById('search_adverts_button');
 let gridContainers = [...document.getElementsByClassName('grid_container')];
 let registerInterestButtons = [...document.getElementsByClassName('register_interest')];
+let loadMoreAdvertsButton = document.getElementById('load_more_adverts');
 let attendeeInfoButtons = [...document.getElementsByClassName('attendee_info')];
 let attendeeContactInfoModal = document.getElementById('attendee_contact_info');
 let attendeeContactInfoModalCloseButton = attendeeContactInfoModal ? document.querySelector(".modal_button[name = 'close']") : null;
@@ -45,6 +46,7 @@ let hostInfoButtons = [...document.getElementsByClassName('host_info')];
 let hostContactInfoModal = document.getElementById('host_contact_info');
 let hostContactInfoModalCloseButton = hostContactInfoModal ? document.querySelector(".modal_button[name = 'close']") : null;
 let backToTopButton = document.getElementById('back_to_top');
+let sectionPlaceholders = [...document.getElementsByClassName('section_placeholder')];
 
 // JS Section: Event listeners:
 
@@ -289,6 +291,21 @@ function registerInterestButtonListeners() {
     }
 }
 
+/** Adds click event listener to the load more adverts button.
+ *  Event handler performs fetch GET request in order to
+ *  retrieve and display the next page of event adverts.
+ *  @summary Adds click listener to the load more adverts button. Triggers fetch GET request.
+ */
+function loadMoreAdvertsButtonListener() {
+    if (!loadMoreAdvertsButton) {
+        return;
+    }
+    // remove exisitng listeners to prevent duplication
+    loadMoreAdvertsButton.removeEventListener('click', loadMoreAdvertsFetchHandler);
+    // add new listeners
+    loadMoreAdvertsButton.addEventListener('click', loadMoreAdvertsFetchHandler);
+}
+
 /** Adds click event listeners to
  *  contact info buttons. Event
  *  handler performs fetch POST request
@@ -512,12 +529,18 @@ var expandIconHandler = (event) => {
         siblingIcon.style.display = 'inline-block';
     }
 };
-var openModalButtonHandler = (event) => {
-    let i = openModalButtons.indexOf(event.currentTarget);
-    if (window.getComputedStyle(modalContainers[i]).getPropertyValue('display') === 'none') {
-        modalContainers[i].style.display = 'block';
-        modals[i].focus();
-        modals[i].scrollTo({
+var openModalButtonHandler = async (event) => {
+    let modalId = event.currentTarget.getAttribute('aria-controls');
+    // a lazily loaded modal is fetched when first opened
+    let placeholder = sectionPlaceholders.find((sectionPlaceholder) => sectionPlaceholder.dataset.modal === modalId);
+    if (placeholder) {
+        await loadSectionFetchHandler(placeholder);
+    }
+    let modal = document.getElementById(modalId);
+    if (modal && window.getComputedStyle(modal.parentElement).getPropertyValue('display') === 'none') {
+        modal.parentElement.style.display = 'block';
+        modal.focus();
+        modal.scrollTo({
             top: 0,
             behaviour: 'instant'
         });
@@ -922,6 +945,7 @@ function executeAllPageAddListenerFunctions() {
  */
 function executeAllSearchEventAdvertsAddListenersFunctions() {
     registerInterestButtonListeners();
+    loadMoreAdvertsButtonListener();
 }
 
 /**Recreates all the event listeners
@@ -1000,6 +1024,7 @@ function refreshDomElementVariables() {
     searchAdvertsButton = document.getElementById('search_adverts_button');
     gridContainers = [...document.getElementsByClassName('grid_container')];
     registerInterestButtons = [...document.getElementsByClassName('register_interest')];
+    loadMoreAdvertsButton = document.getElementById('load_more_adverts');
     attendeeInfoButtons = [...document.getElementsByClassName('attendee_info')];
     attendeeContactInfoModal = document.getElementById('attendee_contact_info');
     attendeeContactInfoModalCloseButton = attendeeContactInfoModal ? document.querySelector(".modal_button[name = 'close']") : null;
@@ -1007,6 +1032,7 @@ function refreshDomElementVariables() {
     hostContactInfoModal = document.getElementById('host_contact_info');
     hostContactInfoModalCloseButton = hostContactInfoModal ? document.querySelector(".modal_button[name = 'close']") : null;
     backToTopButton = document.getElementById('back_to_top');
+    sectionPlaceholders = [...document.getElementsByClassName('section_placeholder')];
 }
 
 // JS Subsection: Fetch requests:
@@ -1485,7 +1511,7 @@ async function registerInterestFetchHandler(event) {
             let event_container = target.parentElement.parentElement;
             event_container.style.display = 'none';
             // code to display the 'there are no adverts' message, if there are no other event adverts left.
-            if (document.getElementsByClassName('advert').length - document.querySelectorAll('.advert[style="display: none;"]').length === 0) {
+            if (document.getElementsByClassName('advert').length - document.querySelectorAll('.advert[style="display: none;"]').length === 0 && !loadMoreAdvertsButton) {
                 let no_of_containers = document.getElementsByClassName('advert').length;
                 let lastEventContainer = document.getElementsByClassName('advert')[no_of_containers -1];
                 let container = lastEventContainer.insertAdjacentElement('afterend', document.createElement('div'));
@@ -1553,6 +1579,107 @@ async function registerInterestFetchHandler(event) {
     }     
 }
 
+/** Fetch GET request handler for loading a lazily loaded homepage
+ *  section or modal, which replaces its placeholder.
+ * @summary Fetch GET request handler for loading a homepage section or modal.
+ * @param {Object} placeholder - the placeholder element of the section or modal.
+ * @returns {Object} the JSON response, or undefined if the request failed.
+ */
+async function loadSectionFetchHandler(placeholder) {
+    try {
+        let request = new Request(placeholder.dataset.url, {method: 'GET', mode: 'same-origin'});
+        let response = await fetch(request);
+        let responseJSON = await response.json();
+        let replacement = document.createElement('div');
+        replacement.innerHTML = responseJSON[placeholder.dataset.responseKey];
+        placeholder.replaceWith(...replacement.childNodes);
+        refreshDomElementVariables();
+        executeAllPageAddListenerFunctions();
+        executeAllHomePageAddListenersFunctions();
+        return responseJSON;
+    }
+    catch(error) {
+        console.error(error);
+        let errMsg = `There was a problem loading your homepage, please refresh the page, if the error persists, please email us for assistance.`;
+                Swal.fire({
+                    title: 'Something went wrong',
+                    html: `<p>${errMsg}</p>
+                           <p>(${error})</p>`,
+                    icon: 'error',
+                    allowOutsideClick: false,
+                    confirmButtonText: 'Continue',
+                    confirmButtonAriaLabel: 'Continue'
+                });
+    }
+}
+
+/** Loads the lazily loaded homepage sections, other than the modals,
+ *  which are loaded when first opened. The edit profile modal is loaded
+ *  straight away on a user's first login, as it is then displayed.
+ * @summary Loads the lazily loaded homepage sections.
+ */
+async function loadHomePageSections() {
+    let placeholders = sectionPlaceholders.filter((placeholder) => !placeholder.dataset.modal);
+    let responses = await Promise.all(placeholders.map(loadSectionFetchHandler));
+    if (responses.some((responseJSON) => responseJSON && responseJSON.first_login === 'true')) {
+        let editProfileModalPlaceholder = sectionPlaceholders.find((placeholder) => placeholder.dataset.modal === 'edit_profile_modal');
+        if (editProfileModalPlaceholder) {
+            await loadSectionFetchHandler(editProfileModalPlaceholder);
+        }
+    }
+}
+
+/** Fetch GET request handler for retrieving the
+ *  next page of event adverts, following the cursor
+ *  of the last displayed advert.
+ * @summary Fetch GET request handler for loading more event adverts.
+ */
+async function loadMoreAdvertsFetchHandler(event) {
+    let target = event.currentTarget;
+    let requestUrl = `page/?after=${encodeURIComponent(target.dataset.nextCursor)}&q=${encodeURIComponent(target.dataset.search)}&keywords=${encodeURIComponent(target.dataset.keywords)}&distance=${encodeURIComponent(target.dataset.distance)}`;
+
+    try {
+        let request = new Request(requestUrl, {method: 'GET', mode: 'same-origin'});
+        let response = await fetch(request);
+        let responseJSON = await response.json();
+
+        if (responseJSON.successful === 'true') {
+            target.insertAdjacentHTML('beforebegin', responseJSON.adverts);
+            if (responseJSON.next_cursor) {
+                target.dataset.nextCursor = responseJSON.next_cursor;
+            } else {
+                target.remove();
+            }
+            refreshDomElementVariables();
+            executeAllPageAddListenerFunctions();
+            executeAllSearchEventAdvertsAddListenersFunctions();
+        }
+        else {
+            Swal.fire({
+                title: 'Something went wrong',
+                text: 'Unable to load more adverts at the moment, please refresh the page or try again later.',
+                icon: 'error',
+                allowOutsideClick: false,
+                confirmButtonText: 'Continue',
+                confirmButtonAriaLabel: 'Continue',
+            });
+        }
+    }
+    catch(error) {
+        console.error(error);
+        let errMsg = `There was a problem completing your last request, please try again, if the error persists, please email us for assistance.`;
+                Swal.fire({
+                    title: 'Something went wrong',
+                    html: `<p>${errMsg}</p>
+                           <p>(${error})</p>`,
+                    icon: 'error',
+                    allowOutsideClick: false,
+                    confirmButtonText: 'Continue',
+                    confirmButtonAriaLabel: 'Continue'
+                });
+    }
+}
+
 /** 
  * @summary Fetch POST request handler for retrieving and displaying the attendee contact info of a host user's event.
  */
@@ -1653,6 +1780,9 @@ if (document.getElementsByTagName('title')[0].textContent === 'Eventabase') {
 // homepage
 if (document.getElementsByTagName('title')[0].textContent === 'Home') {
     executeAllHomePageAddListenersFunctions();    
+    if (sectionPlaceholders.length) {
+        loadHomePageSections();
+    }
 }
 
 // search event adverts page
@@ -1673,7 +1803,7 @@ if (document.getElementsByTagName('title')[0].textContent === 'Search event adve
 //     modalButtons, openModalButtons, postEventModal, radioInputs, advertisedEvents, upcomingEvents, postEventFormFetchHandler, postEventForm,
 //     refreshFormFetchHandler, closeModal, restoreForm, postEventFormDoneButton, updateEventFetchHandler,
 //     deleteEventButtons, cancelEventButtons, interestedEvents, attendingEvents, withdrawButtons, withdrawFromEventFetchHandler, openModalButtonHandler,
-//     searchAdvertsButton, gridContainers, registerInterestButtons, registerInterestFetchHandler, attendeeContactInfoModal, attendeeContactInfoModalCloseButton,
+//     searchAdvertsButton, gridContainers, registerInterestButtons, registerInterestFetchHandler, loadMoreAdvertsButton, loadMoreAdvertsFetchHandler, attendeeContactInfoModal, attendeeContactInfoModalCloseButton,
 //     attendeeInfoButtons, hostContactInfoModal, hostInfoButtons, hostContactInfoModalCloseButton, retrieveContactInfoFetchHandler, closeContactInfoModal,
-//     backToTopButton
+//     backToTopButton, sectionPlaceholders, loadSectionFetchHandler, loadHomePageSections
 // };
\ No newline at end of file
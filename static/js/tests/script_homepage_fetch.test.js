@@ -14,7 +14,8 @@ let {moreMenu, moreMenuContainer, moreMenuButtons, uniqueFocusable, helpTextIcon
      editAddressForm, editPersonalInfoForm, openModalButtons, deleteEventButtons, cancelEventButtons,
      withdrawButtons, withdrawFromEventFetchHandler, registerInterestFetchHandler,
      attendeeContactInfoModalCloseButton, attendeeInfoButtons, hostInfoButtons, attendeeContactInfoModal,
-     hostContactInfoModalCloseButton, hostContactInfoModal, retrieveContactInfoFetchHandler, postEventFormDoneButton} = require('../script.js');
+     hostContactInfoModalCloseButton, hostContactInfoModal, retrieveContactInfoFetchHandler, postEventFormDoneButton,
+     loadSectionFetchHandler, openModalButtonHandler} = require('../script.js');
 const { default: Swal } = require('sweetalert2');
 // sweetalert2 library import
 global.Swal = require('sweetalert2');
@@ -48,7 +49,8 @@ describe('All tests', () => {
         editAddressForm, editPersonalInfoForm, openModalButtons, deleteEventButtons, cancelEventButtons,
         withdrawButtons, withdrawFromEventFetchHandler, registerInterestFetchHandler,
         attendeeContactInfoModalCloseButton, attendeeInfoButtons, hostInfoButtons, attendeeContactInfoModal,
-        hostContactInfoModalCloseButton, hostContactInfoModal, retrieveContactInfoFetchHandler, postEventFormDoneButton} = require('../script.js'));
+        hostContactInfoModalCloseButton, hostContactInfoModal, retrieveContactInfoFetchHandler, postEventFormDoneButton,
+     loadSectionFetchHandler, openModalButtonHandler} = require('../script.js'));
     })
     describe('test the ProfileFormView fetch POST request works', () => {
         beforeEach(() => {
@@ -807,6 +809,42 @@ persists, please contact us.`
             })
         })
     })
+    describe('test lazily loaded homepage sections and modals are loaded by fetch GET requests', () => {
+        afterEach(() => {
+            Request.mockClear();
+            fetch.mockClear();
+        })
+
+        test('that a section placeholder is replaced by the fetched section', async () => {
+            let searchEventsSection = document.getElementById('search_events');
+            searchEventsSection.innerHTML = '<div class="section_placeholder" data-url="/home/sections/search_view_events/" data-response-key="section"></div>';
+            json_data = {'section': '<h2>Search &amp; View Events</h2><div id="search_events_grid"></div>'};
+            await loadSectionFetchHandler(searchEventsSection.firstElementChild);
+            expect(Request).toHaveBeenCalledTimes(1);
+            expect(fetch).toHaveBeenCalledTimes(1);
+            expect(Request.mock.lastCall).toEqual(['/home/sections/search_view_events/', {method: 'GET', mode: 'same-origin'}]);
+            expect(searchEventsSection.innerHTML).toBe(json_data.section);
+            expect(document.getElementsByClassName('section_placeholder').length).toBe(0);
+        })
+
+        test('that a modal placeholder is replaced by the fetched modal when it is first opened', async () => {
+            let postEventModalContainer = postEventModal.parentElement;
+            let renderedModal = postEventModalContainer.outerHTML;
+            postEventModalContainer.outerHTML = '<div class="section_placeholder" data-url="post_events/?refresh=true" data-response-key="modal" data-modal="post_events_modal"></div>';
+            // reloading the script, so that the placeholder is found
+            jest.resetModules();
+            ({loadSectionFetchHandler, openModalButtonHandler} = require('../script.js'));
+            json_data = {'modal': renderedModal};
+            let openPostEventsModalButton = document.querySelector(".open_modal_button[aria-controls='post_events_modal']");
+            await openModalButtonHandler({currentTarget: openPostEventsModalButton});
+            expect(fetch).toHaveBeenCalledTimes(1);
+            expect(document.getElementsByClassName('section_placeholder').length).toBe(0);
+            expect(document.getElementById('post_events_modal').parentElement.style.display).toBe('block');
+            // the loaded modal is not fetched again
+            await openModalButtonHandler({currentTarget: openPostEventsModalButton});
+            expect(fetch).toHaveBeenCalledTimes(1);
+        })
+    })
 })
     
     
\ No newline at end of file